@@ -0,0 +1,113 @@
+﻿# bench/cancel.py
+# -*- coding: utf-8 -*-
+"""停止响应测试：任务卡在长等待时调用 Engine.stop()，测量到任务结束、队列空闲的时间。
+python -m bench.cancel --groups 12 --max-latency 1.5；任一场景超限则退出码为 1"""
+import argparse
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fixture_server import FixtureServer, SELF_VANITY
+from bench.run import percentile
+from utils.endpoints import set_endpoints
+from utils.i18n import Lang
+
+# 场景 -> (说明, 服务器延迟 ms, 触发停止的条件)
+SCENARIOS = {
+    "post_delay": ("pacing sleep between posts (delay 60s)", 0, lambda c, t: c.get("posts", 0) >= 1),
+    "slow_page": ("driver.get on a page that takes 20s", 20000, lambda c, t: t >= 2.0),
+    "join_delay": ("in-page join script between groups (delay 60s)", 0, lambda c, t: c.get("joins", 0) >= 1),
+    "leave_batch": ("in-page batch leave between groups (interval 60s)", 0, lambda c, t: c.get("leaves", 0) >= 1),
+}
+LONG_WAIT = 60.0
+
+def run_scenario(name: str, args) -> dict:
+    from core.engine import Engine, JobConfig
+
+    desc, latency_ms, trigger = SCENARIOS[name]
+    with FixtureServer(groups=args.groups) as srv, \
+            tempfile.TemporaryDirectory(prefix="sep-cancel-") as tmp:
+        set_endpoints(community=srv.base_url)
+        tmp = Path(tmp)
+        groups = tmp / "groups.txt"
+        groups.write_text("\n".join(srv.group_urls()) + "\n", encoding="utf-8")
+        for p in ("post_wl.txt", "del_wl.txt", "low.txt"):
+            (tmp / p).write_text("", encoding="utf-8")
+        cfg = JobConfig(message="bench message", groups_path=groups, post_wl_path=tmp / "post_wl.txt",
+                        del_wl_path=tmp / "del_wl.txt", low_path=tmp / "low.txt", lang=Lang.EN,
+                        delay=LONG_WAIT, leave_interval=LONG_WAIT, batch_leave=True)
+        engine = Engine(log_emit=(print if args.verbose else lambda s: None), headless=True, lean=True,
+                        state_db=tmp / "state.db", http_probe=False, metrics_dir=None,
+                        journal_path=tmp / "journal.jsonl", profile_dir=tmp / "profile")
+        try:
+            # 先把浏览器启动并打开替身站首页（它会种下 steamLoginSecure），启动耗时不算进场景
+            engine.run("warmup", lambda: engine.ensure_poster().open_page(srv.base_url + "/"))
+            # 延迟在登录之后才打开，否则首页本身就加载不完
+            srv.httpd.latency = latency_ms / 1000.0
+            if name == "post_delay":
+                job = engine.submit("post", engine.post, cfg)
+            elif name == "slow_page":
+                cfg.delay = 0.0
+                job = engine.submit("post", engine.post, cfg)
+            elif name == "join_delay":
+                job = engine.submit("join", engine.join_from_profile, cfg, f"{srv.base_url}/id/{SELF_VANITY}/",
+                                    per_join_delay=LONG_WAIT)
+            else:
+                job = engine.submit("leave_scan", engine.leave_no_comment, cfg)
+
+            t_submit = time.perf_counter()
+            while not job.wait(0.05):
+                if trigger(dict(srv.state.counters), time.perf_counter() - t_submit):
+                    break
+                if time.perf_counter() - t_submit > args.trigger_timeout:
+                    raise RuntimeError(f"{name}: stop condition not reached in {args.trigger_timeout}s")
+            if job.wait(0):
+                raise RuntimeError(f"{name}: job finished before stop ({job.status})")
+            # 让任务进入长等待
+            time.sleep(args.settle)
+            t_stop = time.perf_counter()
+            engine.stop()
+            job.wait()
+            while engine.jobs.busy:
+                time.sleep(0.01)
+            latency = time.perf_counter() - t_stop
+            status = job.status
+            error = repr(job.error) if job.error else None
+        finally:
+            engine.close()
+    return {"scenario": name, "desc": desc, "status": status, "error": error,
+            "stop_latency_s": round(latency, 3), "ok": latency <= args.max_latency}
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.cancel")
+    ap.add_argument("--groups", type=int, default=12)
+    ap.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated: " + ",".join(SCENARIOS))
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--settle", type=float, default=0.5, help="seconds to wait after the trigger before stop()")
+    ap.add_argument("--trigger-timeout", type=float, default=120)
+    ap.add_argument("--max-latency", type=float, default=1.5, help="fail if stop takes longer (seconds)")
+    ap.add_argument("--json", type=Path, help="write results as JSON")
+    ap.add_argument("--verbose", action="store_true")
+    args = ap.parse_args(argv)
+
+    results = []
+    for name in (s.strip() for s in args.scenarios.split(",") if s.strip()):
+        runs = [run_scenario(name, args) for _ in range(max(1, args.repeat))]
+        lat = [r["stop_latency_s"] for r in runs]
+        results.append({"scenario": name, "desc": runs[0]["desc"], "runs": runs,
+                        "p50_s": round(percentile(lat, 0.5), 3), "max_s": max(lat),
+                        "ok": all(r["ok"] for r in runs)})
+
+    print(f"{'scenario':<14}{'p50 s':>8}{'max s':>8}  status     {'':<4}description")
+    for r in results:
+        statuses = ",".join(sorted({x["status"] for x in r["runs"]}))
+        print(f"{r['scenario']:<14}{r['p50_s']:>8}{r['max_s']:>8}  {statuses:<10} "
+              f"{'OK' if r['ok'] else 'SLOW':<4}{r['desc']}")
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    return 0 if all(r["ok"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
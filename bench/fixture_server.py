@@ -0,0 +1,468 @@
+﻿# bench/fixture_server.py
+# -*- coding: utf-8 -*-
+"""本地 Steam 社区替身：模仿 SteamPoster 依赖的页面结构，用于离线测试与基准"""
+import argparse
+import html
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+SELF_VANITY = "benchuser"
+SELF_STEAMID = "76561198000000001"
+SESSION_ID = "benchsession"
+GID_BASE = 103582791429521408
+GROUPS_PER_SCROLL = 20
+RATE_LIMIT_ERROR = ("You've been posting too frequently, and can't make any additional comments "
+                    "for a while. Please wait and try again later.")
+
+# 静态资源大小（字节），让精简模式的差异可以被测出来
+ASSET_SIZES = {
+    ".jpg": 180 * 1024,
+    ".png": 60 * 1024,
+    ".woff2": 90 * 1024,
+    ".webm": 900 * 1024,
+}
+ASSET_TYPES = {
+    ".jpg": "image/jpeg",
+    ".png": "image/png",
+    ".woff2": "font/woff2",
+    ".webm": "video/webm",
+    ".css": "text/css",
+    ".js": "application/javascript",
+}
+
+KIND_OPEN = "open"
+KIND_CLOSED = "closed"
+KIND_COMMENTED = "commented"
+
+def group_kind(i: int) -> str:
+    if i % 5 == 0:
+        return KIND_CLOSED
+    if i % 5 == 1:
+        return KIND_COMMENTED
+    return KIND_OPEN
+
+class FixtureState:
+    def __init__(self, n_groups: int):
+        self.lock = threading.Lock()
+        self.groups = []
+        for i in range(n_groups):
+            vanity = f"benchgroup{i:04d}"
+            self.groups.append({
+                "i": i,
+                "vanity": vanity,
+                "gid": str(GID_BASE + i),
+                "name": f"Bench Group {i}",
+                "kind": group_kind(i),
+                "comments": ([SELF_VANITY] if group_kind(i) == KIND_COMMENTED else []) +
+                            [f"user{(i * 7 + k) % 97}" for k in range(6)],
+                "member": True,
+            })
+        self.by_vanity = {g["vanity"]: g for g in self.groups}
+        self.by_gid = {g["gid"]: g for g in self.groups}
+        self.counters = {"posts": 0, "leaves": 0, "joins": 0, "requests": 0, "bytes": 0}
+
+    def bump(self, key: str, n: int = 1):
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + n
+
+PAGE_HEAD = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<link rel="stylesheet" href="/public/css/fonts.css">
+<script src="/public/javascript/analytics.js"></script>
+<script>
+var g_sessionID = "{session}";
+function ConfirmLeaveGroup(gid, name) {{
+  if (confirm('Are you sure you want to leave the group ' + name + '?')) {{
+    document.getElementById('leave_group_form').submit();
+  }}
+}}
+</script>
+</head><body>
+<div id="global_header"><img src="/public/images/header_bg.jpg"></div>
+<div id="global_actions">{actions}</div>
+"""
+
+ACTIONS_LOGGED_IN = """<div id="global_action_menu">
+<a class="menuitem" href="{base}/id/{vanity}/">{vanity}</a>
+</div>
+<div class="user_avatar playerAvatar online"><a href="{base}/id/{vanity}/"><img src="/public/images/avatar_self.jpg"></a></div>"""
+
+ACTIONS_LOGGED_OUT = """<div id="global_action_menu">
+<a class="global_action_link" href="{base}/login/home/?goto=">login</a>
+</div>"""
+
+COMMENT_TMPL = """<div class="commentthread_comment responsive_body_text">
+<div class="commentthread_comment_avatar playerAvatar"><img src="/public/images/avatar_{author}.jpg"></div>
+<div class="commentthread_comment_content">
+<div class="commentthread_comment_author">
+<a class="hoverunderline commentthread_author_link" href="{base}/id/{author}/" data-miniprofile="{mini}"><bdi>{author}</bdi></a>
+</div>
+<div class="commentthread_comment_text">{text}</div>
+</div></div>"""
+
+ENTRY_TMPL = """<div class="commentthread_entry">
+<div class="commentthread_entry_quotebox">
+<textarea class="commentthread_textarea" id="commentthread_Clan_{gid}_textarea" placeholder="Add a comment"></textarea>
+</div>
+<div class="commentthread_entry_submitlink">
+<span class="btn_green_white_innerfade btn_small" id="commentthread_Clan_{gid}_submit" role="button"><span>Post Comment</span></span>
+</div>
+<div class="commentthread_entry_error" id="commentthread_Clan_{gid}_entry_error" style="display:none"></div>
+</div>
+<script>
+(function () {{
+  var ta = document.getElementById('commentthread_Clan_{gid}_textarea');
+  var btn = document.getElementById('commentthread_Clan_{gid}_submit');
+  var err = document.getElementById('commentthread_Clan_{gid}_entry_error');
+  btn.addEventListener('click', function () {{
+    var body = new URLSearchParams({{comment: ta.value, sessionid: g_sessionID, count: '6'}});
+    fetch('/comment/Clan/post/{gid}/-1/', {{method: 'POST', body: body, credentials: 'include'}})
+      .then(function (r) {{ return r.json(); }})
+      .then(function (res) {{
+        if (res.success) {{
+          ta.value = '';
+          document.getElementById('commentthread_Clan_{gid}_posts').innerHTML = res.comments_html;
+        }} else {{
+          err.textContent = res.error || 'error';
+          err.style.display = 'block';
+        }}
+      }});
+  }});
+}})();
+</script>"""
+
+def render_comments(base: str, authors: list[str]) -> str:
+    out = []
+    for a in authors:
+        mini = "39734273" if a == SELF_VANITY else str(sum(map(ord, a)) * 7919 % 10 ** 8)
+        out.append(COMMENT_TMPL.format(base=base, author=a, mini=mini, text="hello from " + html.escape(a)))
+    return "\n".join(out)
+
+def render_group(base: str, g: dict, logged_in: bool = True) -> str:
+    head = PAGE_HEAD.format(
+        title=f"Steam Community :: Group :: {html.escape(g['name'])}",
+        session=SESSION_ID,
+        actions=(ACTIONS_LOGGED_IN if logged_in else ACTIONS_LOGGED_OUT).format(base=base, vanity=SELF_VANITY),
+    )
+    entry = ENTRY_TMPL.format(gid=g["gid"]) if g["kind"] != KIND_CLOSED and g["member"] else ""
+    leave = ""
+    if g["member"]:
+        leave = (f"<a class=\"btn_blue_white_innerfade btn_medium\" "
+                 f"href=\"javascript:ConfirmLeaveGroup( '{g['gid']}', '{html.escape(g['name'])}' )\">"
+                 f"<span>Leave Group</span></a>\n"
+                 f"<form id=\"leave_group_form\" method=\"POST\" action=\"{base}/groups/{g['vanity']}/\">"
+                 f"<input type=\"hidden\" name=\"action\" value=\"leaveGroup\">"
+                 f"<input type=\"hidden\" name=\"sessionID\" value=\"{SESSION_ID}\">"
+                 f"<input type=\"hidden\" name=\"groupId\" value=\"{g['gid']}\"></form>")
+    return head + f"""
+<div class="grouppage_header">
+<div class="grouppage_header_abbrev"><img src="/public/images/group_avatar_{g['i']}.jpg"></div>
+<h1 class="grouppage_header_name">{html.escape(g['name'])}</h1>
+<div class="grouppage_join_area">{leave}</div>
+</div>
+<video class="grouppage_bg" autoplay muted loop src="/public/videos/group_bg.webm"></video>
+<div class="commentthread_area" id="commentthread_Clan_{g['gid']}_area">
+{entry}
+<div class="commentthread_comments" id="commentthread_Clan_{g['gid']}_posts">
+{render_comments(base, g['comments'])}
+</div>
+</div>
+</body></html>"""
+
+def render_my_groups(base: str, state: FixtureState) -> str:
+    head = PAGE_HEAD.format(
+        title="Steam Community :: Groups",
+        session=SESSION_ID,
+        actions=ACTIONS_LOGGED_IN.format(base=base, vanity=SELF_VANITY),
+    )
+    items = [{"vanity": g["vanity"], "name": g["name"], "i": g["i"]} for g in state.groups if g["member"]]
+    return head + """
+<div id="search_results" class="groups_list"></div>
+<script>
+var ALL = %s;
+var shown = 0;
+var busy = false;
+function block(g) {
+  return '<div class="groupBlock"><div class="avatarMedium"><img src="/public/images/group_avatar_' + g.i + '.jpg"></div>'
+       + '<div class="groupBlockMedium"><div class="groupTitle">'
+       + '<a class="linkTitle" href="%s/groups/' + g.vanity + '">' + g.name + '</a></div></div></div>';
+}
+function more() {
+  var html = '';
+  var end = Math.min(ALL.length, shown + %d);
+  for (; shown < end; shown++) html += block(ALL[shown]);
+  document.getElementById('search_results').insertAdjacentHTML('beforeend', html);
+  busy = false;
+}
+more();
+window.addEventListener('scroll', function () {
+  if (busy || shown >= ALL.length) return;
+  if (window.innerHeight + window.scrollY >= document.body.scrollHeight - 50) {
+    busy = true;
+    setTimeout(more, 300);
+  }
+});
+</script>
+</body></html>""" % (json.dumps(items), base, GROUPS_PER_SCROLL)
+
+def render_profile_xml(base: str, state: FixtureState) -> str:
+    groups = []
+    for g in state.groups:
+        if not g["member"]:
+            continue
+        detail = ""
+        if g["i"] % 4 != 3:
+            detail = (f"<groupName><![CDATA[{g['name']}]]></groupName>"
+                      f"<groupURL><![CDATA[{g['vanity']}]]></groupURL>")
+        primary = "1" if g["i"] == 0 else "0"
+        groups.append(f"<group isPrimary=\"{primary}\"><groupID64>{g['gid']}</groupID64>{detail}</group>")
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?><profile>"
+            f"<steamID64>{SELF_STEAMID}</steamID64><steamID><![CDATA[{SELF_VANITY}]]></steamID>"
+            f"<customURL><![CDATA[{SELF_VANITY}]]></customURL><privacyState>public</privacyState>"
+            f"<groups>{''.join(groups)}</groups></profile>")
+
+def render_members_xml(g: dict) -> str:
+    return ("<?xml version=\"1.0\" encoding=\"UTF-8\" standalone=\"yes\"?><memberList>"
+            f"<groupID64>{g['gid']}</groupID64><groupDetails>"
+            f"<groupName><![CDATA[{g['name']}]]></groupName>"
+            f"<groupURL><![CDATA[{g['vanity']}]]></groupURL></groupDetails>"
+            "<memberCount>10</memberCount></memberList>")
+
+def render_profile(base: str) -> str:
+    head = PAGE_HEAD.format(
+        title=f"Steam Community :: {SELF_VANITY}",
+        session=SESSION_ID,
+        actions=ACTIONS_LOGGED_IN.format(base=base, vanity=SELF_VANITY),
+    )
+    data = {"url": f"{base}/id/{SELF_VANITY}/", "steamid": SELF_STEAMID, "personaname": SELF_VANITY}
+    return head + f"<script>var g_rgProfileData = {json.dumps(data)};</script></body></html>"
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "SEPFixture/1.0"
+    protocol_version = "HTTP/1.1"
+    # 头和正文分两次写，不关 Nagle 的话长连接上每个响应都会多等一个延迟 ACK（~40ms）
+    disable_nagle_algorithm = True
+
+    @property
+    def state(self) -> FixtureState:
+        return self.server.state
+
+    @property
+    def base(self) -> str:
+        return self.server.base_url
+
+    def log_message(self, fmt, *args):
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send(self, code: int, body: bytes | str, ctype: str = "text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+            self.state.bump("bytes", len(body))
+
+    def _redirect(self, location: str, code: int = 302):
+        self._send(code, b"", headers={"Location": location})
+
+    def _delay(self):
+        if self.server.latency:
+            time.sleep(self.server.latency)
+
+    def _form(self) -> dict:
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n).decode("utf-8", errors="ignore") if n else ""
+        return {k: v[-1] for k, v in parse_qs(raw).items()}
+
+    def do_GET(self):
+        self.state.bump("requests")
+        parts = urlsplit(self.path)
+        path, query = parts.path, parse_qs(parts.query)
+        xml = "xml" in query
+
+        m = re.match(r"^/public/.+?(\.[a-z0-9]+)$", path)
+        if m:
+            ext = m.group(1)
+            if ext in ASSET_SIZES:
+                return self._send(200, b"\0" * ASSET_SIZES[ext], ASSET_TYPES[ext],
+                                  {"Cache-Control": "no-store"})
+            if ext in ASSET_TYPES:
+                return self._send(200, "/* fixture */", ASSET_TYPES[ext])
+            return self._send(404, "not found", "text/plain")
+
+        self._delay()
+        logged_in = self.server.logged_in
+
+        if path in ("/", ""):
+            head = PAGE_HEAD.format(
+                title="Steam Community", session=SESSION_ID,
+                actions=(ACTIONS_LOGGED_IN if logged_in else ACTIONS_LOGGED_OUT).format(
+                    base=self.base, vanity=SELF_VANITY),
+            )
+            cookies = {}
+            if logged_in:
+                cookies["Set-Cookie"] = f"steamLoginSecure={SELF_STEAMID}%7C%7Cbench; Path=/; HttpOnly"
+            return self._send(200, head + "</body></html>", headers=cookies)
+
+        if re.match(r"^/my/groups/?$", path):
+            return self._redirect(f"{self.base}/id/{SELF_VANITY}/groups/")
+        if re.match(rf"^/(id/{SELF_VANITY}|profiles/{SELF_STEAMID})/groups/?$", path):
+            return self._send(200, render_my_groups(self.base, self.state))
+        if re.match(r"^/my/?$", path):
+            return self._redirect(f"{self.base}/id/{SELF_VANITY}/" + ("?xml=1" if xml else ""))
+        if re.match(rf"^/(id/{SELF_VANITY}|profiles/{SELF_STEAMID})/?$", path):
+            if xml:
+                return self._send(200, render_profile_xml(self.base, self.state), "text/xml; charset=utf-8")
+            return self._send(200, render_profile(self.base))
+
+        m = re.match(r"^/gid/(\d+)(/memberslistxml)?/?$", path)
+        if m:
+            g = self.state.by_gid.get(m.group(1))
+            if not g:
+                return self._send(404, "group not found", "text/plain")
+            if m.group(2):
+                return self._send(200, render_members_xml(g), "text/xml; charset=utf-8")
+            return self._redirect(f"{self.base}/groups/{g['vanity']}/")
+
+        m = re.match(r"^/groups/([^/]+)(/memberslistxml)?/?$", path)
+        if m:
+            g = self.state.by_vanity.get(m.group(1))
+            if not g:
+                return self._send(404, "group not found", "text/plain")
+            if m.group(2):
+                return self._send(200, render_members_xml(g), "text/xml; charset=utf-8")
+            return self._send(200, render_group(self.base, g, logged_in))
+
+        return self._send(404, "not found", "text/plain")
+
+    do_HEAD = do_GET
+
+    def do_POST(self):
+        self.state.bump("requests")
+        self._delay()
+        path = urlsplit(self.path).path
+        form = self._form()
+
+        m = re.match(r"^/comment/Clan/post/(\d+)/", path)
+        if m:
+            g = self.state.by_gid.get(m.group(1))
+            if not g or g["kind"] == KIND_CLOSED or not g["member"]:
+                return self._send(200, json.dumps({"success": False, "error": "no permission"}),
+                                  "application/json")
+            if not form.get("comment", "").strip():
+                return self._send(200, json.dumps({"success": False, "error": "empty"}), "application/json")
+            limit = self.server.rate_limit_after
+            if limit and self.state.counters["posts"] >= limit:
+                return self._send(200, json.dumps({"success": False, "error": RATE_LIMIT_ERROR}),
+                                  "application/json")
+            with self.state.lock:
+                g["comments"].insert(0, SELF_VANITY)
+                self.state.counters["posts"] += 1
+            return self._send(200, json.dumps({
+                "success": True, "comments_html": render_comments(self.base, g["comments"]),
+            }), "application/json")
+
+        m = re.match(r"^/(?:groups/([^/]+)|gid/(\d+))/?$", path)
+        if m:
+            g = self.state.by_vanity.get(m.group(1)) if m.group(1) else self.state.by_gid.get(m.group(2))
+            if not g:
+                return self._send(404, "group not found", "text/plain")
+            action = form.get("action")
+            if action == "leaveGroup":
+                with self.state.lock:
+                    g["member"] = False
+                    self.state.counters["leaves"] += 1
+                return self._redirect(f"{self.base}/groups/{g['vanity']}/", 303)
+            if action == "join":
+                with self.state.lock:
+                    g["member"] = True
+                    self.state.counters["joins"] += 1
+                return self._send(200, "ok", "text/plain")
+            return self._send(400, "bad action", "text/plain")
+
+        m = re.match(rf"^/(?:id/{SELF_VANITY}|profiles/{SELF_STEAMID})/home_process/?$", path)
+        if m and form.get("action") == "leaveGroup":
+            g = self.state.by_gid.get(form.get("groupId", ""))
+            if not g:
+                return self._send(404, "group not found", "text/plain")
+            with self.state.lock:
+                g["member"] = False
+                self.state.counters["leaves"] += 1
+            return self._send(200, "ok", "text/plain")
+
+        return self._send(404, "not found", "text/plain")
+
+class FixtureServer:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, groups: int = 100,
+                 latency_ms: float = 0, logged_in: bool = True, verbose: bool = False,
+                 rate_limit_after: int = 0):
+        self.httpd = ThreadingHTTPServer((host, port), FixtureHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = FixtureState(groups)
+        self.httpd.latency = max(0.0, latency_ms) / 1000.0
+        self.httpd.logged_in = logged_in
+        self.httpd.verbose = verbose
+        self.httpd.rate_limit_after = max(0, rate_limit_after)
+        self.httpd.base_url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return self.httpd.base_url
+
+    @property
+    def state(self) -> FixtureState:
+        return self.httpd.state
+
+    def group_urls(self, kind: str | None = None) -> list[str]:
+        return [f"{self.base_url}/groups/{g['vanity']}/" for g in self.state.groups
+                if kind is None or g["kind"] == kind]
+
+    def start(self) -> "FixtureServer":
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(prog="python -m bench.fixture_server")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--groups", type=int, default=100)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    ap.add_argument("--logged-out", action="store_true")
+    ap.add_argument("--rate-limit-after", type=int, default=0, help="reject comments after N posts")
+    ap.add_argument("-v", "--verbose", action="store_true")
+    args = ap.parse_args(argv)
+    srv = FixtureServer(args.host, args.port, args.groups, args.latency_ms,
+                        logged_in=not args.logged_out, verbose=args.verbose,
+                        rate_limit_after=args.rate_limit_after)
+    print(f"fixture server on {srv.base_url} ({args.groups} groups)", flush=True)
+    try:
+        srv.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.httpd.server_close()
+
+if __name__ == "__main__":
+    main()
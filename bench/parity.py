@@ -0,0 +1,57 @@
+﻿# bench/parity.py
+# -*- coding: utf-8 -*-
+"""HTTP 判定与 Chrome 判定的一致性检查：python -m bench.parity --groups 50"""
+import argparse
+import sys
+import tempfile
+from pathlib import Path
+
+from bench.fixture_server import FixtureServer
+from bench.run import Timings
+from core.page_classifier import PageClassifier
+from utils.endpoints import set_endpoints
+
+FIELDS = ("has_textarea", "self_comment", "logged_out")
+
+def run(args) -> int:
+    from core.steam_poster import SteamPoster
+
+    timings = Timings()
+    mismatches = []
+    with FixtureServer(groups=args.groups, latency_ms=args.latency_ms) as srv, \
+            tempfile.TemporaryDirectory(prefix="sep-parity-") as tmp:
+        set_endpoints(community=srv.base_url)
+        poster = SteamPoster(log_emit=lambda s: None, headless=True, lean=True,
+                             profile_dir=Path(tmp, "profile"))
+        try:
+            poster.ensure_logged()
+            classifier = PageClassifier.from_driver(poster.driver, poster.self_identity())
+            for url in srv.group_urls():
+                timings.timed("chrome_open", poster.open_page, url)
+                browser = timings.timed("chrome_probe", poster.probe_page)
+                classifier.identity = poster.identity
+                http = timings.timed("http_classify", classifier.classify, url)
+                diff = {k: (browser.get(k), http.get(k)) for k in FIELDS if bool(browser.get(k)) != bool(http.get(k))}
+                if diff:
+                    mismatches.append((url, diff))
+            classifier.close()
+        finally:
+            poster.close()
+
+    for url, diff in mismatches:
+        print(f"MISMATCH {url}: " + ", ".join(f"{k} chrome={a} http={b}" for k, a, b in
+                                             ((k, *v) for k, v in diff.items())))
+    s = timings.summary()
+    chrome_ms = s["chrome_open"]["p50_ms"] + s["chrome_probe"]["p50_ms"]
+    print(f"groups={args.groups} mismatches={len(mismatches)} "
+          f"chrome p50={chrome_ms:.1f}ms http p50={s['http_classify']['p50_ms']}ms")
+    return 1 if mismatches else 0
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.parity")
+    ap.add_argument("--groups", type=int, default=50)
+    ap.add_argument("--latency-ms", type=float, default=0)
+    return run(ap.parse_args(argv))
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,169 @@
+﻿# bench/run.py
+# -*- coding: utf-8 -*-
+"""端到端基准：python -m bench.run --groups 100 --modes full,lean --json out.json"""
+import argparse
+import json
+import tempfile
+import time
+from pathlib import Path
+
+from bench.fixture_server import FixtureServer, KIND_CLOSED
+from utils.browser import browser_rss
+from utils.endpoints import set_endpoints
+
+MODES = ("full", "lean")
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    vals = sorted(values)
+    k = (len(vals) - 1) * q
+    lo = int(k)
+    hi = min(lo + 1, len(vals) - 1)
+    return vals[lo] + (vals[hi] - vals[lo]) * (k - lo)
+
+class Timings:
+    def __init__(self):
+        self.ops: dict[str, list[float]] = {}
+
+    def add(self, op: str, sec: float):
+        self.ops.setdefault(op, []).append(sec)
+
+    def timed(self, op: str, fn, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            self.add(op, time.perf_counter() - t0)
+
+    def summary(self) -> dict:
+        return {
+            op: {
+                "n": len(v),
+                "p50_ms": round(percentile(v, 0.50) * 1000, 1),
+                "p95_ms": round(percentile(v, 0.95) * 1000, 1),
+                "total_s": round(sum(v), 3),
+            }
+            for op, v in self.ops.items()
+        }
+
+def run_mode(mode: str, args) -> dict:
+    from core.steam_poster import PostOutcome, SteamPoster
+    from core.timeouts import LIMITS, TimeoutPolicy
+
+    timings = Timings()
+    rss_samples: list[int] = []
+    with FixtureServer(groups=args.groups, latency_ms=args.latency_ms,
+                       rate_limit_after=args.rate_limit_after) as srv, \
+            tempfile.TemporaryDirectory(prefix="sep-bench-") as tmp:
+        set_endpoints(community=srv.base_url)
+        t_start = time.perf_counter()
+        poster = timings.timed("driver_start", SteamPoster, log_emit=lambda s: None, headless=True,
+                               lean=(mode == "lean"), profile_dir=Path(tmp, "profile"))
+        try:
+            d = poster.driver
+            # open_page 自己按 TimeoutPolicy 分段设置 driver 的页面超时，这里把上限固定成 --page-timeout
+            t = args.page_timeout
+            poster.timeouts = TimeoutPolicy({**LIMITS, 'page_load': (t, t, t)})
+
+            xml_links = timings.timed("fetch_groups_xml", poster.fetch_group_links_xml) or []
+            scroll_links = timings.timed("fetch_groups_scroll", poster.fetch_group_links_scroll)
+            n_fetched = len(xml_links)
+            # XML 里缺 groupURL 的群组是 /gid/ 地址，按 groupID64 比较两种来源
+            gid_of = {}
+            for g in srv.state.groups:
+                gid_of[f"{srv.base_url}/groups/{g['vanity']}".lower()] = g["gid"]
+                gid_of[f"{srv.base_url}/gid/{g['gid']}"] = g["gid"]
+            sources_match = ({gid_of.get(u.rstrip("/").lower(), u) for u in xml_links}
+                             == {gid_of.get(u.rstrip("/").lower(), u) for u in scroll_links})
+            rss_samples.append(browser_rss(d))
+            timings.timed("self_identity", poster.self_identity)
+
+            posted = 0
+            outcomes: dict[str, int] = {}
+            t_post = time.perf_counter()
+            closed_urls = srv.group_urls(KIND_CLOSED)
+            closed_set = set(closed_urls)
+            open_urls = [u for u in srv.group_urls() if u not in closed_set]
+            for url in open_urls:
+                timings.timed("navigate", poster.open_page, url)
+                probe = timings.timed("probe", poster.probe_page)
+                if probe.get("self_comment") or not probe.get("has_textarea"):
+                    continue
+                res = timings.timed("post_in_group", poster.post_in_group, url, args.message, probe=probe)
+                outcomes[res.value] = outcomes.get(res.value, 0) + 1
+                if res == PostOutcome.POSTED:
+                    posted += 1
+            post_sec = time.perf_counter() - t_post
+            rss_samples.append(browser_rss(d))
+
+            left = 0
+            t_leave = time.perf_counter()
+            if args.leave == "batch":
+                gids = [g["gid"] for g in srv.state.groups if g["kind"] == KIND_CLOSED]
+                res = timings.timed("leave_groups_batch", poster.leave_groups_batch, gids, interval=0.0, poll=0.1)
+                left = res.get("ok", 0)
+            else:
+                for url in closed_urls:
+                    timings.timed("navigate", poster.open_page, url)
+                    if timings.timed("leave_group_if_possible", poster.leave_group_if_possible):
+                        left += 1
+            leave_sec = time.perf_counter() - t_leave
+            rss_samples.append(browser_rss(d))
+        finally:
+            poster.close()
+        wall = time.perf_counter() - t_start
+        counters = dict(srv.state.counters)
+
+    return {
+        "mode": mode,
+        "groups": args.groups,
+        "fetched": n_fetched,
+        "fetch_sources_match": sources_match,
+        "posted": posted,
+        "post_outcomes": outcomes,
+        "left": left,
+        "leave_mode": args.leave,
+        "leave_s": round(leave_sec, 2),
+        "server_posts": counters.get("posts", 0),
+        "server_leaves": counters.get("leaves", 0),
+        "server_requests": counters.get("requests", 0),
+        "bytes_served": counters.get("bytes", 0),
+        "groups_per_min": round(len(open_urls) / post_sec * 60, 1) if post_sec > 0 else 0.0,
+        "rss_peak_mb": round(max(rss_samples or [0]) / 1024 / 1024, 1),
+        "wall_s": round(wall, 2),
+        "ops": timings.summary(),
+    }
+
+def print_report(results: list[dict]):
+    for r in results:
+        print(f"\n== {r['mode']} ==")
+        print(f"groups={r['groups']} fetched={r['fetched']} (xml==scroll: {r['fetch_sources_match']}) posted={r['posted']} left={r['left']} "
+              f"wall={r['wall_s']}s groups/min={r['groups_per_min']} "
+              f"rss_peak={r['rss_peak_mb']}MB served={r['bytes_served'] / 1024 / 1024:.1f}MB "
+              f"requests={r['server_requests']}")
+        print(f"{'op':<26}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'total s':>10}")
+        for op, s in r["ops"].items():
+            print(f"{op:<26}{s['n']:>6}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['total_s']:>10}")
+
+def main(argv: list[str] | None = None):
+    ap = argparse.ArgumentParser(prog="python -m bench.run")
+    ap.add_argument("--groups", type=int, default=50)
+    ap.add_argument("--modes", default=",".join(MODES), help="comma separated: full,lean")
+    ap.add_argument("--latency-ms", type=float, default=0, help="server-side delay per page")
+    ap.add_argument("--page-timeout", type=float, default=12, help="fixed page load limit for open_page (seconds)")
+    ap.add_argument("--message", default="bench message")
+    ap.add_argument("--leave", choices=["batch", "page"], default="batch",
+                    help="leave closed groups with one in-page batch or page by page")
+    ap.add_argument("--rate-limit-after", type=int, default=0,
+                    help="fixture answers with Steam's rate-limit error after N posts")
+    ap.add_argument("--json", type=Path, help="write results as JSON")
+    args = ap.parse_args(argv)
+
+    results = [run_mode(m.strip(), args) for m in args.modes.split(",") if m.strip()]
+    print_report(results)
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+﻿# bench/startup.py
+# -*- coding: utf-8 -*-
+"""启动耗时基准：python -m bench.startup --repeat 3 --json out.json
+
+- imports：每个模块单独起一个解释器跑 -X importtime，按顶层包汇总自身耗时，并检查是否拖进了 selenium
+- gui：从起进程到窗口显示（time-to-window），以及窗口显示 --click-after 秒后提交第一个任务、
+  到任务拿到可用浏览器（time-to-first-job）；cold 不预启动，prewarm 为窗口显示后后台预启动
+界面部分需要 PyQt6 和 Chrome；--check 时导入检查不通过则退出码为 1"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench.run import percentile
+
+ROOT = Path(__file__).resolve().parent.parent
+# 这些模块不应该在导入时加载 selenium
+IMPORT_TARGETS = ("core.engine", "core.steam_poster", "ui.main_window")
+GUI_MODES = ("cold", "prewarm")
+CHILD_TIMEOUT = 180
+
+def import_profile(module: str) -> dict:
+    """-X importtime 的输出：每行 self(us) | cumulative(us) | 缩进的模块名"""
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - t0
+    by_root: dict[str, int] = {}
+    cumulative = 0
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+            self_us, cum_us = int(self_us), int(cum_us)
+        except ValueError:
+            continue
+        name = name.strip()
+        modules.append(name)
+        root = name.split(".")[0]
+        by_root[root] = by_root.get(root, 0) + self_us
+        if name == module:
+            cumulative = cum_us
+    err = None
+    if proc.returncode != 0:
+        err = (proc.stderr.strip().splitlines() or ["?"])[-1]
+    return {
+        "module": module, "ok": proc.returncode == 0, "error": err,
+        "wall_ms": round(wall * 1000, 1), "cumulative_ms": round(cumulative / 1000, 1),
+        "modules": len(modules), "selenium_loaded": any(m.split(".")[0] == "selenium" for m in modules),
+        "by_package_ms": {k: round(v / 1000, 1) for k, v in sorted(by_root.items(), key=lambda kv: -kv[1])},
+    }
+
+def child(args) -> int:
+    """子进程：按 app.py 的顺序建窗口，结果作为一行 JSON 打到 stdout"""
+    t0 = float(os.environ["SEP_BENCH_T0"])
+    tmp = Path(args.child_dir)
+    from PyQt6 import QtCore, QtWidgets
+    # 设置写到临时目录，不动用户自己的 QSettings
+    QtCore.QSettings.setDefaultFormat(QtCore.QSettings.Format.IniFormat)
+    QtCore.QSettings.setPath(QtCore.QSettings.Format.IniFormat, QtCore.QSettings.Scope.UserScope, str(tmp))
+    s = QtCore.QSettings("SEP", "SteamEchoPost")
+    s.setValue("prewarm_browser", 1 if args.child == "prewarm" else 0)
+    s.sync()
+    from ui.main_window import MainWindow
+
+    app = QtWidgets.QApplication(sys.argv[:1])
+    app.setStyle("Fusion")
+    w = MainWindow()
+    w.engine.profile_dir = tmp / "profile"
+    w.engine.journal = None
+    w.show()
+    app.processEvents()
+    to_window = time.time() - t0
+
+    end = time.perf_counter() + args.click_after
+    while time.perf_counter() < end:
+        app.processEvents(QtCore.QEventLoop.ProcessEventsFlag.AllEvents, 20)
+        time.sleep(0.01)
+    t_click = time.perf_counter()
+    job = w.run_job("first", w.engine.ensure_poster)
+    while not job.wait(0.01):
+        app.processEvents()
+    to_first_job = time.perf_counter() - t_click
+    w.close()
+    print(json.dumps({"mode": args.child, "to_window_s": round(to_window, 3),
+                      "to_first_job_s": round(to_first_job, 3), "status": job.status,
+                      "error": repr(job.error) if job.error else None}), flush=True)
+    return 0
+
+def run_gui(mode: str, args) -> dict:
+    with tempfile.TemporaryDirectory(prefix="sep-startup-") as tmp:
+        env = dict(os.environ)
+        if not args.show:
+            env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        env["SEP_BENCH_T0"] = repr(time.time())
+        proc = subprocess.run([sys.executable, "-m", "bench.startup", "--child", mode, "--child-dir", tmp,
+                               "--click-after", str(args.click_after)],
+                              cwd=ROOT, env=env, capture_output=True, text=True, timeout=CHILD_TIMEOUT)
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    return {"mode": mode, "error": (proc.stderr.strip().splitlines() or [f"exit {proc.returncode}"])[-1]}
+
+def print_report(imports: list[dict], gui: dict[str, list[dict]], top: int):
+    print(f"{'module':<22}{'cum ms':>9}{'wall ms':>9}{'mods':>6}  selenium  top packages (self ms)")
+    for r in imports:
+        if not r["ok"]:
+            print(f"{r['module']:<22}  import failed: {r['error']}")
+            continue
+        pk = ", ".join(f"{k} {v}" for k, v in list(r["by_package_ms"].items())[:top])
+        print(f"{r['module']:<22}{r['cumulative_ms']:>9}{r['wall_ms']:>9}{r['modules']:>6}  "
+              f"{'YES' if r['selenium_loaded'] else 'no':<8}  {pk}")
+    if not gui:
+        return
+    print(f"\n{'gui':<10}{'runs':>5}{'window p50 s':>14}{'first job p50 s':>17}{'first job max s':>17}")
+    for mode, runs in gui.items():
+        good = [r for r in runs if not r.get("error")]
+        if not good:
+            print(f"{mode:<10}{len(runs):>5}  failed: {runs[0].get('error')}")
+            continue
+        win = [r["to_window_s"] for r in good]
+        first = [r["to_first_job_s"] for r in good]
+        print(f"{mode:<10}{len(good):>5}{percentile(win, 0.5):>14.3f}{percentile(first, 0.5):>17.3f}"
+              f"{max(first):>17.3f}")
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(prog="python -m bench.startup")
+    ap.add_argument("--modules", default=",".join(IMPORT_TARGETS), help="comma separated modules to profile")
+    ap.add_argument("--gui", default=",".join(GUI_MODES), help="comma separated: cold,prewarm; empty to skip")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--click-after", type=float, default=2.0,
+                    help="seconds between window shown and submitting the first job")
+    ap.add_argument("--top", type=int, default=5, help="packages listed per module")
+    ap.add_argument("--show", action="store_true", help="use the real display instead of offscreen")
+    ap.add_argument("--check", action="store_true", help="exit 1 if a target module imports selenium")
+    ap.add_argument("--json", type=Path, help="write results as JSON")
+    ap.add_argument("--child", choices=GUI_MODES, help=argparse.SUPPRESS)
+    ap.add_argument("--child-dir", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+    if args.child:
+        return child(args)
+
+    modules = [m.strip() for m in args.modules.split(",") if m.strip()]
+    imports = [import_profile(m) for m in modules]
+    gui = {mode: [run_gui(mode, args) for _ in range(max(1, args.repeat))]
+           for mode in (s.strip() for s in args.gui.split(",") if s.strip())}
+    print_report(imports, gui, args.top)
+    if args.json:
+        args.json.write_text(json.dumps({"imports": imports, "gui": gui}, indent=2, ensure_ascii=False),
+                             encoding="utf-8")
+    if args.check and any(r["selenium_loaded"] for r in imports if r["module"] in IMPORT_TARGETS):
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
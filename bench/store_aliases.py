@@ -0,0 +1,73 @@
+﻿# bench/store_aliases.py
+# -*- coding: utf-8 -*-
+"""GroupStore 别名一致性检查：python -m bench.store_aliases
+同一个群按一种写法记录、按另一种写法（/groups/<vanity>、/gid/<id>、大小写不同）查询，应当查到同一行；
+不一致则退出码为 1。不需要浏览器"""
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from utils.group_store import GroupStore, OUT_KEPT, OUT_NO_BOX, OUT_POSTED
+from utils.whitelist import normalize_url
+
+BASE = "https://steamcommunity.com"
+
+def group(n: int) -> tuple[str, str, str]:
+    gid = str(103582791400000000 + n)
+    return gid, f"{BASE}/groups/Bench{n}/", f"{BASE}/gid/{gid}"
+
+def run(tmp: Path) -> list[str]:
+    fails = []
+
+    def check(name: str, ok: bool):
+        print(f"{'ok  ' if ok else 'FAIL'} {name}")
+        if not ok:
+            fails.append(name)
+
+    store = GroupStore(tmp / "state.db")
+    # gid 已知：按 vanity 记录，按 /gid/ 查
+    gid, vanity, by_gid = group(1)
+    store.link_gid(gid, vanity)
+    store.record(vanity, OUT_NO_BOX, has_comment_box=False)
+    row = store.get(by_gid)
+    check("record via vanity, get via /gid/", bool(row) and row["last_outcome"] == OUT_NO_BOX)
+    check("known_no_comment_box via /gid/", store.known_no_comment_box(by_gid))
+    check("visited_keys uses canonical keys", store.canonical_key(by_gid) in store.visited_keys())
+
+    # gid 后学到：两种写法各记过一次，登记 gid 后合并成一行，结果取最近一次访问
+    gid, vanity, by_gid = group(2)
+    store.record(vanity, OUT_POSTED, has_comment_box=True)
+    store.record(by_gid, OUT_KEPT)
+    store.link_gid(gid, vanity)
+    row = store.get(vanity.lower())
+    check("alias rows merged after link_gid",
+          bool(row) and row["last_outcome"] == OUT_KEPT and row["last_post"] is not None
+          and row["has_comment_box"] == 1)
+    with store._lock:
+        n = store._db.execute("SELECT COUNT(*) FROM groups WHERE key = ? OR key = ?",
+                              (normalize_url(vanity), normalize_url(by_gid))).fetchone()[0]
+    check("no leftover alias rows", n == 0)
+    store.close()
+
+    # 旧库：groups 行按 normalize_url 记键，重新打开时并到 gid 键
+    gid, vanity, by_gid = group(3)
+    db = sqlite3.connect(str(tmp / "state.db"))
+    with db:
+        db.execute("INSERT INTO group_ids(alias, gid) VALUES (?, ?)", (normalize_url(vanity), gid))
+        db.execute("INSERT INTO groups(key, url, last_visit, has_comment_box, last_outcome) "
+                   "VALUES (?, ?, 1, 0, ?)", (normalize_url(vanity), vanity, OUT_NO_BOX))
+    db.close()
+    store = GroupStore(tmp / "state.db")
+    row = store.get(by_gid)
+    check("old url-keyed row migrated on open", bool(row) and row["last_outcome"] == OUT_NO_BOX)
+    store.close()
+    return fails
+
+def main() -> int:
+    with tempfile.TemporaryDirectory(prefix="sep-store-") as tmp:
+        fails = run(Path(tmp))
+    return 1 if fails else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
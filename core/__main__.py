@@ -0,0 +1,135 @@
+﻿# core/__main__.py
+# -*- coding: utf-8 -*-
+"""无界面命令行入口：python -m core <fetch|post|leave|leave-low|join|report> [选项]"""
+import argparse
+import json
+import signal
+import sys
+import time
+from pathlib import Path
+
+from utils.endpoints import ENV_COMMUNITY, ENV_STORE, set_endpoints
+from utils.i18n import Lang
+from utils.journal import JournalReport, format_report
+from utils.paths import (
+    GROUPS_FILE, LOW_FILE, POST_WL_FILE, DEL_WL_FILE, STATE_DB, METRICS_DIR, JOURNAL_FILE
+)
+
+def _log(s: str):
+    print(f"{time.strftime('%H:%M:%S')} {s}", flush=True)
+
+def build_parser() -> argparse.ArgumentParser:
+    ap = argparse.ArgumentParser(prog="python -m core", description="SteamEchoPost headless runner")
+    ap.add_argument("--lang", choices=[l.value for l in Lang], default=Lang.EN.value)
+    ap.add_argument("--groups", type=Path, default=GROUPS_FILE, help="groups.txt path")
+    ap.add_argument("--low-file", type=Path, default=LOW_FILE, help="low.txt path")
+    ap.add_argument("--post-whitelist", type=Path, default=POST_WL_FILE)
+    ap.add_argument("--delete-whitelist", type=Path, default=DEL_WL_FILE)
+    ap.add_argument("--state-db", type=Path, default=STATE_DB)
+    ap.add_argument("--no-headless", action="store_true", help="show the browser window")
+    ap.add_argument("--no-lean", action="store_true", help="load images/media/fonts")
+    ap.add_argument("--no-http-probe", action="store_true",
+                    help="classify group pages in Chrome instead of plain HTTP requests")
+    ap.add_argument("--metrics-dir", type=Path, default=METRICS_DIR,
+                    help="per-job timing summaries (JSON + CSV)")
+    ap.add_argument("--prom-textfile", type=Path,
+                    help="also write timing metrics here in Prometheus textfile format")
+    ap.add_argument("--journal", type=Path, default=JOURNAL_FILE,
+                    help="per-group outcome journal (JSONL) to append to")
+    ap.add_argument("--community-url", help=f"override {ENV_COMMUNITY}, e.g. a local mirror")
+    ap.add_argument("--store-url", help=f"override {ENV_STORE}")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    p = sub.add_parser("fetch", help="fetch joined groups into groups.txt")
+    p.add_argument("--source", choices=["xml", "scroll"], default="xml",
+                   help="profile XML (one request) or the scrolling groups page")
+
+    p = sub.add_parser("post", help="post a message to every group in groups.txt")
+    msg = p.add_mutually_exclusive_group(required=True)
+    msg.add_argument("-m", "--message")
+    msg.add_argument("--message-file", type=Path)
+    p.add_argument("--delay", type=float, default=0.0, help="seconds between groups")
+    p.add_argument("--smart", action="store_true", help="skip groups with an existing own comment")
+    p.add_argument("--low-activity", action="store_true", help="record such groups into low.txt")
+    p.add_argument("--resume", action="store_true", help="resume the last unfinished run")
+    p.add_argument("--new-first", action="store_true", help="visit never-visited groups first")
+
+    for name, help_ in (("leave", "leave groups without a comment box"),
+                        ("leave-low", "leave groups listed in low.txt")):
+        p = sub.add_parser(name, help=help_)
+        p.add_argument("--interval", type=float, default=0.3, help="seconds between leave requests")
+        p.add_argument("--no-batch", action="store_true", help="open and leave each group page one by one")
+
+    p = sub.add_parser("join", help="join all groups of a profile")
+    p.add_argument("profile_url")
+    p.add_argument("--delay", type=float, default=0.3)
+
+    p = sub.add_parser("report", help="summarize one or more outcome journals")
+    p.add_argument("journals", nargs="*", type=Path, help="journal files (default: --journal)")
+    p.add_argument("--top", type=int, default=10, help="how many slowest / most failing groups to list")
+    p.add_argument("--json", action="store_true", help="print the summary as JSON")
+    return ap
+
+def report(args) -> int:
+    paths = args.journals or [args.journal]
+    missing = [p for p in paths if not p.exists()]
+    if missing:
+        print(f"journal not found: {', '.join(map(str, missing))}", file=sys.stderr)
+        return 1
+    rep = JournalReport(top=args.top).read(paths)
+    print(json.dumps(rep.as_dict(), ensure_ascii=False, indent=2) if args.json else format_report(rep))
+    return 0
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.cmd == "report":
+        return report(args)
+
+    # report 只读文件，不需要 selenium；其余命令才加载引擎
+    from core.engine import Engine, JobConfig
+    set_endpoints(community=args.community_url, store=args.store_url)
+    lang = Lang(args.lang)
+    cfg = JobConfig(
+        groups_path=args.groups,
+        post_wl_path=args.post_whitelist,
+        del_wl_path=args.delete_whitelist,
+        low_path=args.low_file,
+        lang=lang,
+    )
+    engine = Engine(log_emit=_log, headless=not args.no_headless, lean=not args.no_lean,
+                    lang=lang, state_db=args.state_db, http_probe=not args.no_http_probe,
+                    metrics_dir=args.metrics_dir, prom_textfile=args.prom_textfile, journal_path=args.journal)
+    signal.signal(signal.SIGINT, lambda *_: engine.stop())
+
+    try:
+        if args.cmd == "fetch":
+            return 0 if engine.run("fetch", engine.fetch, cfg, source=args.source) else 1
+        if args.cmd == "post":
+            cfg.message = args.message if args.message is not None else \
+                args.message_file.read_text(encoding="utf-8")
+            cfg.delay = args.delay
+            cfg.smart_mode = args.smart
+            cfg.low_activity = args.low_activity
+            cfg.resume = args.resume
+            cfg.new_first = args.new_first
+            res = engine.run("post", engine.post, cfg) or {}
+            return 0 if res.get("run_id") else 1
+        if args.cmd in ("leave", "leave-low"):
+            cfg.batch_leave = not args.no_batch
+            cfg.leave_interval = args.interval
+        if args.cmd == "leave":
+            engine.run("leave_scan", engine.leave_no_comment, cfg)
+            return 0
+        if args.cmd == "leave-low":
+            engine.run("leave_low", engine.leave_low_activity, cfg)
+            return 0
+        if args.cmd == "join":
+            res = engine.run("join", engine.join_from_profile, cfg, args.profile_url,
+                             per_join_delay=args.delay) or {}
+            return 1 if res.get("error") else 0
+    finally:
+        engine.close()
+    return 2
+
+if __name__ == "__main__":
+    sys.exit(main())
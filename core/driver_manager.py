@@ -0,0 +1,106 @@
+﻿# core/driver_manager.py
+# -*- coding: utf-8 -*-
+"""浏览器生命周期：任务前健康检查、崩溃后在同一用户目录下重启、按打开页数/内存回收。"""
+import threading
+import time
+
+from utils.browser import DEFAULT_TIMEOUTS, apply_timeouts, browser_rss, driver_alive
+
+# 打开这么多页后换一个新浏览器（0 表示不限）
+MAX_PAGES = 400
+# Chrome 进程树常驻内存超过这个值就回收（MB，0 表示不限）
+MAX_RSS_MB = 1500
+# 内存检查要遍历进程树，每隔这么多页查一次
+RSS_CHECK_EVERY = 25
+
+class DriverManager:
+    """持有唯一的 SteamPoster；factory() 每次创建新实例，读取调用方当时的设置"""
+
+    def __init__(self, factory, log_emit=None, max_pages: int = MAX_PAGES, max_rss_mb: int = MAX_RSS_MB):
+        self._factory = factory
+        self._emit = log_emit
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.poster = None
+        self.timeouts: dict | None = None
+        self.restarts = 0
+        self._next_rss_check = RSS_CHECK_EVERY
+        self._lease = threading.RLock()
+
+    def lease(self):
+        """独占浏览器：任务执行期间持有，其他线程的 lease() 会一直等到任务结束"""
+        return self._lease
+
+    def log(self, s: str):
+        if self._emit is not None:
+            self._emit(s)
+
+    def _start(self):
+        self.poster = self._factory()
+        self._next_rss_check = RSS_CHECK_EVERY
+        if self.timeouts:
+            apply_timeouts(self.poster.driver, **self.timeouts)
+        return self.poster
+
+    def restart(self, reason: str):
+        self.log(f"[i] 重启浏览器（{reason}）…")
+        self.close()
+        self.restarts += 1
+        t0 = time.perf_counter()
+        poster = self._start()
+        self.log(f"[i] 浏览器已重启，用时 {time.perf_counter() - t0:.1f}s")
+        return poster
+
+    def acquire(self):
+        """任务开始前调用：没有就启动，会话已失效就重启"""
+        if self.poster is None:
+            return self._start()
+        if not driver_alive(self.poster.driver):
+            return self.restart("会话无响应")
+        return self.poster
+
+    def set_timeouts(self, **timeouts):
+        """记住本任务的超时，重启后的新会话同样生效"""
+        self.timeouts = timeouts
+        if self.poster is not None:
+            apply_timeouts(self.poster.driver, **timeouts)
+
+    def recycle_reason(self) -> str | None:
+        p = self.poster
+        if p is None:
+            return None
+        if self.max_pages and p.pages_loaded >= self.max_pages:
+            return f"已打开 {p.pages_loaded} 页"
+        if self.max_rss_mb and p.pages_loaded >= self._next_rss_check:
+            self._next_rss_check = p.pages_loaded + RSS_CHECK_EVERY
+            mb = browser_rss(p.driver) / 1024 / 1024
+            if mb >= self.max_rss_mb:
+                return f"内存 {mb:.0f}MB"
+        return None
+
+    def between_items(self, failed: bool = False):
+        """每处理完一个群调用：失败后检查会话是否还活着，并按阈值回收；返回当前可用的 poster"""
+        if self.poster is None:
+            return self._start()
+        if failed and not driver_alive(self.poster.driver):
+            return self.restart("会话无响应")
+        reason = self.recycle_reason()
+        if reason:
+            return self.restart(reason)
+        return self.poster
+
+    def release(self):
+        """任务结束：回到 about:blank 释放页面内存，超时恢复默认"""
+        self.timeouts = None
+        if self.poster is None:
+            return
+        try:
+            self.poster.driver.get("about:blank")
+            apply_timeouts(self.poster.driver, **DEFAULT_TIMEOUTS)
+        except Exception:
+            pass
+
+    def close(self):
+        if self.poster is not None:
+            self.poster.close()
+            self.poster = None
@@ -0,0 +1,779 @@
+﻿# core/engine.py
+# -*- coding: utf-8 -*-
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from utils.i18n import Lang, tr
+from utils.paths import (
+    GROUPS_FILE, LOW_FILE, POST_WL_FILE, DEL_WL_FILE, STATE_DB, METRICS_DIR, JOURNAL_FILE
+)
+from utils.browser import fmt_duration, POST_TIMEOUTS
+from core.driver_manager import DriverManager
+from core.instrument import Metrics, instrument_driver
+from core.jobs import Cancelled, CancelToken, Job, JobQueue
+from core.page_classifier import PageClassifier
+from core.steam_poster import PostOutcome
+from core.timeouts import TimeoutPolicy
+from utils.whitelist import WhitelistIndex, normalize_url
+from utils.groups_file import iter_group_entries
+from utils.journal import Journal
+from utils.group_store import (
+    GroupStore, OUT_POSTED, OUT_FAILED, OUT_ERROR, OUT_SELF_COMMENT, OUT_NO_BOX, OUT_LEFT, OUT_KEPT,
+    OUT_WHITELIST, OUT_LOGGED_OUT, OUT_REJECTED, OUT_RATE_LIMITED, OUT_TIMEOUT, RUN_DONE, RUN_STOPPED
+)
+
+RUN_KIND_POST = "post"
+
+# 发送结果 -> 状态库里的 outcome
+POST_OUTCOMES = {
+    PostOutcome.POSTED: OUT_POSTED,
+    PostOutcome.REJECTED: OUT_REJECTED,
+    PostOutcome.RATE_LIMITED: OUT_RATE_LIMITED,
+    PostOutcome.TIMEOUT: OUT_TIMEOUT,
+    PostOutcome.FAILED: OUT_FAILED,
+}
+# 仅用于预估总耗时：一次发送从点击到确认的典型时长
+EST_SEND_SEC = 1.0
+
+# 事件名：on_event(name, data)
+EV_JOB_STARTED = "job_started"
+EV_PROGRESS = "progress"
+EV_JOB_FINISHED = "job_finished"
+# 预启动浏览器的任务名；界面据此不把它当成用户任务
+PREWARM_JOB = "prewarm"
+
+@dataclass
+class JobConfig:
+    message: str = ""
+    groups_path: Path = GROUPS_FILE
+    post_wl_path: Path = POST_WL_FILE
+    del_wl_path: Path = DEL_WL_FILE
+    low_path: Path = LOW_FILE
+    delay: float = 0.0
+    smart_mode: bool = False
+    low_activity: bool = False
+    resume: bool = False
+    new_first: bool = False
+    batch_leave: bool = True
+    leave_interval: float = 0.3
+    lang: Lang = Lang.EN
+    extra: dict = field(default_factory=dict)
+
+# 无效行最多逐条打印这么多，其余只报总数
+MAX_BAD_LINES_LOGGED = 20
+
+class Engine:
+    """发帖/退群/抓取任务的无界面执行器，GUI 与命令行共用"""
+
+    def __init__(self, log_emit, on_event=None, headless: bool = True, lean: bool = True,
+                 lang: Lang = Lang.EN, state_db: str | Path = STATE_DB, http_probe: bool = True,
+                 metrics_dir: str | Path | None = METRICS_DIR, prom_textfile: str | Path | None = None,
+                 journal_path: str | Path | None = JOURNAL_FILE, profile_dir: str | Path | None = None):
+        self._emit = log_emit
+        self._on_event = on_event
+        self.headless = headless
+        self.lean = lean
+        self.profile_dir = profile_dir
+        self.lang = lang
+        self.state_db = state_db
+        self.http_probe = http_probe
+        self.metrics_dir = metrics_dir
+        self.prom_textfile = prom_textfile
+        self.metrics = Metrics()
+        self.timeouts = TimeoutPolicy()
+        self.journal = Journal(journal_path) if journal_path else None
+        self._visit: dict | None = None
+        self.drivers = DriverManager(self._new_poster, log_emit=self.log)
+        self.store: GroupStore | None = None
+        self.classifier: PageClassifier | None = None
+        self._whitelists: dict[Path, WhitelistIndex] = {}
+        self.jobs = JobQueue(on_event=lambda name, data: self.emit(name, **data),
+                             lease=self.drivers.lease)
+        self._token = CancelToken()
+
+    # ---------- helpers ----------
+    def log(self, s: str):
+        self._emit(s)
+
+    def emit(self, name: str, **data):
+        if self._on_event is not None:
+            try:
+                self._on_event(name, data)
+            except Exception:
+                pass
+
+    def stop(self):
+        """取消正在执行和排队中的全部任务"""
+        self.jobs.cancel_all()
+        self._token.cancel()
+
+    @property
+    def stopped(self) -> bool:
+        return self._token.cancelled
+
+    def submit(self, name: str, fn, *args, **kwargs) -> Job:
+        """把 fn(*args, **kwargs) 排进任务队列；同一时刻只有一个任务在用浏览器"""
+        def run(token: CancelToken):
+            self._token = token
+            return fn(*args, **kwargs)
+        return self.jobs.submit(name, run)
+
+    def run(self, name: str, fn, *args, **kwargs):
+        """排队并等待完成（命令行用）；任务抛出的异常原样抛出，中途取消的任务可能返回 None"""
+        job = self.submit(name, fn, *args, **kwargs)
+        job.wait()
+        if job.error is not None:
+            raise job.error
+        return job.result
+
+    def _new_poster(self):
+        from core.steam_poster import SteamPoster
+        poster = SteamPoster(log_emit=self.log, headless=self.headless, lang=self.lang, lean=self.lean,
+                             profile_dir=self.profile_dir)
+        poster.metrics = self.metrics
+        poster.timeouts = self.timeouts
+        instrument_driver(poster.driver, self.metrics)
+        return poster
+
+    @property
+    def poster(self):
+        return self.drivers.poster
+
+    def ensure_poster(self):
+        poster = self.drivers.acquire()
+        poster.lang = self.lang
+        poster.token = self._token
+        return poster
+
+    def prewarm(self) -> Job:
+        """排一个只启动浏览器的任务：冷启动 Chrome 的几秒花在用户点按钮之前；之后的任务排在它后面"""
+        return self.submit(PREWARM_JOB, self._prewarm)
+
+    def _prewarm(self):
+        if self.stopped:
+            return
+        t0 = time.perf_counter()
+        try:
+            self.ensure_poster()
+        except Exception as e:
+            self.log(tr(self.lang, "prewarm_failed", err=repr(e)))
+            return
+        self.log(tr(self.lang, "prewarm_done", sec=time.perf_counter() - t0))
+
+    def next_poster(self, failed: bool = False):
+        """每个群处理完后调用；浏览器重启过则返回新的 poster"""
+        poster = self.drivers.between_items(failed=failed)
+        poster.lang = self.lang
+        poster.token = self._token
+        return poster
+
+    def ensure_store(self) -> GroupStore:
+        if self.store is None:
+            self.store = GroupStore(self.state_db)
+        return self.store
+
+    def ensure_classifier(self, poster) -> PageClassifier | None:
+        """登录确认后取一次 cookie 快照；http_probe 关闭时返回 None"""
+        if not self.http_probe:
+            return None
+        if self.classifier is None:
+            self.classifier = PageClassifier.from_driver(poster.driver, poster.self_identity())
+        return self.classifier
+
+    def probe_http(self, url: str) -> dict | None:
+        """不经浏览器判断群组页；失败或看起来未登录（cookie 失效）时返回 None，由 Chrome 兜底"""
+        if self.classifier is None:
+            return None
+        if self.poster is not None and self.poster.identity:
+            self.classifier.identity = self.poster.identity
+        try:
+            with self.metrics.span("probe_http"):
+                res = self.classifier.classify(url)
+        except Exception:
+            return None
+        if res.get('logged_out'):
+            # cookie 快照过期：下次登录检查时重新取
+            self.classifier.close()
+            self.classifier = None
+            return None
+        return res
+
+    def whitelist(self, path: str | Path) -> WhitelistIndex:
+        """按路径缓存；文件改动后下次查询自动重新加载"""
+        p = Path(path)
+        wl = self._whitelists.get(p)
+        if wl is None:
+            wl = self._whitelists[p] = WhitelistIndex(p, resolve_gid=self.ensure_store().gid_for)
+        elif not wl.reload_if_changed():
+            # 文件没变不重新解析；URL 条目的 groupID64 可能是上个任务才学到的，重新查一遍
+            wl.resolve_gids()
+        return wl
+
+    def protected(self, wl: WhitelistIndex, store: GroupStore, url: str) -> bool:
+        key = normalize_url(url)
+        return wl.match(key=key, gid=store.gid_for(url, key))
+
+    def learn_gid(self, store: GroupStore, url: str, probe: dict | None):
+        """页面上带出的 groupID64 记进身份索引，连同重定向后的最终地址"""
+        gid = probe.get('gid') if probe else None
+        if not gid:
+            return
+        try:
+            store.link_gid(gid, url, probe.get('url') or probe.get('page_url'))
+        except Exception:
+            pass
+
+    def load_links(self, store: GroupStore, path: str | Path) -> list[str]:
+        """校验并按 groupID64 去重读取群组列表；无效行带行号写进日志"""
+        name = Path(path).name
+        bad, dups = [0], [0]
+
+        def on_error(line: int, text: str, reason: str):
+            bad[0] += 1
+            if bad[0] <= MAX_BAD_LINES_LOGGED:
+                self.log(f"[!] {tr(self.lang, 'groups_bad_line', file=name, line=line, text=text, reason=reason)}")
+
+        def on_duplicate(line: int, text: str):
+            dups[0] += 1
+
+        links = [e.url for e in iter_group_entries(path, key=store.canonical_key,
+                                                   on_error=on_error, on_duplicate=on_duplicate)]
+        if bad[0] > MAX_BAD_LINES_LOGGED:
+            self.log(f"[!] {tr(self.lang, 'groups_bad_more', file=name, n=bad[0] - MAX_BAD_LINES_LOGGED)}")
+        if dups[0]:
+            self.log(f"[i] {tr(self.lang, 'dedup_dropped', n=dups[0])}")
+        return links
+
+    @contextmanager
+    def visit(self, store: GroupStore, job: str, action: str, url: str):
+        """一次群访问：单独累计各阶段耗时，结束时往 journal 追加一行。
+        调用方填 v['outcome']（可改 v['action']）；outcome 为 None 的访问不记录"""
+        v = {"action": action, "outcome": None, "error": None}
+        self.metrics.begin_item()
+        self._visit = v
+        t0 = time.perf_counter()
+        try:
+            yield v
+        except Cancelled:
+            # 中途取消：这次访问没有结果，不写 journal
+            v["outcome"] = None
+            raise
+        except BaseException as e:
+            v["error"] = v["error"] or type(e).__name__
+            v["outcome"] = v["outcome"] or OUT_ERROR
+            raise
+        finally:
+            self._visit = None
+            ms = (time.perf_counter() - t0) * 1000
+            phases = self.metrics.end_item()
+            self.journal_write(store, job, v["action"], url, v["outcome"], ms, phases, v["error"])
+
+    def note_error(self, e: BaseException):
+        """被吞掉的异常也记进当前访问的 journal 行"""
+        if self._visit is not None and not self._visit["error"]:
+            self._visit["error"] = type(e).__name__
+
+    def journal_write(self, store: GroupStore, job: str, action: str, url: str, outcome: str | None,
+                      ms: float | None = None, phases: dict | None = None, error: str | None = None):
+        if self.journal is None or outcome is None:
+            return
+        try:
+            self.journal.write({
+                "job": job, "action": action, "url": url,
+                "key": store.canonical_key(url), "gid": store.gid_for(url),
+                "outcome": outcome, "ms": round(ms, 1) if ms is not None else None,
+                "phases": phases or {}, "error": error,
+            })
+        except OSError:
+            pass
+
+    def leave_batch(self, poster, store: GroupStore, job: str, pending: list[tuple[int, str, str]],
+                    total: int, interval: float) -> dict:
+        """pending 为 (序号, url, groupID64)；一次页内脚本退出全部，逐条回报进度"""
+        if not pending:
+            return {"ok": 0, "fail": 0}
+        by_gid = {gid: (i, url) for i, url, gid in pending}
+        self.log(f"[*] {tr(self.lang, 'batch_leave_start', n=len(pending), interval=interval)}")
+
+        def on_progress(r: dict):
+            i, url = by_gid.get(r.get('gid'), (0, ''))
+            ok = bool(r.get('ok'))
+            self.journal_write(store, job, "leave_batch", url, OUT_LEFT if ok else OUT_FAILED)
+            if ok:
+                store.record(url, OUT_LEFT)
+                self.log(tr(self.lang, "batch_left", i=i, total=total, url=url))
+            else:
+                self.log(tr(self.lang, "batch_leave_failed", i=i, total=total, url=url, status=r.get('status')))
+            self.emit(EV_PROGRESS, job=job, i=i, total=total, url=url, outcome=OUT_LEFT if ok else OUT_FAILED)
+
+        res = poster.leave_groups_batch([gid for _, _, gid in pending], interval=interval,
+                                        on_progress=on_progress, should_stop=lambda: self.stopped)
+        if res.get('error'):
+            self.log(f"[!] {tr(self.lang, 'batch_leave_error', err=res['error'])}")
+        return res
+
+    def close(self):
+        self.jobs.shutdown(timeout=10)
+        if self.classifier is not None:
+            self.classifier.close()
+            self.classifier = None
+        self.drivers.close()
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+        self._whitelists.clear()
+        if self.journal is not None:
+            self.journal.close()
+
+    def _begin(self, name: str, cfg: JobConfig):
+        self.lang = cfg.lang
+        self.metrics.reset(name)
+        if self.jobs.current is None:
+            # 不经队列直接调用：每次换一个新令牌，之前的 stop() 不影响本次
+            self._token = CancelToken()
+        self.emit(EV_JOB_STARTED, job=name)
+
+    def _end(self, name: str, **data):
+        """每个任务的 finally：释放浏览器、写出耗时统计、通知任务结束"""
+        self.drivers.release()
+        for op, t in self.timeouts.snapshot().items():
+            self.metrics.set_gauge(f"timeout.{op}", t["timeout"])
+            if t["p95"] is not None:
+                self.metrics.set_gauge(f"p95.{op}", t["p95"])
+        self.report_metrics()
+        self.emit(EV_JOB_FINISHED, job=name, **data)
+
+    def report_metrics(self):
+        m = self.metrics
+        if not (m.spans or m.commands):
+            return
+        path = None
+        try:
+            if self.metrics_dir:
+                stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(m.started))
+                path = Path(self.metrics_dir) / f"{m.job}-{stamp}.json"
+                m.write_json(path)
+                m.write_csv(path.with_suffix('.csv'))
+            if self.prom_textfile:
+                m.write_prom(self.prom_textfile)
+        except OSError as e:
+            self.log(tr(self.lang, "metrics_error", err=e))
+            return
+        top = ", ".join(f"{k} {v:.1f}s" for k, v in m.top_spans())
+        if top:
+            self.log(tr(self.lang, "metrics_saved", top=top, path=path or self.prom_textfile))
+
+    def _logged_in(self, poster) -> bool:
+        if not poster.ensure_logged():
+            self.log(f"[!] {tr(self.lang, 'need_login')}")
+            return False
+        try:
+            self.ensure_classifier(poster)
+        except Exception:
+            pass
+        return True
+
+    # ---------- jobs ----------
+    def fetch(self, cfg: JobConfig, source: str = "xml") -> int:
+        self._begin("fetch", cfg)
+        n = 0
+        diff = {}
+        try:
+            self.log(tr(self.lang, "fetch_start"))
+            poster = self.ensure_poster()
+            if not self._logged_in(poster):
+                return 0
+            out = Path(cfg.groups_path)
+            out.parent.mkdir(parents=True, exist_ok=True)
+            store = self.ensure_store()
+            n = poster.fetch_groups(out, source=source, key=store.canonical_key,
+                                    before_sync=lambda: store.link_gids(poster.last_group_ids.items()))
+            if n:
+                store.import_file(out)
+                s = poster.last_sync
+                diff = {"added": s.added, "removed": s.removed} if s else {}
+            return n
+        except Exception as e:
+            self.log(tr(self.lang, "fetch_error", err=e))
+            return n
+        finally:
+            self._end("fetch", n=n, **diff)
+
+    def post(self, cfg: JobConfig) -> dict:
+        """留言任务；cfg.resume 为 True 时继续最近一次未完成的任务"""
+        summary = {"sent": 0, "total": 0, "run_id": None, "status": RUN_STOPPED}
+        self._begin("post", cfg)
+        t0 = time.time()
+        store = self.ensure_store()
+        run_id = None
+        try:
+            message = cfg.message.strip()
+            if not message:
+                self.log(f"[!] {tr(self.lang, 'send_empty')}")
+                return summary
+
+            if cfg.resume:
+                last = store.resumable_run(RUN_KIND_POST)
+                if not last:
+                    self.log(f"[!] {tr(self.lang, 'resume_none')}")
+                    return summary
+                run_id = last['run_id']
+                items = store.pending_items(run_id)
+                total = last['total']
+                self.log(f"[i] {tr(self.lang, 'resume_from', run=run_id, done=total - len(items), total=total)}")
+            else:
+                path = Path(cfg.groups_path)
+                if not path.exists():
+                    self.log(f"[!] {tr(self.lang, 'groups_missing')}")
+                    return summary
+                links = self.load_links(store, path)
+                if not links:
+                    self.log(f"[!] {tr(self.lang, 'groups_empty')}")
+                    return summary
+                if cfg.new_first:
+                    # 新抓到、从未访问过的群排在前面，其余保持原顺序
+                    visited = store.visited_keys()
+                    links.sort(key=lambda u: store.canonical_key(u) in visited)
+                items = list(enumerate(links, 1))
+                total = len(items)
+            summary["total"] = total
+
+            delay = float(cfg.delay)
+            send_wait = self.timeouts.get("confirm")
+            total_eta = (EST_SEND_SEC + delay) * len(items)
+            self.log(f"[i] {tr(self.lang, 'to_send_count', n=len(items))}")
+            self.log(f"[i] {tr(self.lang, 'per_group_delay', delay=delay, wait=send_wait)}")
+            self.log(f"[i] {tr(self.lang, 'send_eta', eta=fmt_duration(total_eta), sec=total_eta)}")
+            self.log(f"[*] {tr(self.lang, 'start_thread')}")
+
+            poster = self.ensure_poster()
+            self.drivers.set_timeouts(**POST_TIMEOUTS)
+            try:
+                if not self._logged_in(poster):
+                    return summary
+            except Exception as e:
+                self.log(tr(self.lang, "login_check_error", err=e))
+
+            if run_id is None:
+                store.add([u for _, u in items])
+                run_id = store.start_run(RUN_KIND_POST, [u for _, u in items])
+                self.log(f"[i] {tr(self.lang, 'run_id', run=run_id)}")
+            summary["run_id"] = run_id
+
+            post_wl = self.whitelist(cfg.post_wl_path)
+            self.log(tr(self.lang, "post_wl_loaded", n=len(post_wl)))
+
+            if cfg.low_activity and not cfg.resume:
+                try:
+                    with open(cfg.low_path, "w", encoding="utf-8"):
+                        pass
+                except Exception as err:
+                    self.log(f"[!] 无法清空 low.txt: {err!r}")
+
+            for i, url in items:
+                if self.stopped:
+                    self.log(tr(self.lang, "stopped"))
+                    break
+
+                with self.visit(store, "post", "post", url) as v, self.metrics.span("group"):
+                    outcome = v["outcome"] = self.post_one(poster, store, cfg, i, total, url, message,
+                                                           post_wl)
+                if outcome is None:
+                    self.log(tr(self.lang, "stopped"))
+                    break
+                if outcome == OUT_LOGGED_OUT:
+                    # 中途掉线：不记录该群，留给“继续上次任务”
+                    break
+                if outcome == OUT_RATE_LIMITED:
+                    # 被限流后继续发只会全部失败；同样不记录，留给“继续上次任务”
+                    self.log(f"[!] {tr(self.lang, 'rate_limited_stop')}")
+                    break
+                store.checkpoint(run_id, i, outcome)
+                self.emit(EV_PROGRESS, job="post", i=i, total=total, url=url, outcome=outcome)
+
+                with self.metrics.span("pacing"):
+                    if outcome == OUT_POSTED:
+                        summary["sent"] += 1
+                        self._token.sleep(delay)
+                    elif outcome in (OUT_FAILED, OUT_ERROR, OUT_NO_BOX, OUT_REJECTED, OUT_TIMEOUT):
+                        self._token.sleep(min(0.2, delay * 0.25))
+                poster = self.next_poster(failed=outcome in (OUT_ERROR, OUT_TIMEOUT, OUT_FAILED))
+            else:
+                summary["status"] = RUN_DONE
+
+            self.log(f"[✓] {tr(self.lang, 'done', ok=summary['sent'], total=len(items))}")
+
+        except Exception as e:
+            self.log(f'[!] 发送过程中异常: {e!r}')
+        finally:
+            if run_id is not None:
+                try:
+                    store.finish_run(run_id, summary["status"])
+                except Exception:
+                    pass
+            elapsed = time.time() - t0
+            self.log(f"[i] {tr(self.lang, 'time_real', fmt=fmt_duration(elapsed), sec=elapsed)}")
+            self._end("post", **summary)
+        return summary
+
+    def post_one(self, poster, store: GroupStore, cfg: JobConfig, i: int, total: int, url: str,
+                 message: str, post_wl: WhitelistIndex) -> str | None:
+        """返回该群的结果；中途被停止时返回 None，不记录结果，留给“继续上次任务”"""
+        if self.protected(post_wl, store, url):
+            self.log(tr(self.lang, "post_wl_skip", i=i, total=total, url=url))
+            return OUT_WHITELIST
+
+        if store.known_no_comment_box(url):
+            self.log(tr(self.lang, "skip_known_no_box", i=i, total=total, url=url))
+            return OUT_NO_BOX
+
+        self.log(tr(self.lang, "open_group", i=i, total=total, url=url))
+
+        ok = False
+        outcome = OUT_FAILED
+        probe = None
+        try:
+            # 先用 HTTP 判断；只有真要发帖时才让 Chrome 打开页面
+            probe = self.probe_http(url)
+            if probe is None or (probe['has_textarea'] and not (cfg.smart_mode and probe['self_comment'])):
+                try:
+                    poster.open_page(url)
+                except Exception:
+                    pass
+                if self.stopped:
+                    # 页面加载被取消，可能只加载了一半：不能再探测和发帖
+                    return None
+                probe = poster.probe_page()
+            if probe.get('logged_out'):
+                self.log(f"[!] {tr(self.lang, 'need_login')}")
+                return OUT_LOGGED_OUT
+            self.learn_gid(store, url, probe)
+
+            if cfg.smart_mode:
+                try:
+                    if probe.get('self_comment'):
+                        store.record(url, OUT_SELF_COMMENT, has_comment_box=probe.get('has_textarea'),
+                                     has_self_comment=True)
+                        if cfg.low_activity:
+                            try:
+                                with open(cfg.low_path, "a", encoding="utf-8") as f:
+                                    f.write(url + "\n")
+                                self.log(tr(self.lang, "low_saved", url=url))
+                            except Exception as e_low:
+                                self.log(f"[!] 写入 low.txt 失败: {e_low!r}")
+                        self.log(tr(self.lang, "skip_existing_comment", i=i, total=total, url=url))
+                        return OUT_SELF_COMMENT
+                except Exception as e:
+                    self.log(f'    [!] 自检留言异常：{e!r}')
+
+            if not probe.get('has_textarea'):
+                outcome = OUT_NO_BOX
+            else:
+                send_wait = self.timeouts.get("confirm")
+                res = poster.post_in_group(url, message, timeout=send_wait, probe=probe)
+                ok = res == PostOutcome.POSTED
+                outcome = POST_OUTCOMES.get(res, OUT_FAILED)
+                if res == PostOutcome.TIMEOUT:
+                    self.log(tr(self.lang, "send_timeout", sec=send_wait))
+        except Exception as e:
+            outcome = OUT_ERROR
+            self.note_error(e)
+            self.log(f'    [!] 发送异常：{e!r}')
+
+        try:
+            store.record(url, outcome,
+                         has_comment_box=probe.get('has_textarea') if probe else None,
+                         has_self_comment=probe.get('self_comment') if probe else None)
+        except Exception as e_db:
+            self.log(f'    [!] 写入状态库失败：{e_db!r}')
+
+        if ok:
+            self.log(tr(self.lang, "sent_ok"))
+        else:
+            self.log(tr(self.lang, "sent_skip"))
+        return outcome
+
+    def leave_no_comment(self, cfg: JobConfig) -> dict:
+        """扫描 groups.txt，退出没有留言框（无权限）的群组"""
+        summary = {"left": 0, "skipped": 0, "total": 0}
+        self._begin("leave_scan", cfg)
+        try:
+            path = Path(cfg.groups_path)
+            if not path.exists():
+                self.log(f"[!] {tr(self.lang, 'groups_missing')}")
+                return summary
+            store = self.ensure_store()
+            links = self.load_links(store, path)
+            if not links:
+                self.log(f"[!] {tr(self.lang, 'groups_empty')}")
+                return summary
+
+            poster = self.ensure_poster()
+            if not self._logged_in(poster):
+                return summary
+
+            total = summary["total"] = len(links)
+            del_wl = self.whitelist(cfg.del_wl_path)
+
+            self.log(f"[*] {tr(self.lang, 'scan_start', total=total)}")
+
+            pending: list[tuple[int, str, str]] = []
+            browser_failed = False
+            for i, url in enumerate(links, 1):
+                if self.stopped:
+                    self.log(f"[*] {tr(self.lang, 'stopped')}")
+                    break
+                if i > 1:
+                    poster = self.next_poster(failed=browser_failed)
+                browser_failed = False
+
+                with self.visit(store, "leave_scan", "scan", url) as v:
+                    probe = self.probe_http(url)
+                    in_browser = probe is None
+                    if in_browser:
+                        try:
+                            poster.open_page(url)
+                        except Exception:
+                            browser_failed = True
+
+                    outcome = None
+                    try:
+                        if probe is None:
+                            probe = poster.probe_page()
+                        self.learn_gid(store, url, probe)
+                        has_box = bool(probe.get('has_textarea'))
+                        store.record(url, OUT_KEPT if has_box else OUT_NO_BOX, has_comment_box=has_box)
+                        if has_box:
+                            self.log(tr(self.lang, "has_comment_skip", i=i, total=total, url=url))
+                            outcome = OUT_KEPT
+                    except Exception:
+                        browser_failed = browser_failed or in_browser
+
+                    if outcome is None and self.protected(del_wl, store, url):
+                        self.log(tr(self.lang, "leave_protected", i=i, total=total, url=url))
+                        outcome = OUT_WHITELIST
+
+                    if outcome is not None:
+                        v["outcome"] = outcome
+                        summary["skipped"] += 1
+                        self.emit(EV_PROGRESS, job="leave_scan", i=i, total=total, url=url, outcome=outcome)
+                        continue
+
+                    self.log(tr(self.lang, "no_perm_try_leave", i=i, total=total, url=url))
+                    gid = store.gid_for(url) if cfg.batch_leave else None
+                    v["outcome"] = OUT_NO_BOX
+                    if gid:
+                        pending.append((i, url, gid))
+                        continue
+                    if not in_browser:
+                        try:
+                            poster.open_page(url)
+                        except Exception:
+                            browser_failed = True
+                    ok = poster.leave_group_if_possible()
+                    browser_failed = browser_failed or not ok
+                    v["action"], v["outcome"] = "leave", OUT_LEFT if ok else OUT_FAILED
+                    if ok:
+                        summary["left"] += 1
+                        store.record(url, OUT_LEFT)
+                    self.emit(EV_PROGRESS, job="leave_scan", i=i, total=total, url=url,
+                              outcome=OUT_LEFT if ok else OUT_FAILED)
+
+                with self.metrics.span("pacing"):
+                    self._token.sleep(0.3)
+            else:
+                res = self.leave_batch(poster, store, "leave_scan", pending, total, cfg.leave_interval)
+                summary["left"] += res.get("ok", 0)
+
+            self.log(f"[✓] {tr(self.lang, 'scan_done', left=summary['left'], skip=summary['skipped'])}")
+        except Exception as e:
+            self.log(f"[!] {tr(self.lang, 'leave_error', err=repr(e))}")
+        finally:
+            self._end("leave_scan", **summary)
+        return summary
+
+    def leave_low_activity(self, cfg: JobConfig) -> dict:
+        """退出 low.txt 中记录的低活跃群组"""
+        summary = {"left": 0, "skipped": 0, "total": 0}
+        self._begin("leave_low", cfg)
+        try:
+            path = Path(cfg.low_path)
+            if not path.exists():
+                self.log("[!] low.txt 不存在或为空" if self.lang == Lang.ZH else "[!] low.txt not found or empty")
+                return summary
+            store = self.ensure_store()
+            urls = self.load_links(store, path)
+            if not urls:
+                self.log("[!] low.txt 为空" if self.lang == Lang.ZH else "[!] low.txt is empty")
+                return summary
+
+            poster = self.ensure_poster()
+            if not self._logged_in(poster):
+                return summary
+
+            total = summary["total"] = len(urls)
+            del_wl = self.whitelist(cfg.del_wl_path)
+
+            pending: list[tuple[int, str, str]] = []
+            for i, url in enumerate(urls, 1):
+                if self.stopped:
+                    self.log(tr(self.lang, "stopped"))
+                    break
+
+                with self.visit(store, "leave_low", "leave", url) as v:
+                    if self.protected(del_wl, store, url):
+                        self.log(tr(self.lang, "leave_protected", i=i, total=total, url=url))
+                        v["outcome"] = OUT_WHITELIST
+                        self.emit(EV_PROGRESS, job="leave_low", i=i, total=total, url=url, outcome=OUT_WHITELIST)
+                        continue
+
+                    if cfg.batch_leave:
+                        gid = store.gid_for(url)
+                        if not gid:
+                            self.learn_gid(store, url, self.probe_http(url))
+                            gid = store.gid_for(url)
+                        if gid:
+                            pending.append((i, url, gid))
+                            continue
+
+                    opened = True
+                    try:
+                        poster.open_page(url)
+                    except Exception:
+                        opened = False
+
+                    ok = poster.leave_group_if_possible()
+                    v["outcome"] = OUT_LEFT if ok else OUT_FAILED
+                    poster = self.next_poster(failed=not (opened and ok))
+                    if ok:
+                        summary["left"] += 1
+                        store.record(url, OUT_LEFT)
+                    else:
+                        summary["skipped"] += 1
+                    self.emit(EV_PROGRESS, job="leave_low", i=i, total=total, url=url,
+                              outcome=OUT_LEFT if ok else OUT_FAILED)
+            else:
+                res = self.leave_batch(poster, store, "leave_low", pending, total, cfg.leave_interval)
+                summary["left"] += res.get("ok", 0)
+                summary["skipped"] += len(pending) - res.get("ok", 0)
+            self.log(tr(self.lang, "exit_low_done", left=summary["left"], skip=summary["skipped"]))
+        except Exception as e:
+            self.log(f'[!] 退出低活跃组异常: {e!r}')
+        finally:
+            self._end("leave_low", **summary)
+        return summary
+
+    def join_from_profile(self, cfg: JobConfig, profile_url: str, per_join_delay: float = 0.3) -> dict:
+        self._begin("join", cfg)
+        res: dict = {}
+        try:
+            poster = self.ensure_poster()
+            if not self._logged_in(poster):
+                res = {"error": "not_logged_in"}
+                return res
+            res = poster.join_groups_from_profile(profile_url, per_join_delay=per_join_delay)
+            return res
+        finally:
+            self._end("join", **res)
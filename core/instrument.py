@@ -0,0 +1,199 @@
+﻿# core/instrument.py
+# -*- coding: utf-8 -*-
+"""分阶段计时与 WebDriver 命令统计：任务结束时写出 JSON/CSV 汇总，可选 Prometheus textfile。
+阶段（navigate / probe / type / click / confirm / pacing / leave …）由调用方用 span() 标出；
+命令统计靠替换 driver.execute，元素操作、alert、脚本执行都会经过它。"""
+import csv
+import io
+import json
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from utils.groups_file import atomic_write_text
+
+# 每个阶段只保留最近这么多次耗时用来算分位数，内存有上限
+SAMPLE_SIZE = 2048
+
+class Stat:
+    __slots__ = ('count', 'errors', 'total', 'max', 'samples', '_i')
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.samples: list[float] = []
+        self._i = 0
+
+    def add(self, sec: float, ok: bool = True):
+        self.count += 1
+        self.errors += 0 if ok else 1
+        self.total += sec
+        self.max = max(self.max, sec)
+        if len(self.samples) < SAMPLE_SIZE:
+            self.samples.append(sec)
+        else:
+            self.samples[self._i] = sec
+            self._i = (self._i + 1) % SAMPLE_SIZE
+
+    def quantile(self, q: float) -> float:
+        if not self.samples:
+            return 0.0
+        s = sorted(self.samples)
+        return s[min(len(s) - 1, int(q * len(s)))]
+
+    def as_dict(self) -> dict:
+        return {
+            'count': self.count, 'errors': self.errors, 'total': round(self.total, 4),
+            'mean': round(self.total / self.count, 4) if self.count else 0.0,
+            'p50': round(self.quantile(0.5), 4), 'p95': round(self.quantile(0.95), 4),
+            'max': round(self.max, 4),
+        }
+
+class Metrics:
+    """一个任务的计时汇总；线程安全，reset() 开始新任务"""
+
+    def __init__(self, job: str | None = None):
+        self._lock = threading.Lock()
+        self.reset(job)
+
+    def reset(self, job: str | None = None):
+        with self._lock:
+            self.job = job
+            self.started = time.time()
+            self.spans: dict[str, Stat] = {}
+            self.commands: dict[str, Stat] = {}
+            self.gauges: dict[str, float] = {}
+            self._item: dict[str, float] | None = None
+
+    def add_span(self, name: str, sec: float, ok: bool = True):
+        with self._lock:
+            st = self.spans.get(name)
+            if st is None:
+                st = self.spans[name] = Stat()
+            st.add(sec, ok)
+            if self._item is not None:
+                self._item[name] = self._item.get(name, 0.0) + sec
+
+    @contextmanager
+    def span(self, name: str):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            yield
+            ok = True
+        finally:
+            self.add_span(name, time.perf_counter() - t0, ok)
+
+    def begin_item(self):
+        """开始单独累计一个群的各阶段耗时（写 journal 用）"""
+        with self._lock:
+            self._item = {}
+
+    def end_item(self) -> dict[str, float]:
+        """结束并返回 {阶段: 毫秒}"""
+        with self._lock:
+            item, self._item = self._item or {}, None
+        return {k: round(v * 1000, 1) for k, v in item.items()}
+
+    def set_gauge(self, name: str, value: float):
+        """记录一个当前值（如自适应超时），随汇总一起导出"""
+        with self._lock:
+            self.gauges[name] = value
+
+    def add_command(self, name: str, sec: float, ok: bool = True):
+        with self._lock:
+            st = self.commands.get(name)
+            if st is None:
+                st = self.commands[name] = Stat()
+            st.add(sec, ok)
+
+    def summary(self) -> dict:
+        with self._lock:
+            return {
+                'job': self.job,
+                'started': self.started,
+                'elapsed': round(time.time() - self.started, 3),
+                'spans': {k: v.as_dict() for k, v in sorted(self.spans.items())},
+                'commands': {k: v.as_dict() for k, v in sorted(self.commands.items())},
+                'gauges': dict(sorted(self.gauges.items())),
+            }
+
+    def top_spans(self, n: int = 3) -> list[tuple[str, float]]:
+        """按累计耗时排序的前 n 个阶段"""
+        with self._lock:
+            items = sorted(((k, v.total) for k, v in self.spans.items()), key=lambda kv: -kv[1])
+        return items[:n]
+
+    def write_json(self, path: str | Path):
+        atomic_write_text(path, json.dumps(self.summary(), ensure_ascii=False, indent=2) + '\n')
+
+    def write_csv(self, path: str | Path):
+        s = self.summary()
+        buf = io.StringIO()
+        w = csv.writer(buf, lineterminator='\n')
+        w.writerow(['kind', 'name', 'count', 'errors', 'total', 'mean', 'p50', 'p95', 'max'])
+        for kind in ('spans', 'commands'):
+            for name, st in s[kind].items():
+                w.writerow([kind[:-1], name, st['count'], st['errors'], st['total'], st['mean'],
+                            st['p50'], st['p95'], st['max']])
+        for name, value in s['gauges'].items():
+            w.writerow(['gauge', name, '', '', value, '', '', '', ''])
+        atomic_write_text(path, buf.getvalue())
+
+    def write_prom(self, path: str | Path):
+        """node_exporter textfile 格式；整文件原子替换，采集方不会读到半截"""
+        s = self.summary()
+        job = _label(s['job'] or '')
+        lines = [
+            '# HELP sep_job_duration_seconds Wall time of the last job.',
+            '# TYPE sep_job_duration_seconds gauge',
+            f'sep_job_duration_seconds{{job="{job}"}} {s["elapsed"]}',
+        ]
+        for kind, label, metric in (('spans', 'phase', 'sep_phase'),
+                                    ('commands', 'command', 'sep_webdriver_command')):
+            lines += [
+                f'# HELP {metric}_seconds Time spent per {label} in the last job.',
+                f'# TYPE {metric}_seconds gauge',
+            ]
+            lines += [f'{metric}_seconds{{job="{job}",{label}="{_label(k)}"}} {v["total"]}'
+                      for k, v in s[kind].items()]
+            lines += [f'# TYPE {metric}_count gauge']
+            lines += [f'{metric}_count{{job="{job}",{label}="{_label(k)}"}} {v["count"]}'
+                      for k, v in s[kind].items()]
+            lines += [f'# TYPE {metric}_errors gauge']
+            lines += [f'{metric}_errors{{job="{job}",{label}="{_label(k)}"}} {v["errors"]}'
+                      for k, v in s[kind].items()]
+        if s['gauges']:
+            lines += [
+                '# HELP sep_setting Values chosen during the last job, e.g. adaptive timeouts.',
+                '# TYPE sep_setting gauge',
+            ]
+            lines += [f'sep_setting{{job="{job}",name="{_label(k)}"}} {v}' for k, v in s['gauges'].items()]
+        atomic_write_text(path, '\n'.join(lines) + '\n')
+
+def _label(v: str) -> str:
+    return str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def instrument_driver(driver, metrics: Metrics):
+    """让 driver 的每条 WebDriver 命令计入 metrics；重复调用只更换目标 metrics"""
+    if getattr(driver, '_sep_metrics', None) is not None:
+        driver._sep_metrics = metrics
+        return driver
+    orig = driver.execute
+
+    def execute(driver_command, params=None):
+        t0 = time.perf_counter()
+        ok = False
+        try:
+            res = orig(driver_command, params)
+            ok = True
+            return res
+        finally:
+            driver._sep_metrics.add_command(driver_command, time.perf_counter() - t0, ok)
+
+    driver._sep_metrics = metrics
+    driver.execute = execute
+    return driver
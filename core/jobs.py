@@ -0,0 +1,180 @@
+﻿# core/jobs.py
+# -*- coding: utf-8 -*-
+"""任务队列：所有要用浏览器的任务排队到同一个工作线程上依次执行，
+每个任务有自己的取消令牌，状态变化通过 on_event 回调通知（GUI 侧用 Qt 信号转回主线程）。"""
+import itertools
+import queue
+import threading
+import time
+from contextlib import nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_DONE = 'done'
+JOB_FAILED = 'failed'
+JOB_CANCELLED = 'cancelled'
+JOB_FINAL = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+# 事件名：on_event(EV_JOB_STATE, data)，data 见 JobQueue._state
+EV_JOB_STATE = "job_state"
+
+class Cancelled(BaseException):
+    """等待中发现任务已取消；与 KeyboardInterrupt 一样不继承 Exception，免得被 except Exception 吞掉"""
+
+class CancelToken:
+    """单个任务的取消标志；sleep() 在取消时立即返回"""
+
+    def __init__(self):
+        self._ev = threading.Event()
+
+    def cancel(self):
+        self._ev.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._ev.is_set()
+
+    def sleep(self, sec: float) -> bool:
+        """等待 sec 秒；被取消返回 True"""
+        return self._ev.wait(max(0.0, sec))
+
+    def check(self):
+        if self._ev.is_set():
+            raise Cancelled()
+
+@dataclass(eq=False)
+class Job:
+    id: int
+    name: str
+    fn: Callable[[CancelToken], Any]
+    token: CancelToken = field(default_factory=CancelToken)
+    status: str = JOB_QUEUED
+    result: Any = None
+    error: BaseException | None = None
+    submitted_at: float = field(default_factory=time.time)
+    started_at: float | None = None
+    finished_at: float | None = None
+    _done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    def cancel(self):
+        self.token.cancel()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        return self._done.wait(timeout)
+
+class JobQueue:
+    """单工作线程的 FIFO 队列；lease() 返回的上下文在整个任务期间持有（浏览器独占）"""
+
+    def __init__(self, on_event: Callable[[str, dict], None] | None = None,
+                 lease: Callable[[], Any] | None = None):
+        self._on_event = on_event
+        self._lease = lease or nullcontext
+        self._q: queue.Queue[Job | None] = queue.Queue()
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._pending: list[Job] = []
+        self._thread: threading.Thread | None = None
+        self.current: Job | None = None
+
+    def _emit(self, job: Job):
+        if self._on_event is None:
+            return
+        try:
+            self._on_event(EV_JOB_STATE, self._state(job))
+        except Exception:
+            pass
+
+    def _state(self, job: Job) -> dict:
+        with self._lock:
+            pending = len(self._pending)
+            running = self.current is not None
+        return {
+            "id": job.id, "job": job.name, "status": job.status,
+            "result": job.result, "error": repr(job.error) if job.error else None,
+            "pending": pending, "running": running,
+        }
+
+    def submit(self, name: str, fn: Callable[[CancelToken], Any]) -> Job:
+        """fn(token) 在工作线程里执行；返回的 Job 可用于取消或等待"""
+        job = Job(next(self._ids), name, fn)
+        with self._lock:
+            self._pending.append(job)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._worker, name="job-queue", daemon=True)
+                self._thread.start()
+        self._q.put(job)
+        self._emit(job)
+        return job
+
+    def _worker(self):
+        while True:
+            job = self._q.get()
+            if job is None:
+                return
+            with self._lock:
+                if job in self._pending:
+                    self._pending.remove(job)
+            if job.token.cancelled:
+                self._finish(job, JOB_CANCELLED)
+                continue
+            with self._lease():
+                with self._lock:
+                    self.current = job
+                job.status = JOB_RUNNING
+                job.started_at = time.time()
+                self._emit(job)
+                try:
+                    job.result = job.fn(job.token)
+                    status = JOB_CANCELLED if job.token.cancelled else JOB_DONE
+                except Cancelled:
+                    status = JOB_CANCELLED
+                except BaseException as e:
+                    job.error = e
+                    status = JOB_FAILED
+                finally:
+                    with self._lock:
+                        self.current = None
+            self._finish(job, status)
+
+    def _finish(self, job: Job, status: str):
+        job.status = status
+        job.finished_at = time.time()
+        job._done.set()
+        self._emit(job)
+
+    def jobs(self) -> list[Job]:
+        """正在执行的任务（若有）+ 排队中的任务"""
+        with self._lock:
+            return ([self.current] if self.current else []) + list(self._pending)
+
+    @property
+    def busy(self) -> bool:
+        return bool(self.jobs())
+
+    def cancel(self, job_id: int | None = None) -> bool:
+        """取消指定任务；不给 id 则取消正在执行的任务"""
+        if job_id is None:
+            job = self.current
+            if job is not None:
+                job.cancel()
+            return job is not None
+        for job in self.jobs():
+            if job.id == job_id:
+                job.cancel()
+                return True
+        return False
+
+    def cancel_all(self):
+        for job in self.jobs():
+            job.cancel()
+
+    def shutdown(self, timeout: float | None = None):
+        """取消全部任务并结束工作线程"""
+        self.cancel_all()
+        with self._lock:
+            t = self._thread
+        if t is not None and t.is_alive():
+            self._q.put(None)
+            t.join(timeout)
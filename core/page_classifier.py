@@ -0,0 +1,181 @@
+﻿# core/page_classifier.py
+# -*- coding: utf-8 -*-
+"""不开浏览器判断群组页：一次 HTTP GET + html.parser，回答“有没有留言框 / 有没有自己的留言”。
+只读，不发任何写请求；真正发帖仍由 SteamPoster 在 Chrome 里完成。"""
+import gzip
+import http.client
+import re
+import threading
+import zlib
+from html.parser import HTMLParser
+from urllib.parse import urljoin, urlsplit
+
+from utils.endpoints import ENDPOINTS
+from utils.identity import author_path, match_keys
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/124.0 Safari/537.36')
+MAX_REDIRECTS = 5
+
+_TEXTAREA_ID = re.compile(r'^commentthread_.+_textarea$')
+_CLAN_TEXTAREA = re.compile(r'^commentthread_Clan_(\d+)_textarea$')
+_CONFIRM_LEAVE = re.compile(r"^javascript:ConfirmLeaveGroup\(\s*'(\d+)'")
+
+class GroupPageParser(HTMLParser):
+    """只记录 PROBE_JS 关心的几个标记，其余内容直接跳过"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.has_textarea = False
+        self.gid: str | None = None
+        self.logged_out = False
+        self.authors: list[tuple[str, str | None]] = []
+        self._in_author = False
+
+    def handle_starttag(self, tag, attrs):
+        a = dict(attrs)
+        if tag == 'textarea' and not self.has_textarea:
+            classes = (a.get('class') or '').split()
+            tid = a.get('id') or ''
+            if 'commentthread_textarea' in classes or _TEXTAREA_ID.match(tid) \
+                    or _TEXTAREA_ID.match(a.get('name') or ''):
+                self.has_textarea = True
+                m = _CLAN_TEXTAREA.match(tid)
+                if m:
+                    self.gid = m.group(1)
+        elif tag == 'div' and 'commentthread_comment_author' in (a.get('class') or '').split():
+            self._in_author = True
+        elif tag == 'input' and a.get('name') == 'groupId' and (a.get('value') or '').isdigit():
+            self.gid = self.gid or a['value']
+        elif tag == 'a':
+            href = a.get('href') or ''
+            m = _CONFIRM_LEAVE.match(href)
+            if m:
+                self.gid = self.gid or m.group(1)
+            if self._in_author:
+                self.authors.append((href, a.get('data-miniprofile')))
+                self._in_author = False
+            elif 'global_action_link' in (a.get('class') or '').split() and 'login' in href:
+                self.logged_out = True
+
+def classify_html(html: str, identity: dict | None = None) -> dict:
+    """返回与 SteamPoster.probe_page 同名的布尔字段：has_textarea / self_comment / logged_out，外加 gid"""
+    p = GroupPageParser()
+    p.feed(html)
+    p.close()
+
+    paths, accountid = match_keys(identity)
+    self_comment = any(
+        (accountid and mini == accountid) or (href and author_path(href) in paths)
+        for href, mini in p.authors
+    )
+    return {
+        'has_textarea': p.has_textarea,
+        'self_comment': bool(self_comment),
+        'logged_out': p.logged_out,
+        'gid': p.gid,
+    }
+
+def cookies_from_driver(driver, host: str | None = None) -> dict[str, str]:
+    """从 Chrome（同一个用户目录）取社区域名下的 cookie；CDP 不可用时退回 get_cookies()"""
+    host = (host or urlsplit(ENDPOINTS.community).hostname or '').lower()
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    except Exception:
+        try:
+            cookies = driver.get_cookies()
+        except Exception:
+            cookies = []
+    jar = {}
+    for c in cookies:
+        domain = (c.get('domain') or '').lstrip('.').lower()
+        if domain and (host == domain or host.endswith('.' + domain)):
+            jar[c['name']] = c.get('value', '')
+    return jar
+
+class PageClassifier:
+    """复用登录 cookie 的长连接 HTTP 客户端；线程安全（内部串行）"""
+
+    def __init__(self, cookies: dict[str, str] | None = None, identity: dict | None = None,
+                 timeout: float = 10.0, host: str | None = None):
+        self.cookies = dict(cookies or {})
+        self.identity = identity
+        self.timeout = timeout
+        self.host = (host or urlsplit(ENDPOINTS.community).hostname or '').lower()
+        self._conns: dict[tuple[str, str], http.client.HTTPConnection] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_driver(cls, driver, identity: dict | None = None, timeout: float = 10.0) -> "PageClassifier":
+        return cls(cookies_from_driver(driver), identity=identity, timeout=timeout)
+
+    def close(self):
+        with self._lock:
+            for c in self._conns.values():
+                try:
+                    c.close()
+                except Exception:
+                    pass
+            self._conns.clear()
+
+    def _conn(self, scheme: str, netloc: str) -> http.client.HTTPConnection:
+        key = (scheme, netloc)
+        c = self._conns.get(key)
+        if c is None:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            c = self._conns[key] = cls(netloc, timeout=self.timeout)
+        return c
+
+    def _request(self, url: str) -> tuple[int, http.client.HTTPMessage, bytes]:
+        parts = urlsplit(url)
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        headers = {
+            'User-Agent': USER_AGENT,
+            'Accept': 'text/html,application/xhtml+xml',
+            'Accept-Encoding': 'gzip, deflate',
+            'Accept-Language': 'en-US,en;q=0.8',
+        }
+        if self.cookies and (parts.hostname or '').lower() == self.host:
+            headers['Cookie'] = '; '.join(f'{k}={v}' for k, v in self.cookies.items())
+        for attempt in range(2):
+            c = self._conn(parts.scheme, parts.netloc)
+            try:
+                c.request('GET', path, headers=headers)
+                resp = c.getresponse()
+                body = resp.read()
+                break
+            except (http.client.HTTPException, OSError):
+                # 服务端关掉了长连接：丢弃后重连一次
+                c.close()
+                self._conns.pop((parts.scheme, parts.netloc), None)
+                if attempt:
+                    raise
+        for raw in (resp.headers.get_all('Set-Cookie') or []) if parts.hostname == self.host else []:
+            name, _, rest = raw.partition('=')
+            if name.strip():
+                self.cookies[name.strip()] = rest.split(';', 1)[0]
+        enc = (resp.headers.get('Content-Encoding') or '').lower()
+        if enc == 'gzip':
+            body = gzip.decompress(body)
+        elif enc == 'deflate':
+            body = zlib.decompress(body)
+        return resp.status, resp.headers, body
+
+    def fetch(self, url: str) -> tuple[str, str]:
+        """GET 并跟随重定向，返回 (最终地址, HTML 文本)"""
+        with self._lock:
+            for _ in range(MAX_REDIRECTS + 1):
+                status, headers, body = self._request(url)
+                loc = headers.get('Location')
+                if status in (301, 302, 303, 307, 308) and loc:
+                    url = urljoin(url, loc)
+                    continue
+                if status >= 400:
+                    raise http.client.HTTPException(f'HTTP {status} for {url}')
+                m = re.search(r'charset=([\w-]+)', headers.get('Content-Type') or '')
+                return url, body.decode(m.group(1) if m else 'utf-8', errors='replace')
+            raise http.client.HTTPException(f'too many redirects for {url}')
+
+    def classify(self, url: str) -> dict:
+        final_url, html = self.fetch(url)
+        return {**classify_html(html, self.identity), 'url': final_url}
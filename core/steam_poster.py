@@ -1,29 +1,358 @@
 ﻿# core/steam_poster.py
 # -*- coding: utf-8 -*-
 import time
+from enum import Enum
 from pathlib import Path
 from utils.i18n import Lang, tr
 
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import (
-    NoSuchElementException, TimeoutException, WebDriverException
-)
+# selenium 在用到的方法里导入：Engine 只需要 PostOutcome，导入本模块不应拖进 selenium
 
 from utils.paths import PROFILE_DIR, GROUPS_FILE
-from utils.browser import MY_GROUPS_URL, make_driver, is_logged_in
+from utils.browser import (
+    DEFAULT_TIMEOUTS, JOIN_TIMEOUTS, LoginState, make_driver, is_logged_in, login_steamid, apply_timeouts, current_timeouts
+)
+from utils.endpoints import ENDPOINTS
+from utils.identity import make_identity, match_keys
+from utils.groups_file import SyncResult, sync_groups_file
+from utils.whitelist import normalize_url
+from core.instrument import Metrics
+from core.timeouts import TimeoutPolicy
+from core.jobs import CancelToken, Cancelled
+
+SELF_URL_JS = r"""
+const normalize = (u) => {
+  try {
+    const url = new URL(u);
+    let path = url.pathname.replace(/\/+$|\/+(?=\?)/g, '');
+    return url.origin + path;
+  } catch (e) { return u; }
+};
+const findSelfUrl = () => {
+  const selectors = [
+    '#global_action_menu a[href*="/profiles/"]',
+    '#global_action_menu a[href*="/id/"]',
+    'a.menuitem[href*="/profiles/"]',
+    'a.menuitem[href*="/id/"]',
+    '.user_avatar a[href*="/profiles/"]',
+    '.user_avatar a[href*="/id/"]'
+  ];
+  let link = null;
+  for (const s of selectors) {
+    const elem = document.querySelector(s);
+    if (elem && elem.href) { link = elem.href; break; }
+  }
+  if (!link) {
+    try {
+      if (typeof g_rgProfileData !== 'undefined' && g_rgProfileData.url) link = g_rgProfileData.url;
+    } catch (e) {}
+  }
+  return link ? normalize(link.split('?')[0]) : null;
+};
+const selfPath = (u) => {
+  try { return new URL(u, location.href).pathname.replace(/\/+$/, '').toLowerCase(); }
+  catch (e) { return ''; }
+};
+const countSelfComments = (paths, accountid) => {
+  let n = 0;
+  for (const a of document.querySelectorAll('.commentthread_comment_author a')) {
+    if ((accountid && a.getAttribute('data-miniprofile') === accountid) ||
+        (a.href && paths.has(selfPath(a.href)))) n++;
+  }
+  return n;
+};
+"""
+
+PROBE_JS = SELF_URL_JS + r"""
+const taSels = [
+  'textarea.commentthread_textarea',
+  'textarea[id*="commentthread_"][id$="_textarea"]',
+  'textarea[name*="commentthread_"][name$="_textarea"]'
+];
+const btnSels = [
+  '[id^="commentthread_"][id$="_submit"]',
+  '.commentthread_submit, .commentthread_submit_button',
+  '.btn_green_white_innerfade[id*="_submit"]',
+  'span[role="button"].btn_green_white_innerfade'
+];
+const res = {has_textarea: false, selector: null, textarea: null,
+             submit: null, submit_selector: null, filled: false, self_comment: false,
+             logged_out: !!document.querySelector('a.global_action_link[href*="login"]')};
+for (const s of taSels) {
+  const el = document.querySelector(s);
+  if (el) { res.has_textarea = true; res.selector = s; res.textarea = el; break; }
+}
+if (res.textarea) {
+  res.filled = !!(res.textarea.value || '').trim();
+  for (const s of btnSels) {
+    const el = document.querySelector(s);
+    if (el) { res.submit = el; res.submit_selector = s; break; }
+  }
+}
+res.page_url = location.href;
+res.gid = null;
+const gm = res.textarea && (res.textarea.id || '').match(/^commentthread_Clan_(\d+)_textarea$/);
+if (gm) {
+  res.gid = gm[1];
+} else {
+  const leave = document.querySelector('a[href^="javascript:ConfirmLeaveGroup"]');
+  const lm = leave && leave.getAttribute('href').match(/ConfirmLeaveGroup\(\s*'(\d+)'/);
+  const inp = document.querySelector('#leave_group_form input[name="groupId"]');
+  if (lm) res.gid = lm[1];
+  else if (inp && /^\d+$/.test(inp.value)) res.gid = inp.value;
+}
+const ident = arguments[0] || {paths: [], accountid: null, need_url: true};
+const paths = new Set(ident.paths || []);
+res.self_url = null;
+if (ident.need_url) {
+  res.self_url = findSelfUrl();
+  if (res.self_url) paths.add(selfPath(res.self_url));
+}
+res.self_count = (paths.size || ident.accountid) ? countSelfComments(paths, ident.accountid) : 0;
+res.self_comment = res.self_count > 0;
+return res;
+"""
+
+# 只数自己的留言，不碰留言框等其余检查；参数同 PROBE_JS
+SELF_COMMENT_JS = SELF_URL_JS + r"""
+const ident = arguments[0] || {paths: [], accountid: null, need_url: true};
+const paths = new Set(ident.paths || []);
+const selfUrl = ident.need_url ? findSelfUrl() : null;
+if (selfUrl) paths.add(selfPath(selfUrl));
+return {self_url: selfUrl,
+        self_count: (paths.size || ident.accountid) ? countSelfComments(paths, ident.accountid) : 0};
+"""
+
+# 点击发送后等待真正的结果：留言框被清空 / 出现自己的新留言 -> posted；
+# 错误提示出现 -> rejected 或 rate_limited；超时 -> timeout
+CONFIRM_JS = SELF_URL_JS + r"""
+const done = arguments[arguments.length - 1];
+const ta = arguments[0];
+const ident = arguments[1] || {paths: [], accountid: null};
+const baseline = arguments[2] || 0;
+const timeoutMs = arguments[3] || 10000;
+const paths = new Set(ident.paths || []);
+const rateRe = /too (frequently|many|fast|often)|rate.?limit|slow down|请稍后|过于频繁/i;
+const check = () => {
+  for (const e of document.querySelectorAll('[id^="commentthread_"][id$="_entry_error"], .commentthread_entry_error')) {
+    const t = (e.textContent || '').trim();
+    if (t && e.offsetParent !== null) return {outcome: rateRe.test(t) ? 'rate_limited' : 'rejected', message: t};
+  }
+  if ((paths.size || ident.accountid) && countSelfComments(paths, ident.accountid) > baseline) return {outcome: 'posted'};
+  if (ta && ta.isConnected && !(ta.value || '').trim()) return {outcome: 'posted'};
+  return null;
+};
+let finished = false, obs = null, iv = null, to = null;
+const finish = (r) => {
+  if (finished) return;
+  finished = true;
+  if (obs) obs.disconnect();
+  clearInterval(iv);
+  clearTimeout(to);
+  done(r);
+};
+const first = check();
+if (first) {
+  finish(first);
+} else {
+  obs = new MutationObserver(() => { const r = check(); if (r) finish(r); });
+  obs.observe(document.body, {subtree: true, childList: true, attributes: true, characterData: true});
+  // 留言框的 value 变化不触发 DOM 变更，补一个轻量轮询
+  iv = setInterval(() => { const r = check(); if (r) finish(r); }, 100);
+  to = setTimeout(() => finish({outcome: 'timeout'}), timeoutMs);
+}
+"""
+
+SESSION_JS = r"""
+const getSessionID = () => {
+  try { if (typeof g_sessionID !== 'undefined' && g_sessionID) return g_sessionID; } catch (e) {}
+  try {
+    const m = document.cookie.match(/(?:^|;\s*)sessionid=([^;]+)/i);
+    if (m && m[1]) return decodeURIComponent(m[1]);
+  } catch (e) {}
+  return null;
+};
+"""
+
+# 页内后台任务之间的间隔：st.abort 置位后 100ms 内结束等待
+SLEEP_JS = r"""
+const abortableSleep = (st, ms) => new Promise(resolve => {
+  if (!(ms > 0) || st.abort) return resolve();
+  const end = Date.now() + ms;
+  const iv = setInterval(() => {
+    if (st.abort || Date.now() >= end) { clearInterval(iv); resolve(); }
+  }, 100);
+});
+"""
+
+# 读取自己的群组：/my/?xml=1 一次给出 groupID64 和 groupURL，缺 groupURL 的用 /gid/<groupID64>；
+# 结果写到 window.__sepFetch.groups 供轮询
+FETCH_GROUPS_JS = r"""
+const base = arguments[0] || location.origin;
+const st = window.__sepFetch = {groups: null, finished: false, abort: false, error: null};
+(async () => {
+  const parse = (t) => new DOMParser().parseFromString(t, 'text/xml');
+  const text = (n, s) => { const e = n.querySelector(s); return e ? (e.textContent || '').trim() : ''; };
+  const resp = await fetch(`${base}/my/?xml=1`, {credentials: 'include'});
+  if (!resp.ok) throw new Error('HTTP ' + resp.status);
+  const doc = parse(await resp.text());
+  if (!doc.querySelector('profile > steamID64')) throw new Error('no profile xml');
+  st.groups = [...doc.querySelectorAll('profile > groups > group')]
+    .map(g => ({gid: text(g, 'groupID64'), vanity: text(g, 'groupURL')}))
+    .filter(g => g.gid)
+    .map(g => ({
+      gid: g.gid,
+      url: g.vanity ? `${base}/groups/${encodeURIComponent(g.vanity)}` : `${base}/gid/${g.gid}`
+    }));
+})().catch(e => { st.error = String(e); }).finally(() => { st.finished = true; });
+return true;
+"""
+
+# 批量退群：在页面里后台逐个 POST <主页>/home_process，进度写到 window.__sepLeave 供轮询
+LEAVE_BATCH_JS = SESSION_JS + SLEEP_JS + r"""
+const gids = arguments[0] || [];
+const delayMs = arguments[1] || 0;
+const profile = (arguments[2] || '').replace(/\/+$/, '');
+const st = window.__sepLeave = {total: gids.length, results: [], finished: false, abort: false, error: null};
+(async () => {
+  const sessionID = getSessionID();
+  if (!sessionID) throw new Error('no sessionID (not logged in?)');
+  for (const gid of gids) {
+    if (st.abort) break;
+    let ok = false, status = 0;
+    try {
+      const resp = await fetch(`${profile}/home_process`, {
+        method: 'POST',
+        credentials: 'include',
+        headers: {'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'},
+        body: new URLSearchParams({action: 'leaveGroup', groupId: gid, sessionID})
+      });
+      ok = resp.ok;
+      status = resp.status;
+    } catch (e) {}
+    st.results.push({gid, ok, status});
+    await abortableSleep(st, delayMs);
+  }
+})().catch(e => { st.error = String(e); }).finally(() => { st.finished = true; });
+return true;
+"""
+
+# 加入对方主页上的全部群组：同样后台执行，进度写到 window.__sepJoin
+JOIN_JS = SESSION_JS + SLEEP_JS + r"""
+const delayMs = arguments[0] || 0;
+const base = arguments[1] || location.origin;
+const st = window.__sepJoin = {total: 0, ok: 0, fail: 0, joined: [], failed: [], finished: false,
+                               abort: false, error: null};
+const getSteamIdFromPage = async () => {
+  let m = location.pathname.match(/\/profiles\/(\d{17})/);
+  if (m) return m[1];
+  m = location.pathname.match(/\/id\/([^\/]+)/);
+  if (m) {
+    const resp = await fetch(`${base}/id/${m[1]}/?xml=1`, {credentials: 'include'});
+    if (!resp.ok) throw new Error('获取 vanity 对应 steamID64 失败：HTTP ' + resp.status);
+    const sid = ((await resp.text()).match(/<steamID64>(\d{17})<\/steamID64>/) || [])[1];
+    if (sid) return sid;
+  }
+  try { if (window.g_rgProfileData && g_rgProfileData.steamid) return g_rgProfileData.steamid; } catch (e) {}
+  return null;
+};
+(async () => {
+  const sessionID = getSessionID();
+  if (!sessionID) throw new Error('无法获取 sessionID（请确认已登录 steamcommunity.com）');
+  const steamID = await getSteamIdFromPage();
+  if (!steamID) throw new Error('无法确定对方 steamID（主页不可访问或未公开）');
+
+  const xmlResp = await fetch(`${base}/profiles/${steamID}/?xml=1`, {credentials: 'include'});
+  if (!xmlResp.ok) throw new Error('获取群组列表失败：HTTP ' + xmlResp.status);
+  const xmlDoc = new DOMParser().parseFromString(await xmlResp.text(), 'text/xml');
+  const gids = Array.from(xmlDoc.querySelectorAll('groupID64'))
+                    .map(n => (n.textContent || '').trim())
+                    .filter(Boolean);
+  st.total = gids.length;
+
+  for (const gid of gids) {
+    if (st.abort) break;
+    try {
+      const resp = await fetch(`${base}/gid/${gid}`, {
+        method: 'POST',
+        credentials: 'include',
+        headers: {'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8'},
+        body: new URLSearchParams({action: 'join', sessionID})
+      });
+      if (resp.ok) { st.ok++; st.joined.push(gid); }
+      else { st.fail++; st.failed.push(gid); }
+    } catch (e) { st.fail++; st.failed.push(gid); }
+    await abortableSleep(st, delayMs);
+  }
+})().catch(e => { st.error = String(e); }).finally(() => { st.finished = true; });
+return true;
+"""
+
+class PostOutcome(str, Enum):
+    POSTED = "posted"
+    REJECTED = "rejected"
+    RATE_LIMITED = "rate_limited"
+    TIMEOUT = "timeout"
+    FAILED = "failed"          # 没有留言框 / 按钮，或点击失败
+
+# 取消后最迟这么久生效：页面加载、发送确认都按这个粒度分段等待，段间检查取消令牌
+WAIT_SLICE = 1.0
+# 分段等待 / WebDriverWait 的轮询间隔
+WAIT_POLL = 0.1
+# 页内后台脚本置 abort 后最多再等这么久；卡住的 fetch() 不等，直接带着已有进度返回
+ABORT_GRACE = 1.0
+
+# fetch_groups 的数据源：资料页 XML（一次请求）或群组页滚动抓取（旧方式）
+FETCH_XML = 'xml'
+FETCH_SCROLL = 'scroll'
+
+EMPTY_PROBE = {
+    'has_textarea': False, 'selector': None, 'textarea': None,
+    'submit': None, 'submit_selector': None, 'filled': False, 'self_comment': False,
+    'logged_out': False, 'self_url': None, 'gid': None, 'page_url': None, 'self_count': 0,
+}
+
+def identity_js(ident: dict | None) -> dict:
+    """PROBE_JS 的参数：作者链接路径集合 + data-miniprofile"""
+    paths, accountid = match_keys(ident)
+    return {'paths': paths, 'accountid': accountid, 'need_url': not (ident and ident.get('url'))}
 
 class SteamPoster:
-    def __init__(self, log_emit, headless: bool = True, lang: Lang = Lang.EN):
+    def __init__(self, log_emit, headless: bool = True, lang: Lang = Lang.EN,
+                 lean: bool = False, page_load_strategy: str | None = None,
+                 profile_dir: Path | str | None = None):
         self._emit = log_emit
-        self.driver = make_driver(headless=headless)
+        self.page_load_strategy = page_load_strategy or ('eager' if lean else 'normal')
+        self.driver = make_driver(headless=headless, lean=lean, page_load_strategy=page_load_strategy,
+                                  profile_dir=profile_dir)
         self.lang = lang  
+        self.login_state = LoginState()
+        self.identity: dict | None = None
+        self.last_sync: SyncResult | None = None
+        self.last_group_ids: dict[str, str] = {}
+        self.pages_loaded = 0
+        # Engine 会换成自己的 Metrics，并让 driver 的每条命令也计入其中
+        self.metrics = Metrics()
+        # 同理，Engine 换成跨浏览器重启共享的 TimeoutPolicy
+        self.timeouts = TimeoutPolicy()
+        # 当前任务的取消令牌，由 Engine 在每个任务开始时换上
+        self.token = CancelToken()
 
     def log(self, s: str):
         self._emit(s)
 
+    def sleep(self, sec: float) -> bool:
+        """可取消的 sleep；被取消返回 True"""
+        return self.token.sleep(sec)
+
+    def wait_until(self, cond, timeout: float):
+        """可取消的 WebDriverWait：每次轮询先看令牌，已取消则抛 Cancelled"""
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        def check(d):
+            self.token.check()
+            return cond(d)
+        return WebDriverWait(self.driver, timeout, poll_frequency=WAIT_POLL).until(check)
+
     def close(self):
         try:
             self.driver.quit()
@@ -31,18 +360,73 @@ class SteamPoster:
             pass
 
     def ensure_logged(self) -> bool:
-        return is_logged_in(self.driver)
+        return is_logged_in(self.driver, self.login_state, open_page=self.open_page)
+
+    def fetch_groups(self, out_path: Path = GROUPS_FILE, groups_url: str | None = None,
+                     source: str = FETCH_XML, key=normalize_url, before_sync=None) -> int:
+        """抓取自己的群组并同步进 out_path；key 为同步时比较新旧条目用的键，
+        before_sync() 在抓到链接之后、同步之前调用（Engine 用来先登记 URL -> groupID64）"""
+        with self.metrics.span("fetch"):
+            links = self.fetch_group_links_xml() if source == FETCH_XML else None
+            if not links:
+                links = self.fetch_group_links_scroll(groups_url)
+
+        if not links:
+            self.log('[!] 未抓到任何群组链接。确认你已加入群组并能访问该页面。')
+            return 0
+
+        if before_sync is not None:
+            before_sync()
+        self.last_sync = sync_groups_file(out_path, links, key=key)
+        self.log(tr(self.lang, "fetch_saved_n", n=len(links), path=str(Path(out_path).resolve())))
+        s = self.last_sync
+        self.log(tr(self.lang, "fetch_sync_diff", added=len(s.added), removed=len(s.removed), kept=s.kept))
+        for u in s.added:
+            self.log(f"    + {u}")
+        for u in s.removed:
+            self.log(f"    - {u}")
+        return len(links)
+
+    def fetch_group_links_xml(self) -> list[str] | None:
+        """一次请求读 /my/?xml=1 的群组列表，缺 groupURL 的用 /gid/<groupID64> 地址；失败返回 None。
+        URL -> groupID64 的对应关系留在 self.last_group_ids"""
+        d = self.driver
+        self._ensure_community_page()
+        try:
+            d.execute_script(FETCH_GROUPS_JS, ENDPOINTS.community)
+        except Exception as e:
+            self.log(f"[!] 资料 XML 读取失败，改用群组页滚动：{e!r}")
+            return None
+        st, aborted, err = self._poll_page_task('__sepFetch', WAIT_POLL,
+                                                deadline=time.perf_counter() + DEFAULT_TIMEOUTS['script'])
+        err = err or (st or {}).get('error') or (aborted if not (st or {}).get('finished') else None)
+        if err:
+            self.log(f"[!] 资料 XML 读取失败，改用群组页滚动：{err}")
+            return None
+        self.last_group_ids = {g['url']: g['gid'] for g in st.get('groups') or [] if g.get('url')}
+        return list(self.last_group_ids) or None
 
-    def fetch_groups(self, out_path: Path = GROUPS_FILE) -> int:
+    def _ensure_community_page(self):
+        """页内 fetch 需要同源 cookie 与 g_sessionID：不在社区域名下时先打开首页"""
+        try:
+            on_community = ENDPOINTS.is_community(self.driver.current_url)
+        except Exception:
+            on_community = False
+        if not on_community:
+            self.open_page(ENDPOINTS.home)
+
+    def fetch_group_links_scroll(self, groups_url: str | None = None) -> list[str]:
         d = self.driver
         self.log(tr(self.lang, "fetch_open_groups"))
-        d.get(MY_GROUPS_URL)
-        time.sleep(2)
+        self.open_page(groups_url or ENDPOINTS.my_groups)
+        if self.sleep(2):
+            return []
 
         last_h = 0
         for _ in range(30):
             d.execute_script('window.scrollTo(0, document.body.scrollHeight)')
-            time.sleep(0.6)
+            if self.sleep(0.6):
+                return []
             h = d.execute_script('return document.body.scrollHeight')
             if h == last_h:
                 break
@@ -53,7 +437,7 @@ class SteamPoster:
           '.groupBlock .groupTitle a',
           '.groupBlock a[href*="/groups/"]',
           'a.linkTitle[href*="/groups/"]',
-          'a[href^="https://steamcommunity.com/groups/"]'
+          'a[href^="' + location.origin + '/groups/"]'
         ];
         let elems = [];
         for (const s of sels) { 
@@ -62,130 +446,185 @@ class SteamPoster:
         }
         const links = [...new Set(
             elems.map(a => new URL(a.getAttribute('href'), location.origin).href.split('?')[0])
-        )].filter(h => /^https:\/\/steamcommunity\.com\/groups\/[^\/]+\/?$/.test(h));
+        )].filter(h => h.startsWith(location.origin + '/groups/') &&
+                       /^\/groups\/[^\/]+\/?$/.test(new URL(h).pathname));
         return links;
         """
         try:
-            links = d.execute_script(js) or []
+            return d.execute_script(js) or []
         except Exception:
-            links = []
+            return []
 
-        if not links:
-            self.log('[!] 未抓到任何群组链接。确认你已加入群组并能访问该页面。')
-            return 0
-
-        Path(out_path).write_text('\n'.join(links), encoding='utf-8')
-        self.log(tr(self.lang, "fetch_saved_n", n=len(links), path=str(Path(out_path).resolve())))
-        return len(links)
-
-    def post_in_group(self, group_url: str, message: str, wait_after_send: float = 1.5) -> bool:
+    def open_page(self, url: str):
+        from selenium.common.exceptions import TimeoutException
         d = self.driver
-        try:
-            d.get(group_url)
-        except TimeoutException:
+        self.pages_loaded += 1
+        limit = self.timeouts.get('page_load')
+        # driver.get 只等一段；没加载完再分段轮询 readyState，中途可取消
+        first = min(limit, WAIT_SLICE)
+        if current_timeouts(d).get('page_load') != first:
+            apply_timeouts(d, page_load=first)
+        loaded = True
+        t0 = time.perf_counter()
+        with self.metrics.span("navigate"):
             try:
-                d.execute_script("window.stop();")
-            except Exception:
-                pass
-
-        quick_js = r"""
-            const sels = [
-              'textarea.commentthread_textarea',
-              'textarea[id*="commentthread_"][id$="_textarea"]',
-              'textarea[name*="commentthread_"][name$="_textarea"]'
-            ];
-            for (const s of sels) {
-              if (document.querySelector(s)) return true;
-            }
-            return false;
-        """
-        try:
-            has_textarea = bool(d.execute_script(quick_js))
-        except Exception:
-            has_textarea = False
-        if not has_textarea:
-            return False
-
-        selectors = [
-            'textarea.commentthread_textarea',
-            'textarea[id*="commentthread_"][id$="_textarea"]',
-            'textarea[name*="commentthread_"][name$="_textarea"]'
-        ]
-        ta = None
-        for sel in selectors:
+                d.get(url)
+            except TimeoutException:
+                loaded = self._wait_loaded(t0 + limit)
+                if not loaded:
+                    try:
+                        d.execute_script("window.stop();")
+                    except Exception:
+                        pass
+        if not self.token.cancelled:
+            self.timeouts.observe('page_load', time.perf_counter() - t0, not loaded)
+
+    def _wait_loaded(self, deadline: float) -> bool:
+        from selenium.common.exceptions import TimeoutException
+        ready = ('interactive', 'complete') if self.page_load_strategy == 'eager' else ('complete',)
+        while not self.token.cancelled and time.perf_counter() < deadline:
             try:
-                ta = WebDriverWait(d, 2.5).until(EC.presence_of_element_located((By.CSS_SELECTOR, sel)))
-                break
+                if self.driver.execute_script("return document.readyState;") in ready:
+                    return True
             except TimeoutException:
+                # 导航还没结束时命令本身会等满一段页面加载超时，直接进入下一轮
                 continue
-        if not ta:
-            return False
+            except Exception:
+                return False
+            if self.sleep(WAIT_POLL):
+                break
+        return False
 
-        current = ta.get_attribute('value') or ''
-        if not current.strip():
+    def self_identity(self) -> dict | None:
+        """当前登录账号 {'url', 'steamid', 'vanity'}；一个会话只解析一次，登出后失效"""
+        if self.identity is None:
             try:
-                ta.clear()
+                url = self.driver.execute_script(SELF_URL_JS + "return findSelfUrl();")
             except Exception:
-                pass
-            ta.send_keys(message)
-
-        btn_selectors = [
-            '[id^="commentthread_"][id$="_submit"]',
-            '.commentthread_submit, .commentthread_submit_button',
-            '.btn_green_white_innerfade[id*="_submit"]',
-            'span[role="button"].btn_green_white_innerfade'
-        ]
-        btn = None
-        for sel in btn_selectors:
+                url = None
+            self.identity = make_identity(url, login_steamid(self.driver))
+        return self.identity
+
+    def _learn_self_url(self, url: str | None):
+        if not url:
+            return
+        steamid = self.identity.get('steamid') if self.identity else None
+        self.identity = make_identity(url, steamid)
+
+    def probe_page(self) -> dict:
+        """一次 execute_script 取回留言框、提交按钮、是否已填写、是否已有自己的留言"""
+        if self.identity is None:
+            self.identity = make_identity(None, login_steamid(self.driver))
+        with self.metrics.span("probe"):
             try:
-                btn = WebDriverWait(d, 2.0).until(EC.presence_of_element_located((By.CSS_SELECTOR, sel)))
-                break
-            except TimeoutException:
-                continue
-        if not btn:
-            return False
+                res = self.driver.execute_script(PROBE_JS, identity_js(self.identity))
+            except Exception:
+                res = None
+        if not isinstance(res, dict):
+            return dict(EMPTY_PROBE)
+        if res.get('logged_out'):
+            self.login_state.set(False)
+            self.identity = None
+        else:
+            self._learn_self_url(res.get('self_url'))
+        return {**EMPTY_PROBE, **res}
+
+    def post_in_group(self, group_url: str, message: str, timeout: float | None = None,
+                      probe: dict | None = None) -> PostOutcome:
+        """填写并发送，然后等待页面给出结果（而不是固定 sleep）"""
+        d = self.driver
+        if probe is None:
+            self.open_page(group_url)
+            probe = self.probe_page()
 
-        try:
-            btn.click()
-        except Exception:
+        ta = probe.get('textarea')
+        if not probe.get('has_textarea') or ta is None:
+            return PostOutcome.FAILED
+
+        if not probe.get('filled'):
+            with self.metrics.span("type"):
+                try:
+                    ta.clear()
+                except Exception:
+                    pass
+                ta.send_keys(message)
+
+        btn = probe.get('submit')
+        if btn is None:
+            return PostOutcome.FAILED
+
+        with self.metrics.span("click"):
             try:
-                d.execute_script('arguments[0].click();', btn)
+                btn.click()
             except Exception:
-                return False
-
-        time.sleep(wait_after_send)
-        return True
+                try:
+                    d.execute_script('arguments[0].click();', btn)
+                except Exception:
+                    return PostOutcome.FAILED
+
+        with self.metrics.span("confirm"):
+            return self.wait_post_result(ta, probe.get('self_count') or 0, timeout)
+
+    def wait_post_result(self, textarea, baseline: int, timeout: float | None = None) -> PostOutcome:
+        """timeout 为 None 时用 TimeoutPolicy 当前的 confirm 超时"""
+        if timeout is None:
+            timeout = self.timeouts.get('confirm')
+        t0 = time.perf_counter()
+        deadline = t0 + timeout
+        while True:
+            # 分段等待，每段之间检查取消；CONFIRM_JS 每次开头先检查一遍当前状态，分段不会漏结果
+            left = deadline - time.perf_counter()
+            outcome = self._wait_post_result(textarea, baseline, min(left, WAIT_SLICE))
+            if outcome != PostOutcome.TIMEOUT or self.token.cancelled or left <= WAIT_SLICE:
+                break
+        if not self.token.cancelled:
+            self.timeouts.observe('confirm', time.perf_counter() - t0, outcome == PostOutcome.TIMEOUT)
+        return outcome
 
-    def has_comment_box(self) -> bool:
+    def _wait_post_result(self, textarea, baseline: int, timeout: float) -> PostOutcome:
         d = self.driver
-        quick_js = r"""
-            const sels = [
-              'textarea.commentthread_textarea',
-              'textarea[id*="commentthread_"][id$="_textarea"]',
-              'textarea[name*="commentthread_"][name$="_textarea"]'
-            ];
-            for (const s of sels) { if (document.querySelector(s)) return true; }
-            return false;
-        """
         try:
-            return bool(d.execute_script(quick_js))
+            # 脚本超时沿用 POST_TIMEOUTS['script']，远大于这里的等待上限
+            res = d.execute_async_script(CONFIRM_JS, textarea, identity_js(self.identity), int(baseline),
+                                         int(max(0.1, timeout) * 1000))
         except Exception:
-            return False
+            res = None
+        if not isinstance(res, dict):
+            return PostOutcome.TIMEOUT
+        try:
+            outcome = PostOutcome(res.get('outcome'))
+        except ValueError:
+            return PostOutcome.TIMEOUT
+        if outcome in (PostOutcome.REJECTED, PostOutcome.RATE_LIMITED) and res.get('message'):
+            self.log(f"    [!] Steam: {res['message']}")
+        return outcome
+
+    def has_comment_box(self) -> bool:
+        return bool(self.probe_page().get('has_textarea'))
 
 
     def leave_group_if_possible(self) -> bool:
+        with self.metrics.span("leave"):
+            try:
+                return self._leave_group()
+            except Cancelled:
+                return False
+
+    def _leave_group(self) -> bool:
         from selenium.webdriver.common.by import By
-        from selenium.webdriver.support.ui import WebDriverWait
         from selenium.webdriver.support import expected_conditions as EC
-        import time
 
         d = self.driver
 
         link = None
         try:
-            link = WebDriverWait(d, 2.0).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href^="javascript:ConfirmLeaveGroup"]'))
+            t0 = time.perf_counter()
+            link = self.wait_until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, 'a[href^="javascript:ConfirmLeaveGroup"]')),
+                self.timeouts.get('selector'),
             )
+            # 只统计找到的情况：没有退出链接是正常结果，不该拉长超时
+            self.timeouts.observe('selector', time.perf_counter() - t0)
         except Exception:
             try:
                 link = d.execute_script("return document.querySelector('a[href^=\"javascript:ConfirmLeaveGroup\"]');")
@@ -207,10 +646,12 @@ class SteamPoster:
 
             if link:
                 try:
-                    WebDriverWait(d, 3.0).until(EC.alert_is_present())
+                    t0 = time.perf_counter()
+                    self.wait_until(EC.alert_is_present(), self.timeouts.get('alert'))
+                    self.timeouts.observe('alert', time.perf_counter() - t0)
                     alert = d.switch_to.alert
                     alert.accept()  
-                    time.sleep(0.8)
+                    self.sleep(0.8)
                     self.log('    [✓] 已提交退出（确认弹窗）。')
                     return True
                 except Exception:
@@ -222,7 +663,7 @@ class SteamPoster:
             if (f) { f.submit(); return true; } else { return false; }
             """)
             if ok:
-                time.sleep(0.8)
+                self.sleep(0.8)
                 self.log('    [✓] 已提交退出（表单兜底）。')
                 return True
         except Exception:
@@ -231,213 +672,135 @@ class SteamPoster:
         self.log('    [!] 未能触发退出操作。')
         return False
 
-    def join_groups_from_profile(self, profile_url: str, per_join_delay: float = 0.3) -> dict:
+    def leave_groups_batch(self, gids: list[str], interval: float = 0.3, poll: float = 0.5,
+                           on_progress=None, should_stop=None) -> dict:
+        """一次页内脚本按 groupID64 批量退群；每 poll 秒取一次进度，逐条回调 on_progress({gid, ok, status})。
+        should_stop() 返回 True 时通知页面脚本在下一个群之前停下。"""
         d = self.driver
-        self.log(f'[*] 打开对方主页：{profile_url}')
-
-        try:
-            orig_script_to = d.timeouts.script
-        except Exception:
-            orig_script_to = None
-        try:
-            orig_page_to = d.timeouts.page_load
-        except Exception:
-            orig_page_to = None
+        res = {'total': len(gids), 'ok': 0, 'fail': 0, 'left': [], 'failed': []}
+        if not gids:
+            return res
+        self._ensure_community_page()
+        profile = self.get_profile_url()
+        if not profile:
+            res['error'] = 'no_profile_url'
+            return res
         try:
-            d.set_script_timeout(300)
-        except Exception:
-            pass
-        try:
-            d.set_page_load_timeout(15)
-        except Exception:
-            pass
-
-        try:
-            try:
-                d.get(profile_url)
-            except Exception:
-                try:
-                    d.execute_script("window.stop();")
-                except Exception:
-                    pass
-
-            js = r"""
-            var done = arguments[0];
-            var delayMs = arguments[1] || 0;
-
-            (async () => {
-                const sleep = (ms) => new Promise(r => setTimeout(r, ms));
-
-                const getSessionID = () => {
-                    try { if (typeof g_sessionID !== 'undefined' && g_sessionID) return g_sessionID; } catch (e) {}
-                    try {
-                        const m = document.cookie.match(/(?:^|;\s*)sessionid=([^;]+)/i);
-                        if (m && m[1]) return decodeURIComponent(m[1]);
-                    } catch (e) {}
-                    return null;
-                };
-
-                const getSteamIdFromPage = async () => {
-                    let m = location.pathname.match(/\/profiles\/(\d{17})/);
-                    if (m) return m[1];
-                    m = location.pathname.match(/\/id\/([^\/]+)/);
-                    if (m) {
-                        const vanity = m[1];
-                        const resp = await fetch(`https://steamcommunity.com/id/${vanity}/?xml=1`, { credentials: 'include' });
-                        if (!resp.ok) throw new Error('获取 vanity 对应 steamID64 失败：HTTP ' + resp.status);
-                        const txt = await resp.text();
-                        const sid = (txt.match(/<steamID64>(\d{17})<\/steamID64>/) || [])[1];
-                        if (sid) return sid;
-                    }
-                    try { if (window.g_rgProfileData && g_rgProfileData.steamid) return g_rgProfileData.steamid; } catch (e) {}
-                    return null;
-                };
-
-                try {
-                    const sessionID = getSessionID();
-                    if (!sessionID) throw new Error('无法获取 sessionID（请确认已登录 steamcommunity.com）');
-
-                    const steamID = await getSteamIdFromPage();
-                    if (!steamID) throw new Error('无法确定对方 steamID（主页不可访问或未公开）');
-
-                    const xmlResp = await fetch(`https://steamcommunity.com/profiles/${steamID}/?xml=1`, { credentials: 'include' });
-                    if (!xmlResp.ok) throw new Error('获取群组列表失败：HTTP ' + xmlResp.status);
-                    const xmlText = await xmlResp.text();
-                    const parser = new DOMParser();
-                    const xmlDoc = parser.parseFromString(xmlText, 'text/xml');
-                    const gids = Array.from(xmlDoc.querySelectorAll('groupID64'))
-                                      .map(n => (n.textContent || '').trim())
-                                      .filter(Boolean);
-
-                    let ok = 0, fail = 0;
-                    const joined = [], failed = [];
-
-                    for (const gid of gids) {
-                        try {
-                            const resp = await fetch(`https://steamcommunity.com/gid/${gid}`, {
-                                method: 'POST',
-                                credentials: 'include',
-                                headers: { 'Content-Type': 'application/x-www-form-urlencoded; charset=UTF-8' },
-                                body: new URLSearchParams({ action: 'join', sessionID })
-                            });
-                            if (resp.ok) { ok++; joined.push(gid); }
-                            else { fail++; failed.push(gid); }
-                        } catch (e) { fail++; failed.push(gid); }
-                        if (delayMs > 0) await sleep(delayMs);
-                    }
-
-                    return { total: gids.length, ok, fail, joined, failed };
-                } catch (err) {
-                    return { error: String(err) };
-                }
-            })().then(done).catch(e => done({ error: String(e) }));
-            """
-            res = d.execute_async_script(js, int(max(0.0, per_join_delay) * 1000))
-            if isinstance(res, dict):
-                if res.get('error'):
-                    self.log(f"[!] 添加组失败：{res['error']}")
-                else:
-                    self.log(f"[✓] 加入完成：共 {res.get('total',0)}，成功 {res.get('ok',0)}，失败 {res.get('fail',0)}")
-                return res
+            d.execute_script(LEAVE_BATCH_JS, list(gids), int(max(0.0, interval) * 1000), profile)
+        except Exception as e:
+            res['error'] = repr(e)
+            return res
+
+        seen = 0
+
+        def on_state(st: dict):
+            nonlocal seen
+            for r in (st.get('results') or [])[seen:]:
+                seen += 1
+                key = 'left' if r.get('ok') else 'failed'
+                res[key].append(r.get('gid'))
+                res['ok' if r.get('ok') else 'fail'] += 1
+                if on_progress is not None:
+                    on_progress(r)
+
+        with self.metrics.span("leave_batch"):
+            st, aborted, err = self._poll_page_task('__sepLeave', poll, should_stop=should_stop,
+                                                    on_state=on_state)
+        if err:
+            res['error'] = err
+        elif st.get('error'):
+            res['error'] = st['error']
+        elif not st.get('finished'):
+            res['error'] = aborted
+        return res
+
+    def _poll_page_task(self, var: str, poll: float, deadline: float | None = None,
+                        should_stop=None, on_state=None) -> tuple[dict | None, str | None, str | None]:
+        """轮询页内后台脚本写在 window[var] 的进度，直到 finished；每次取到都交给 on_state(st)。
+        取消、should_stop() 为真或过了 deadline 时置 abort，之后最多再等 ABORT_GRACE 秒。
+        返回 (最后一次进度, 中断原因 'cancelled'/'stopped'/'timeout' 或 None, 轮询本身的错误或 None)"""
+        d = self.driver
+        st, aborted, grace_end = None, None, 0.0
+        while True:
+            if aborted:
+                time.sleep(WAIT_POLL)
             else:
-                self.log("[!] 未返回有效结果。")
-                return {"error": "no_result"}
-
+                self.sleep(poll)
+            if aborted is None:
+                if self.token.cancelled:
+                    aborted = 'cancelled'
+                elif should_stop is not None and should_stop():
+                    aborted = 'stopped'
+                elif deadline is not None and time.perf_counter() > deadline:
+                    aborted = 'timeout'
+                if aborted:
+                    grace_end = time.perf_counter() + ABORT_GRACE
+                    try:
+                        d.execute_script(f"if (window.{var}) window.{var}.abort = true;")
+                    except Exception:
+                        pass
+            try:
+                cur = d.execute_script(f"return window.{var} || null;")
+            except Exception as e:
+                return st, aborted, repr(e)
+            if not isinstance(cur, dict):
+                return st, aborted, 'page_changed'
+            st = cur
+            if on_state is not None:
+                on_state(st)
+            if st.get('finished') or (aborted and time.perf_counter() > grace_end):
+                return st, aborted, None
+
+    def join_groups_from_profile(self, profile_url: str, per_join_delay: float = 0.3,
+                                 poll: float = 0.5) -> dict:
+        """页内脚本后台逐个加入，进度写在 window.__sepJoin；取消时置 abort，页面在下一个群之前停下"""
+        d = self.driver
+        self.log(f'[*] 打开对方主页：{profile_url}')
+        try:
+            self.open_page(profile_url)
+            if self.token.cancelled:
+                return {"error": "cancelled"}
+            d.execute_script(JOIN_JS, int(max(0.0, per_join_delay) * 1000), ENDPOINTS.community)
         except Exception as e:
             self.log(f"[!] 执行脚本异常: {e!r}")
             return {"error": repr(e)}
 
-        finally:
-            try:
-                if orig_script_to is not None:
-                    d.set_script_timeout(orig_script_to.total_seconds() if hasattr(orig_script_to, 'total_seconds') else int(orig_script_to))
-                else:
-                    d.set_script_timeout(30)
-            except Exception:
-                pass
-            try:
-                if orig_page_to is not None:
-                    d.set_page_load_timeout(orig_page_to.total_seconds() if hasattr(orig_page_to, 'total_seconds') else int(orig_page_to))
-                else:
-                    d.set_page_load_timeout(10)
-            except Exception:
-                pass
+        st, aborted, err = self._poll_page_task('__sepJoin', poll,
+                                                deadline=time.perf_counter() + JOIN_TIMEOUTS['script'])
+        if err:
+            self.log(f"[!] 执行脚本异常: {err}")
+            return {"error": err}
+        if st.get('error'):
+            self.log(f"[!] 添加组失败：{st['error']}")
+            return {"error": st['error']}
+        res = {k: st.get(k) for k in ('total', 'ok', 'fail', 'joined', 'failed')}
+        if aborted:
+            res['error'] = aborted
+        self.log(f"[✓] 加入完成：共 {res.get('total',0)}，成功 {res.get('ok',0)}，失败 {res.get('fail',0)}")
+        return res
 
     def get_profile_url(self) -> str | None:
-        d = self.driver
-        js = r"""
-        const normalize = (u) => {
-          try {
-            const url = new URL(u);
-            let path = url.pathname.replace(/\/+$|\/+(?=\?)/g, '');
-            return url.origin + path;
-          } catch (e) { return u; }
-        };
-        let selectors = [
-          '#global_action_menu a[href*="/profiles/"]',
-          '#global_action_menu a[href*="/id/"]',
-          'a.menuitem[href*="/profiles/"]',
-          'a.menuitem[href*="/id/"]',
-          '.user_avatar a[href*="/profiles/"]',
-          '.user_avatar a[href*="/id/"]'
-        ];
-        let link = null;
-        for (const s of selectors) {
-          const elem = document.querySelector(s);
-          if (elem && elem.href) { link = elem.href; break; }
-        }
-        if (!link) {
-          try {
-            if (typeof g_rgProfileData !== 'undefined' && g_rgProfileData.url) link = g_rgProfileData.url;
-          } catch (e) {}
-        }
-        return link ? normalize(link.split('?')[0]) : null;
-        """
-        try:
-            return d.execute_script(js)
-        except Exception:
+        ident = self.self_identity()
+        if not ident:
             return None
+        if not ident.get('url'):
+            try:
+                self._learn_self_url(self.driver.execute_script(SELF_URL_JS + "return findSelfUrl();"))
+            except Exception:
+                pass
+        return self.identity.get('url') or (
+            ENDPOINTS.community_url(f"/profiles/{ident['steamid']}") if ident.get('steamid') else None)
 
     def has_self_comment(self) -> bool:
-        d = self.driver
-        js = r"""
-        const normalize = (u) => {
-          try {
-            const url = new URL(u);
-            let path = url.pathname.replace(/\/+$|\/+(?=\?)/g, '');
-            return url.origin + path;
-          } catch (e) { return u; }
-        };
-        let selectors = [
-          '#global_action_menu a[href*="/profiles/"]',
-          '#global_action_menu a[href*="/id/"]',
-          'a.menuitem[href*="/profiles/"]',
-          'a.menuitem[href*="/id/"]',
-          '.user_avatar a[href*="/profiles/"]',
-          '.user_avatar a[href*="/id/"]'
-        ];
-        let link = null;
-        for (const s of selectors) {
-          const elem = document.querySelector(s);
-          if (elem && elem.href) { link = elem.href; break; }
-        }
-        if (!link) {
-          try {
-            if (typeof g_rgProfileData !== 'undefined' && g_rgProfileData.url) link = g_rgProfileData.url;
-          } catch (e) {}
-        }
-        if (!link) return false;
-        const selfUrl = normalize(link.split('?')[0]);
-        const authorLinks = Array.from(
-          document.querySelectorAll('.commentthread_comment_author a[href]')
-        ).map(a => a.href).filter(Boolean);
-        for (const href of authorLinks) {
-          if (normalize(href.split('?')[0]) === selfUrl) return true;
-        }
-        return false;
-        """
-        try:
-            return bool(d.execute_script(js))
-        except Exception:
+        """只查作者链接；已经调过 probe_page 的直接用它的 self_comment"""
+        if self.identity is None:
+            self.identity = make_identity(None, login_steamid(self.driver))
+        with self.metrics.span("self_comment"):
+            try:
+                res = self.driver.execute_script(SELF_COMMENT_JS, identity_js(self.identity))
+            except Exception:
+                return False
+        if not isinstance(res, dict):
             return False
-
+        self._learn_self_url(res.get('self_url'))
+        return bool(res.get('self_count'))
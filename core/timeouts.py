@@ -0,0 +1,60 @@
+﻿# core/timeouts.py
+# -*- coding: utf-8 -*-
+"""按实际耗时自适应的超时：每类操作保留最近 WINDOW 次耗时，超时取 p95 × MARGIN 并限制在上下界内。
+样本不足 MIN_SAMPLES 时用初始值；超时未完成的操作按当时的超时值计入（偏保守，连续超时会逐步放宽）。"""
+import threading
+from collections import deque
+
+WINDOW = 50
+MIN_SAMPLES = 8
+MARGIN = 1.5
+
+# 操作 -> (初始值, 下界, 上界)，单位秒
+LIMITS = {
+    'page_load': (12.0, 5.0, 30.0),   # driver.get
+    'confirm': (10.0, 4.0, 20.0),     # 点击发送后等页面给出结果
+    'selector': (2.5, 1.0, 6.0),      # 等待页面元素出现
+    'alert': (3.0, 1.0, 6.0),         # 等待确认弹窗
+}
+
+class TimeoutPolicy:
+    """线程安全；get() 取当前超时，observe() 回报一次实际耗时"""
+
+    def __init__(self, limits: dict[str, tuple[float, float, float]] | None = None,
+                 window: int = WINDOW, margin: float = MARGIN):
+        self.limits = dict(LIMITS if limits is None else limits)
+        self.margin = margin
+        self._lock = threading.Lock()
+        self._samples = {op: deque(maxlen=window) for op in self.limits}
+        self._current = {op: lim[0] for op, lim in self.limits.items()}
+
+    def get(self, op: str) -> float:
+        return self._current[op]
+
+    def observe(self, op: str, sec: float, timed_out: bool = False):
+        """timed_out=True 表示没等到结果，真实耗时至少是当时的超时值"""
+        with self._lock:
+            init, lo, hi = self.limits[op]
+            s = self._samples[op]
+            s.append(max(sec, self._current[op]) if timed_out else sec)
+            if len(s) < MIN_SAMPLES:
+                return
+            self._current[op] = round(min(hi, max(lo, _p95(s) * self.margin)), 2)
+
+    def p95(self, op: str) -> float | None:
+        with self._lock:
+            s = self._samples[op]
+            return _p95(s) if s else None
+
+    def snapshot(self) -> dict[str, dict]:
+        """{op: {'timeout', 'p95', 'samples'}}，供耗时统计导出"""
+        out = {}
+        for op in self.limits:
+            p = self.p95(op)
+            out[op] = {'timeout': self._current[op], 'p95': round(p, 3) if p is not None else None,
+                       'samples': len(self._samples[op])}
+        return out
+
+def _p95(samples) -> float:
+    s = sorted(samples)
+    return s[min(len(s) - 1, int(0.95 * len(s)))]
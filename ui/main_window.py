@@ -1,27 +1,27 @@
 ﻿# ui/main_window.py
 # -*- coding: utf-8 -*-
-import time
-import threading
 import webbrowser
 import subprocess
 from pathlib import Path
-from utils.paths import LOW_FILE
 from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtCore import QSettings
 
-from core.steam_poster import SteamPoster
+from core.engine import Engine, JobConfig, PREWARM_JOB
+from core.jobs import EV_JOB_STATE, JOB_FINAL
 from widgets.logger import UiLogger
 from widgets.card import Card
 from ui.styles import apply_modern_style, fade_in
 
-from utils.paths import APP_DIR, GROUPS_FILE, PROFILE_DIR, app_path, POST_WL_FILE, DEL_WL_FILE
-from utils.browser import launch_official_chrome_login, fmt_duration
-from utils.whitelist import load_list, normalize_url
+from utils.paths import APP_DIR, GROUPS_FILE, PROFILE_DIR, LOG_FILE, app_path, POST_WL_FILE, DEL_WL_FILE
+from utils.browser import launch_official_chrome_login
+from utils.endpoints import ENDPOINTS
 from utils.i18n import Lang, tr
 
 STEAM_AUTHOR_URL = "https://steamcommunity.com/id/wuyan1337/"
 
 class MainWindow(QtWidgets.QWidget):
+    job_event = QtCore.pyqtSignal(str, dict)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle('SteamEchoPost')
@@ -91,6 +91,25 @@ class MainWindow(QtWidgets.QWidget):
         # 连接勾选事件
         self.smart_mode_cb.stateChanged.connect(self.on_smart_mode_toggled)
 
+        # 精简浏览器：屏蔽图片/媒体/字体，下次启动浏览器时生效
+        self.lean_cb = QtWidgets.QCheckBox()
+        saved_lean = self.settings.value("lean_browser", "1")
+        try:
+            self.lean_cb.setChecked(bool(int(saved_lean)))
+        except Exception:
+            self.lean_cb.setChecked(True)
+        self.lean_cb.stateChanged.connect(self.on_lean_toggled)
+
+        # 窗口显示后在后台启动浏览器，第一次点按钮不用等 Chrome 冷启动
+        self.prewarm_cb = QtWidgets.QCheckBox()
+        saved_prewarm = self.settings.value("prewarm_browser", "1")
+        try:
+            self.prewarm_cb.setChecked(bool(int(saved_prewarm)))
+        except Exception:
+            self.prewarm_cb.setChecked(True)
+        self.prewarm_cb.stateChanged.connect(self.on_prewarm_toggled)
+        self._prewarm_pending = True
+
 
         self.groups_path = QtWidgets.QLineEdit(str(GROUPS_FILE))
         self.pick_btn = QtWidgets.QPushButton()
@@ -102,7 +121,7 @@ class MainWindow(QtWidgets.QWidget):
 
         self.log_view = QtWidgets.QPlainTextEdit()
         self.log_view.setReadOnly(True)
-        self.logger = UiLogger(self.log_view)
+        self.logger = UiLogger(self.log_view, log_file=LOG_FILE)
 
         hdr_row = QtWidgets.QHBoxLayout()
         hdr_row.addWidget(self.lang_label)
@@ -121,6 +140,8 @@ class MainWindow(QtWidgets.QWidget):
         form.addRow(self.lbl_delay, self.delay)
         form.addRow(self.smart_mode_cb)
         form.addRow(self.low_activity_cb)
+        form.addRow(self.lean_cb)
+        form.addRow(self.prewarm_cb)
 
         path_row = QtWidgets.QHBoxLayout()
         path_row.addWidget(self.groups_path)
@@ -139,10 +160,12 @@ class MainWindow(QtWidgets.QWidget):
         self.start_btn = QtWidgets.QPushButton()
         self.stop_btn = QtWidgets.QPushButton()
         self.stop_btn.setEnabled(False)
+        self.resume_btn = QtWidgets.QPushButton()
 
         btn_row = QtWidgets.QHBoxLayout()
         btn_row.addWidget(self.fetch_btn)
         btn_row.addWidget(self.start_btn)
+        btn_row.addWidget(self.resume_btn)
         btn_row.addWidget(self.stop_btn)
         btn_row.addWidget(self.leave_btn)
         btn_row.addWidget(self.exit_low_btn)
@@ -171,9 +194,9 @@ class MainWindow(QtWidgets.QWidget):
         body.addWidget(self.log_view, 1)
     
 
-        self.poster: SteamPoster | None = None
-        self.worker_thread: threading.Thread | None = None
-        self._stop_flag = threading.Event()
+        self.engine = Engine(log_emit=self.log, on_event=self.job_event.emit,
+                             headless=True, lean=self.lean_cb.isChecked(), lang=self.lang)
+        self.job_event.connect(self.on_job_event)
 
         self.lang_combo.currentIndexChanged.connect(self.on_lang_changed)
 
@@ -184,6 +207,7 @@ class MainWindow(QtWidgets.QWidget):
         self.pick_btn.clicked.connect(self.pick_groups)
         self.fetch_btn.clicked.connect(self.do_fetch)
         self.start_btn.clicked.connect(self.do_start)
+        self.resume_btn.clicked.connect(self.do_resume)
         self.stop_btn.clicked.connect(self.do_stop)
         self.leave_btn.clicked.connect(self.leave_no_comment_groups)
 
@@ -201,13 +225,7 @@ class MainWindow(QtWidgets.QWidget):
 
     # ---------- helpers ----------
     def log(self, s: str):
-        self.logger.message.emit(s)
-
-    def ensure_poster(self) -> SteamPoster:
-        if self.poster is None:
-            # 传入 self.lang
-            self.poster = SteamPoster(log_emit=self.log, headless=True, lang=self.lang)
-        return self.poster
+        self.logger.write(s)
 
     def on_lang_changed(self):
         data = self.lang_combo.currentData()
@@ -217,6 +235,7 @@ class MainWindow(QtWidgets.QWidget):
             self.lang = Lang.EN
         self.settings.setValue("lang", self.lang.value)
         self.apply_texts()
+        self.logger.discard_pending()
         self.log_view.clear()
 
         self.log(f"[i] {tr(self.lang, 'lang_switched', name=(tr(self.lang, 'lang_cn') if self.lang == Lang.ZH else tr(self.lang, 'lang_en')))}")
@@ -256,6 +275,7 @@ class MainWindow(QtWidgets.QWidget):
         self.fetch_btn.setText(tr(self.lang, "fetch"))
         self.start_btn.setText(tr(self.lang, "start"))
         self.stop_btn.setText(tr(self.lang, "stop"))
+        self.resume_btn.setText(tr(self.lang, "resume"))
         self.leave_btn.setText(tr(self.lang, "leave_scan"))
         self.post_wl_btn.setText(tr(self.lang, "post_wl_label"))
         self.del_wl_btn.setText(tr(self.lang, "del_wl_label"))
@@ -263,6 +283,8 @@ class MainWindow(QtWidgets.QWidget):
         # 更新智能模式复选框文本
         self.smart_mode_cb.setText(tr(self.lang, "smart_mode_label"))
         self.low_activity_cb.setText(tr(self.lang, "low_activity_label"))
+        self.lean_cb.setText(tr(self.lang, "lean_browser_label"))
+        self.prewarm_cb.setText(tr(self.lang, "prewarm_label"))
         self.exit_low_btn.setText(tr(self.lang, "exit_low_activity"))
 
 
@@ -298,163 +320,68 @@ class MainWindow(QtWidgets.QWidget):
         if p:
             self.groups_path.setText(p)
 
-    def do_fetch(self):
-        def run():
-            try:
-                # 日志：开始抓取群组
-                self.log(tr(self.lang, "fetch_start"))
-                poster = self.ensure_poster()
-                # 登录检测
-                if not poster.ensure_logged():
-                    self.log(tr(self.lang, "need_login"))
-                    return
-
-                out = Path(self.groups_path.text())
-                out.parent.mkdir(parents=True, exist_ok=True)
+    def job_config(self, **kw) -> JobConfig:
+        cfg = JobConfig(
+            message=self.msg.toPlainText(),
+            groups_path=Path(self.groups_path.text()),
+            post_wl_path=Path(self.post_wl_path.text()),
+            del_wl_path=Path(self.del_wl_path.text()),
+            delay=float(self.delay.value()),
+            smart_mode=self.smart_mode_cb.isChecked(),
+            low_activity=self.low_activity_cb.isChecked(),
+            lang=self.lang,
+        )
+        for k, v in kw.items():
+            setattr(cfg, k, v)
+        return cfg
+
+    def run_job(self, name: str, fn, *args, **kwargs):
+        # 排在预启动后面不算排队：反正都要等浏览器
+        busy = any(j.name != PREWARM_JOB for j in self.engine.jobs.jobs())
+        job = self.engine.submit(name, fn, *args, **kwargs)
+        if busy:
+            self.log(tr(self.lang, "job_queued", n=len(self.engine.jobs.jobs()) - 1))
+        return job
+
+    def on_job_event(self, name: str, data: dict):
+        # 经 job_event 信号投递，已经在 GUI 线程里
+        if name == EV_JOB_STATE:
+            busy = data["running"] or data["pending"] > 0 or data["status"] not in JOB_FINAL
+            if data["job"] == PREWARM_JOB and data["pending"] == 0:
+                # 只有预启动在跑时按钮照常可点，点了就排在它后面
+                busy = False
+            self.stop_btn.setEnabled(busy)
+            self.start_btn.setEnabled(not busy)
+            self.resume_btn.setEnabled(not busy)
+
+    def showEvent(self, e):
+        super().showEvent(e)
+        if self._prewarm_pending:
+            self._prewarm_pending = False
+            if self.prewarm_cb.isChecked():
+                # 等窗口先画出来再排任务
+                QtCore.QTimer.singleShot(0, self.engine.prewarm)
+
+    def closeEvent(self, e):
+        self.engine.stop()
+        self.engine.close()
+        super().closeEvent(e)
 
-                # 实际抓取
-                n = poster.fetch_groups(out)
+    def do_fetch(self):
+        self.run_job("fetch", self.engine.fetch, self.job_config())
 
-            except Exception as e:
-                # 日志：抓取异常
-                self.log(tr(self.lang, "fetch_error", err=e))
-        threading.Thread(target=run, daemon=True).start()
+    def do_start(self):
+        self.start_posting(resume=False)
 
+    def do_resume(self):
+        self.start_posting(resume=True)
 
-    def do_start(self):
-        message = self.msg.toPlainText().strip()
-        if not message:
+    def start_posting(self, resume: bool = False):
+        cfg = self.job_config(resume=resume)
+        if not cfg.message.strip():
             self.log(f"[!] {tr(self.lang, 'send_empty')}")
             return
-        path = Path(self.groups_path.text())
-        if not path.exists():
-            self.log(f"[!] {tr(self.lang, 'groups_missing')}")
-            return
-
-        raw = path.read_text(encoding='utf-8')
-        lines = [ln.strip() for ln in raw.splitlines() if ln.strip() and not ln.strip().startswith('#')]
-        if not lines and raw.count("https://") > 1:
-            parts = raw.split("https://")
-            for p in parts:
-                p = p.strip()
-                if p:
-                    lines.append("https://" + p)
-
-        links = lines
-        if not links:
-            self.log(f"[!] {tr(self.lang, 'groups_empty')}")
-            return
-
-        self._stop_flag.clear()
-        self.stop_btn.setEnabled(True)
-        self.start_btn.setEnabled(False)
-
-        delay = float(self.delay.value())
-        send_wait = max(0.8, delay)
-        per_group = send_wait + delay
-        total_eta = per_group * len(links)
-        self.log(f"[i] {tr(self.lang, 'to_send_count', n=len(links))}")
-        self.log(f"[i] {tr(self.lang, 'per_group_delay', delay=delay, wait=send_wait)}")
-        self.log(f"[i] {tr(self.lang, 'send_eta', eta=fmt_duration(total_eta), sec=total_eta)}")
-
-        def run():
-            t0 = time.time()
-            try:
-                self.log(f"[*] {tr(self.lang, 'start_thread')}")
-
-                poster = self.ensure_poster()
-                try:
-                    poster.driver.set_script_timeout(60)
-                except Exception:
-                    pass
-                try:
-                    poster.driver.set_page_load_timeout(12)
-                except Exception:
-                    pass
-                try:
-                    if not poster.ensure_logged():
-                        self.log(f"[!] {tr(self.lang, 'need_login')}")
-                        return
-                except Exception as e:
-                    self.log(tr(self.lang, "login_check_error", err=e))
-
-                total = len(links)
-                sent = 0
-
-                post_wl = load_list(self.post_wl_path.text())
-                self.log(tr(self.lang, "post_wl_loaded", n=len(post_wl)))
-
-                if self.low_activity_cb.isChecked():
-                    try:
-                        with open(LOW_FILE, "w", encoding="utf-8"):
-                            pass  
-                    except Exception as err:
-                        self.log(f"[!] 无法清空 low.txt: {err!r}")
-
-                for i, url in enumerate(links, 1):
-                    if self._stop_flag.is_set():
-                        self.log(tr(self.lang, "stopped"))
-                        break
-
-                    if normalize_url(url) in post_wl:
-                        self.log(tr(self.lang, "post_wl_skip", i=i, total=total, url=url))
-                        continue
-
-                    self.log(tr(self.lang, "open_group", i=i, total=total, url=url))
-
-                    ok = False
-                    try:
-                        if self.smart_mode_cb.isChecked():
-                            try:
-                                poster.driver.get(url)
-                            except Exception:
-                                try:
-                                    poster.driver.execute_script("window.stop();")
-                                except Exception:
-                                    pass
-
-                            try:
-                                if poster.has_self_comment():
-                                    if self.low_activity_cb.isChecked():
-                                        try:
-                                            with open(LOW_FILE, "a", encoding="utf-8") as f:
-                                                f.write(url + "\n")
-                                            self.log(tr(self.lang, "low_saved", url=url))
-                                        except Exception as e_low:
-                                            self.log(f"[!] 写入 low.txt 失败: {e_low!r}")
-                                    self.log(tr(self.lang, "skip_existing_comment", i=i, total=total, url=url))
-                                    continue  
-                            except Exception as e:
-                                self.log(f'    [!] 自检留言异常：{e!r}')
-
-                        ok = poster.post_in_group(url, message, wait_after_send=send_wait)
-                    except Exception as e:
-                        self.log(f'    [!] 发送异常：{e!r}')
-
-                    if ok:
-                        self.log(tr(self.lang, "sent_ok"))
-                        sent += 1
-                    else:
-                        self.log(tr(self.lang, "sent_skip"))
-
-                    if ok:
-                        time.sleep(max(0.0, delay))
-                    else:
-                        time.sleep(min(0.2, delay * 0.25))
-
-                self.log(f"[✓] {tr(self.lang, 'done', ok=sent, total=total)}")
-
-            except Exception as e:
-                self.log(f'[!] 发送过程中异常: {e!r}')
-            finally:
-                elapsed = time.time() - t0
-                self.log(f"[i] {tr(self.lang, 'time_real', fmt=fmt_duration(elapsed), sec=elapsed)}")
-                self.stop_btn.setEnabled(False)
-                self.start_btn.setEnabled(True)
-
-
-        self.worker_thread = threading.Thread(target=run, daemon=True)
-        self.worker_thread.start()
+        self.run_job("post", self.engine.post, cfg)
 
     def leave_no_comment_groups(self):
    
@@ -470,84 +397,10 @@ class MainWindow(QtWidgets.QWidget):
             self.log("[i] 已取消退出扫描。" if self.lang == Lang.ZH else "[i] Leave scan canceled.")
             return
 
-        path = Path(self.groups_path.text())
-        if not path.exists():
-            self.log(f"[!] {tr(self.lang, 'groups_missing')}")
-            return
-        raw = path.read_text(encoding='utf-8', errors='ignore')
-        links = [ln.strip() for ln in raw.splitlines() if ln.strip() and not ln.strip().startswith('#')]
-        if not links:
-            self.log(f"[!] {tr(self.lang, 'groups_empty')}")
-            return
-
-        self._stop_flag.clear()
-        self.stop_btn.setEnabled(True)
-
-        def run():
-            try:
-                poster = self.ensure_poster()
-                if not poster.ensure_logged():
-                    self.log(f"[!] {tr(self.lang, 'need_login')}")
-                    return
-
-                total = len(links)
-                left_count = 0
-                skipped = 0
-
-                del_wl = load_list(self.del_wl_path.text())
-
-                self.log(''.join([
-                    '[*] 开始扫描 ', str(total), ' 个群组，自动退出无权限组…'
-                ]) if self.lang == Lang.ZH else f"[*] Scanning {total} groups, leaving no-permission ones…")
-
-                for i, url in enumerate(links, 1):
-                    if self._stop_flag.is_set():
-                        self.log('[*] 已停止。' if self.lang == Lang.ZH else "[*] Stopped.")
-                        break
-
-                    try:
-                        poster.driver.get(url)
-                    except Exception:
-                        try:
-                            poster.driver.execute_script("window.stop();")
-                        except Exception:
-                            pass
-
-                    try:
-                        if poster.has_comment_box():
-                            self.log(f'[{i}/{total}] 有留言权限，跳过：{url}' if self.lang == Lang.ZH
-                                     else f'[{i}/{total}] Has comment permission, skip: {url}')
-                            skipped += 1
-                            continue
-                    except Exception:
-                        pass
-
-                    if normalize_url(url) in del_wl:
-                        self.log(f'[{i}/{total}] 删除白名单保护，不退出：{url}' if self.lang == Lang.ZH
-                                 else f'[{i}/{total}] Protected by Leave Whitelist, skip: {url}')
-                        skipped += 1
-                        continue
-
-                    self.log(f'[{i}/{total}] 无留言权限，尝试退出：{url}' if self.lang == Lang.ZH
-                             else f'[{i}/{total}] No permission, try leaving: {url}')
-                    ok = poster.leave_group_if_possible()
-                    if ok:
-                        left_count += 1
-
-                    time.sleep(0.3)
-
-                self.log(f'[✓] 扫描完成。退出 {left_count} 个；保留/跳过 {skipped} 个。'
-                         if self.lang == Lang.ZH
-                         else f'[✓] Scan complete. Left {left_count}; kept/skipped {skipped}.')
-            except Exception as e:
-                self.log(f'[!] 退出扫描异常: {e!r}' if self.lang == Lang.ZH else f'[!] Leave scan error: {e!r}')
-            finally:
-                self.stop_btn.setEnabled(False)
-
-        threading.Thread(target=run, daemon=True).start()
+        self.run_job("leave_scan", self.engine.leave_no_comment, self.job_config())
 
     def do_stop(self):
-        self._stop_flag.set()
+        self.engine.stop()
 
     def open_post_whitelist(self):
         path = Path(self.post_wl_path.text())
@@ -591,7 +444,7 @@ class MainWindow(QtWidgets.QWidget):
             "粘贴对方主页链接，例如：https://steamcommunity.com/id/xxxx 或 /profiles/xxxxxxxxxxxxxxx" if self.lang == Lang.ZH
             else "Paste profile URL, e.g. https://steamcommunity.com/id/xxxx or /profiles/xxxxxxxxxxxxxxx"
         )
-        url_edit.setText("https://steamcommunity.com/id/")
+        url_edit.setText(ENDPOINTS.community_url("/id/"))
 
         delay_sb = QtWidgets.QDoubleSpinBox(dlg)
         delay_sb.setRange(0.0, 3.0)
@@ -618,54 +471,64 @@ class MainWindow(QtWidgets.QWidget):
 
         def _do_join():
             url = url_edit.text().strip()
-            if not url or "steamcommunity.com" not in url:
+            if not url or not ENDPOINTS.is_community(url):
                 status_lbl.setText("请填写正确的 Steam 主页链接。" if self.lang == Lang.ZH else "Please enter a valid Steam profile URL.")
                 return
 
             start_btn.setEnabled(False)
             status_lbl.setText("准备中…" if self.lang == Lang.ZH else "Preparing…")
             self.log(f"[*] 添加组：{url}" if self.lang == Lang.ZH else f"[*] Add groups: {url}")
+            cfg = self.job_config()
+            per_join_delay = float(delay_sb.value())
 
-            def worker():
-                try:
-                    poster = self.ensure_poster()
-                    if not poster.ensure_logged():
-                        msg = '未登录，请先在主窗口点击「登录Steam」' if self.lang == Lang.ZH else 'Not logged in. Please click "Login Steam" in main window first.'
-                        self.log(f"[!] {tr(self.lang, 'need_login')}")
-                        QtCore.QMetaObject.invokeMethod(status_lbl, "setText",
-                            QtCore.Qt.ConnectionType.QueuedConnection, QtCore.Q_ARG(str, msg))
-                        QtCore.QMetaObject.invokeMethod(start_btn, "setEnabled",
-                            QtCore.Qt.ConnectionType.QueuedConnection, QtCore.Q_ARG(bool, True))
-                        return
-
-                    res = poster.join_groups_from_profile(url, per_join_delay=float(delay_sb.value()))
-                    if res.get("error"):
-                        msg = ("失败：" if self.lang == Lang.ZH else "Failed: ") + res["error"]
-                    else:
-                        msg = ("完成：共 {t}，成功 {o}，失败 {f}".format(
-                                t=res.get('total',0), o=res.get('ok',0), f=res.get('fail',0))
-                               if self.lang == Lang.ZH else
-                               "Done: total {t}, ok {o}, fail {f}".format(
-                                t=res.get('total',0), o=res.get('ok',0), f=res.get('fail',0)))
-
-                    QtCore.QMetaObject.invokeMethod(status_lbl, "setText",
-                        QtCore.Qt.ConnectionType.QueuedConnection, QtCore.Q_ARG(str, msg))
-                    self.log(f"[i] 添加组结果：{msg}" if self.lang == Lang.ZH else f"[i] Add groups result: {msg}")
-
-                except Exception as e:
-                    txt = f"异常：{e!r}" if self.lang == Lang.ZH else f"Error: {e!r}"
-                    self.log(f"[!] 添加组异常：{e!r}" if self.lang == Lang.ZH else f"[!] Add groups error: {e!r}")
-                    QtCore.QMetaObject.invokeMethod(status_lbl, "setText",
-                        QtCore.Qt.ConnectionType.QueuedConnection, QtCore.Q_ARG(str, txt))
-                finally:
-                    QtCore.QMetaObject.invokeMethod(start_btn, "setEnabled",
-                        QtCore.Qt.ConnectionType.QueuedConnection, QtCore.Q_ARG(bool, True))
-
-            threading.Thread(target=worker, daemon=True).start()
+            queued = self.engine.jobs.busy
+            join_job["id"] = self.run_job("join", self.engine.join_from_profile, cfg, url,
+                                          per_join_delay=per_join_delay).id
+            if queued:
+                status_lbl.setText("排队中…" if self.lang == Lang.ZH else "Queued…")
+
+        join_job = {"id": None}
+
+        def _on_join_state(name: str, data: dict):
+            # job_event 信号在 GUI 线程里触发，可以直接改控件
+            if name != EV_JOB_STATE or data["id"] != join_job["id"] or data["status"] not in JOB_FINAL:
+                return
+            join_job["id"] = None
+            start_btn.setEnabled(True)
+            res = data["result"] or {}
+            if data["error"]:
+                status_lbl.setText(f"异常：{data['error']}" if self.lang == Lang.ZH else f"Error: {data['error']}")
+                self.log(f"[!] 添加组异常：{data['error']}" if self.lang == Lang.ZH else f"[!] Add groups error: {data['error']}")
+                return
+            if res.get("error") == "not_logged_in":
+                msg = '未登录，请先在主窗口点击「登录Steam」' if self.lang == Lang.ZH else 'Not logged in. Please click "Login Steam" in main window first.'
+                status_lbl.setText(msg)
+                return
 
+            if res.get("error"):
+                msg = ("失败：" if self.lang == Lang.ZH else "Failed: ") + res["error"]
+            else:
+                msg = ("完成：共 {t}，成功 {o}，失败 {f}".format(
+                        t=res.get('total',0), o=res.get('ok',0), f=res.get('fail',0))
+                       if self.lang == Lang.ZH else
+                       "Done: total {t}, ok {o}, fail {f}".format(
+                        t=res.get('total',0), o=res.get('ok',0), f=res.get('fail',0)))
+            status_lbl.setText(msg)
+            self.log(f"[i] 添加组结果：{msg}" if self.lang == Lang.ZH else f"[i] Add groups result: {msg}")
+
+        self.job_event.connect(_on_join_state)
         start_btn.clicked.connect(_do_join)
         close_btn.clicked.connect(dlg.close)
         dlg.exec()
+        self.job_event.disconnect(_on_join_state)
+
+    def on_lean_toggled(self, state):
+        enabled = bool(state)
+        self.settings.setValue("lean_browser", 1 if enabled else 0)
+        self.engine.lean = enabled
+
+    def on_prewarm_toggled(self, state):
+        self.settings.setValue("prewarm_browser", 1 if state else 0)
 
     def on_smart_mode_toggled(self, state):
         """保存智能模式状态并在启用或关闭时提示/记录日志"""
@@ -708,57 +571,4 @@ class MainWindow(QtWidgets.QWidget):
         if reply != QtWidgets.QMessageBox.StandardButton.Yes:
             return
 
-        path = LOW_FILE
-        if not path.exists():
-            self.log("[!] low.txt 不存在或为空" if self.lang == Lang.ZH else "[!] low.txt not found or empty")
-            return
-
-        urls = [ln.strip() for ln in path.read_text(encoding="utf-8", errors="ignore").splitlines() if ln.strip()]
-        if not urls:
-            self.log("[!] low.txt 为空" if self.lang == Lang.ZH else "[!] low.txt is empty")
-            return
-
-        self._stop_flag.clear()
-        self.stop_btn.setEnabled(True)
-
-        def run():
-            try:
-                poster = self.ensure_poster()
-                if not poster.ensure_logged():
-                    self.log(f"[!] {tr(self.lang, 'need_login')}")
-                    return
-
-                total = len(urls)
-                left_count = 0
-                skipped = 0
-                del_wl = load_list(self.del_wl_path.text())
-
-                for i, url in enumerate(urls, 1):
-                    if self._stop_flag.is_set():
-                        self.log(tr(self.lang, "stopped"))
-                        break
-
-                    if normalize_url(url) in del_wl:
-                        self.log(tr(self.lang, "leave_protected", i=i, total=total, url=url))
-                        continue
-
-                    try:
-                        poster.driver.get(url)
-                    except Exception:
-                        try:
-                            poster.driver.execute_script("window.stop();")
-                        except Exception:
-                            pass
-
-                    ok = poster.leave_group_if_possible()
-                    if ok:
-                        left_count += 1
-                    else:
-                        skipped += 1
-                self.log(tr(self.lang, "exit_low_done", left=left_count, skip=skipped))
-            except Exception as e:
-                self.log(f'[!] 退出低活跃组异常: {e!r}')
-            finally:
-                self.stop_btn.setEnabled(False)
-
-        threading.Thread(target=run, daemon=True).start()
+        self.run_job("leave_low", self.engine.leave_low_activity, self.job_config())
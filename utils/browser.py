@@ -1,13 +1,19 @@
 ﻿# utils/browser.py
 # -*- coding: utf-8 -*-
 
+import os
+import re
+import time
 from pathlib import Path
-from selenium import webdriver
-from selenium.common.exceptions import NoSuchElementException, WebDriverException
-from selenium.webdriver.common.by import By
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urlsplit
+
+from utils.endpoints import ENDPOINTS
+
+if TYPE_CHECKING:
+    # selenium 导入不便宜，只在真正启动浏览器时才加载（见 make_driver），打开界面、命令行 report 都用不到
+    from selenium import webdriver
 
-STEAM_LOGIN_URL = 'https://store.steampowered.com/login/'
-MY_GROUPS_URL = 'https://steamcommunity.com/my/groups/'
 
 def find_chrome_path() -> str | None:
     candidates = [
@@ -29,37 +35,241 @@ def launch_official_chrome_login(profile_dir: Path | str = None):
     chrome = find_chrome_path()
     if not chrome:
         raise RuntimeError('未找到 Chrome 或 Edge。请安装一个，或在源码中改路径。')
-    args = [chrome, f"--user-data-dir={prof}", "--new-window", STEAM_LOGIN_URL]
+    args = [chrome, f"--user-data-dir={prof}", "--new-window", ENDPOINTS.login]
     try:
         subprocess.Popen(args)
     except Exception as e:
         raise RuntimeError(f'启动官方浏览器失败: {e}')
 
-def make_driver(headless: bool = True) -> webdriver.Chrome:
+# 精简模式下屏蔽的资源：图片/媒体/字体与统计脚本，发帖和检测只依赖 DOM
+LEAN_BLOCKED_URLS = [
+    '*.jpg', '*.jpeg', '*.png', '*.gif', '*.webp', '*.ico', '*.svg',
+    '*.mp4', '*.webm', '*.m4v', '*.mp3', '*.ogg',
+    '*.woff', '*.woff2', '*.ttf', '*.otf',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*facebook.net*', '*hotjar.com*',
+]
+
+# 各类操作的超时（秒），替代原先全局的 set_page_load_timeout(3)
+DEFAULT_TIMEOUTS = {
+    'page_load': 3,
+    'script': 120,
+}
+# 页面加载超时由 core.timeouts.TimeoutPolicy 按实际耗时在 open_page 里设置
+POST_TIMEOUTS = {
+    'script': 60,
+}
+# 加入脚本在页面里后台运行，这是轮询它的总时限；页面加载同样由 TimeoutPolicy 决定
+JOIN_TIMEOUTS = {
+    'script': 300,
+}
+
+def make_driver(headless: bool = True, lean: bool = False,
+                page_load_strategy: str | None = None,
+                profile_dir: Path | str | None = None) -> "webdriver.Chrome":
+    from selenium import webdriver
+    from selenium.common.exceptions import WebDriverException
     from utils.paths import PROFILE_DIR
     opts = webdriver.ChromeOptions()
-    opts.add_argument(f"--user-data-dir={PROFILE_DIR}")
+    opts.add_argument(f"--user-data-dir={Path(profile_dir) if profile_dir else PROFILE_DIR}")
     if headless:
         opts.add_argument('--headless=new')
     opts.add_argument('--disable-gpu')
     opts.add_argument('--no-sandbox')
     opts.add_argument('--lang=en-US')
+    if lean:
+        opts.add_argument('--blink-settings=imagesEnabled=false')
+        opts.add_argument('--mute-audio')
+        opts.add_argument('--autoplay-policy=user-gesture-required')
+        opts.add_argument('--disable-extensions')
+        opts.add_argument('--disable-background-networking')
+        opts.add_experimental_option('prefs', {
+            'profile.managed_default_content_settings.images': 2,
+        })
+    strategy = page_load_strategy or ('eager' if lean else None)
+    if strategy:
+        if strategy not in ('normal', 'eager', 'none'):
+            raise ValueError(f'未知的 page_load_strategy: {strategy}')
+        opts.page_load_strategy = strategy
     try:
         driver = webdriver.Chrome(options=opts)
     except WebDriverException as e:
         raise RuntimeError(f'无法启动 Chrome WebDriver: {e}')
+    if lean:
+        block_resources(driver)
     driver.set_window_size(1280, 900)
-    driver.set_page_load_timeout(3)
-    driver.set_script_timeout(120)
+    apply_timeouts(driver, **DEFAULT_TIMEOUTS)
     return driver
 
-def is_logged_in(driver: webdriver.Chrome) -> bool:
-    driver.get('https://steamcommunity.com/')
+def block_resources(driver: "webdriver.Chrome", patterns: list[str] | None = None) -> bool:
     try:
-        driver.find_element(By.CSS_SELECTOR, 'a.global_action_link[href*="login"]')
-        return False
-    except NoSuchElementException:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns or LEAN_BLOCKED_URLS})
         return True
+    except Exception:
+        return False
+
+def apply_timeouts(driver: "webdriver.Chrome", page_load: float | None = None,
+                   script: float | None = None):
+    """设置超时并记在 driver 上，current_timeouts() 读取时不用再发一次 WebDriver 命令"""
+    applied = current_timeouts(driver)
+    if page_load is not None:
+        try:
+            driver.set_page_load_timeout(page_load)
+            applied['page_load'] = page_load
+        except Exception:
+            pass
+    if script is not None:
+        try:
+            driver.set_script_timeout(script)
+            applied['script'] = script
+        except Exception:
+            pass
+    try:
+        driver._sep_timeouts = applied
+    except Exception:
+        pass
+
+def current_timeouts(driver: "webdriver.Chrome") -> dict:
+    """经 apply_timeouts 设置过的值；没设置过的项不在结果里"""
+    return dict(getattr(driver, '_sep_timeouts', None) or {})
+
+def _proc_tree_rss_linux(root_pid: int) -> int:
+    children: dict[int, list[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat", "rb") as f:
+                ppid = int(f.read().rsplit(b")", 1)[1].split()[1])
+        except Exception:
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [root_pid]
+    while stack:
+        pid = stack.pop()
+        try:
+            with open(f"/proc/{pid}/statm") as f:
+                total += int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except Exception:
+            pass
+        stack.extend(children.get(pid, []))
+    return total
+
+def browser_rss(driver: "webdriver.Chrome") -> int:
+    """chromedriver 及其全部子进程（Chrome）的常驻内存，单位字节；取不到时返回 0"""
+    try:
+        pid = driver.service.process.pid
+    except Exception:
+        return 0
+    try:
+        import psutil
+    except ImportError:
+        psutil = None
+    if psutil is not None:
+        try:
+            root = psutil.Process(pid)
+            return sum(p.memory_info().rss for p in [root, *root.children(recursive=True)])
+        except Exception:
+            return 0
+    if os.path.isdir("/proc"):
+        return _proc_tree_rss_linux(pid)
+    return 0
+
+def driver_alive(driver: "webdriver.Chrome") -> bool:
+    """会话健康检查：取窗口句柄不受页面弹窗影响，是最轻的往返命令"""
+    try:
+        return bool(driver.window_handles)
+    except Exception:
+        return False
+
+LOGIN_COOKIE = 'steamLoginSecure'
+LOGIN_CACHE_TTL = 300
+
+class LoginState:
+    """登录状态缓存：TTL 内直接复用；页面上出现登录链接时由调用方 invalidate/set(False)"""
+
+    def __init__(self, ttl: float = LOGIN_CACHE_TTL):
+        self.ttl = ttl
+        self.value: bool | None = None
+        self.checked_at = 0.0
+
+    def get(self) -> bool | None:
+        if self.value is None or time.monotonic() - self.checked_at > self.ttl:
+            return None
+        return self.value
+
+    def set(self, value: bool):
+        self.value = bool(value)
+        self.checked_at = time.monotonic()
+
+    def invalidate(self):
+        self.value = None
+
+def _cookie_matches_host(cookie: dict, host: str) -> bool:
+    domain = (cookie.get('domain') or '').lstrip('.').lower()
+    return bool(domain) and (host == domain or host.endswith('.' + domain))
+
+def _login_cookie(driver: "webdriver.Chrome") -> dict | None:
+    """社区域名下有效的 steamLoginSecure；拿不到 cookie 列表时抛 LookupError"""
+    host = urlsplit(ENDPOINTS.community).hostname or ''
+    try:
+        cookies = driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', [])
+    except Exception:
+        try:
+            if urlsplit(driver.current_url).hostname != host:
+                raise LookupError(host)
+            cookies = driver.get_cookies()
+        except LookupError:
+            raise
+        except Exception:
+            raise LookupError(host)
+    now = time.time()
+    for c in cookies:
+        if c.get('name') != LOGIN_COOKIE or not _cookie_matches_host(c, host):
+            continue
+        expires = c.get('expires', c.get('expiry', -1))
+        if (expires in (None, -1) or expires <= 0 or expires > now) and c.get('value'):
+            return c
+    return None
+
+def has_login_cookie(driver: "webdriver.Chrome") -> bool | None:
+    """通过 cookie 判断是否登录；无法判断（拿不到 cookie）时返回 None"""
+    try:
+        return _login_cookie(driver) is not None
+    except LookupError:
+        return None
+
+def login_steamid(driver: "webdriver.Chrome") -> str | None:
+    """steamLoginSecure 的值以 steamID64 开头：76561198xxxxxxxxx%7C%7C..."""
+    try:
+        c = _login_cookie(driver)
+    except LookupError:
+        return None
+    m = re.match(r'^(\d{17})', unquote(c['value'])) if c else None
+    return m.group(1) if m else None
+
+def is_logged_in(driver: "webdriver.Chrome", cache: LoginState | None = None, open_page=None) -> bool:
+    """cookie 只用作快速的肯定判断：有就算已登录；没有或拿不到时打开首页看有没有登录链接。
+    cookie 可能还没加载、或记在别的域名下，缺失不能直接当成已登出。
+    open_page(url) 用来打开首页（SteamPoster.open_page：分段等待、可取消、按自适应超时）；不给则直接 driver.get"""
+    if cache is not None:
+        cached = cache.get()
+        if cached is not None:
+            return cached
+    state = True if has_login_cookie(driver) else None
+    if state is None:
+        from selenium.common.exceptions import NoSuchElementException
+        from selenium.webdriver.common.by import By
+        (open_page or driver.get)(ENDPOINTS.home)
+        try:
+            driver.find_element(By.CSS_SELECTOR, 'a.global_action_link[href*="login"]')
+            state = False
+        except NoSuchElementException:
+            state = True
+    if cache is not None:
+        cache.set(state)
+    return state
 
 def fmt_duration(sec: float) -> str:
     sec = int(round(sec))
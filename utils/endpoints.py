@@ -0,0 +1,55 @@
+﻿# utils/endpoints.py
+# -*- coding: utf-8 -*-
+"""Steam 站点地址注册表：所有模块从这里取 URL，可用环境变量或 set_endpoints() 覆盖
+（本地替身站点、缓存反向代理等）。"""
+import os
+from urllib.parse import urlsplit
+
+DEFAULT_COMMUNITY = 'https://steamcommunity.com'
+DEFAULT_STORE = 'https://store.steampowered.com'
+
+ENV_COMMUNITY = 'SEP_COMMUNITY_URL'
+ENV_STORE = 'SEP_STORE_URL'
+
+class Endpoints:
+    def __init__(self, community: str = DEFAULT_COMMUNITY, store: str = DEFAULT_STORE):
+        self.community = community.rstrip('/')
+        self.store = store.rstrip('/')
+
+    @classmethod
+    def from_env(cls) -> "Endpoints":
+        return cls(
+            community=os.environ.get(ENV_COMMUNITY) or DEFAULT_COMMUNITY,
+            store=os.environ.get(ENV_STORE) or DEFAULT_STORE,
+        )
+
+    @property
+    def community_host(self) -> str:
+        return urlsplit(self.community).netloc.lower()
+
+    def community_url(self, path: str = '/') -> str:
+        return self.community + '/' + path.lstrip('/')
+
+    @property
+    def home(self) -> str:
+        return self.community_url('/')
+
+    @property
+    def login(self) -> str:
+        return self.store + '/login/'
+
+    @property
+    def my_groups(self) -> str:
+        return self.community_url('/my/groups/')
+
+    def is_community(self, url: str) -> bool:
+        return urlsplit((url or '').strip()).netloc.lower() == self.community_host
+
+ENDPOINTS = Endpoints.from_env()
+
+def set_endpoints(community: str | None = None, store: str | None = None) -> Endpoints:
+    if community:
+        ENDPOINTS.community = community.rstrip('/')
+    if store:
+        ENDPOINTS.store = store.rstrip('/')
+    return ENDPOINTS
@@ -0,0 +1,294 @@
+﻿# utils/group_store.py
+# -*- coding: utf-8 -*-
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from utils.paths import STATE_DB
+from utils.whitelist import normalize_url
+from utils.groups_file import iter_group_entries
+
+# 各次访问的结果
+OUT_POSTED = 'posted'
+OUT_FAILED = 'failed'
+OUT_ERROR = 'error'
+OUT_SELF_COMMENT = 'self_comment'
+OUT_NO_BOX = 'no_box'
+OUT_WHITELIST = 'whitelist'
+OUT_LEFT = 'left'
+OUT_KEPT = 'kept'
+OUT_LOGGED_OUT = 'logged_out'
+OUT_REJECTED = 'rejected'
+OUT_RATE_LIMITED = 'rate_limited'
+OUT_TIMEOUT = 'timeout'
+
+RUN_RUNNING = 'running'
+RUN_STOPPED = 'stopped'
+RUN_DONE = 'done'
+
+# 已知无留言框的群在这段时间内不再重复打开
+NO_BOX_RECHECK_SEC = 7 * 24 * 3600
+
+_GID_PATH = re.compile(r'^/gid/(\d{15,20})/$')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS groups (
+    key              TEXT PRIMARY KEY,
+    url              TEXT NOT NULL,
+    added_at         REAL,
+    last_visit       REAL,
+    last_post        REAL,
+    has_comment_box  INTEGER,
+    has_self_comment INTEGER,
+    last_outcome     TEXT,
+    failures         INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_groups_outcome ON groups(last_outcome);
+CREATE TABLE IF NOT EXISTS runs (
+    run_id     TEXT PRIMARY KEY,
+    kind       TEXT NOT NULL,
+    total      INTEGER NOT NULL,
+    cursor     INTEGER NOT NULL DEFAULT 0,
+    status     TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS group_ids (
+    alias TEXT PRIMARY KEY,
+    gid   TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_group_ids_gid ON group_ids(gid);
+CREATE TABLE IF NOT EXISTS run_items (
+    run_id  TEXT NOT NULL,
+    idx     INTEGER NOT NULL,
+    url     TEXT NOT NULL,
+    outcome TEXT,
+    ts      REAL,
+    PRIMARY KEY (run_id, idx)
+);
+"""
+
+class GroupStore:
+    def __init__(self, path: str | Path = STATE_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.row_factory = sqlite3.Row
+        with self._lock, self._db:
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('PRAGMA synchronous=NORMAL')
+            self._db.executescript(SCHEMA)
+            self._lower_vanity_keys()
+            # 任意 URL 写法 -> groupID64，常驻内存，查找 O(1)
+            self._gids: dict[str, str] = dict(self._db.execute('SELECT alias, gid FROM group_ids'))
+            # 旧版本 groups 表按 URL 记键；已知 gid 的并到 gid:<groupID64> 下
+            self._merge_aliases({k: self.canonical_key(k) for (k,) in
+                                 self._db.execute("SELECT key FROM groups WHERE key NOT GLOB 'gid:*'")})
+
+    def _lower_vanity_keys(self):
+        """旧版本的键保留了 /groups/<vanity> 的大小写；按现在的 normalize_url 改写一次，
+        与已有小写键冲突的旧行留着不动（之后不会再被查到）"""
+        for table, col in (('groups', 'key'), ('group_ids', 'alias')):
+            rows = self._db.execute(
+                f"SELECT {col} FROM {table} WHERE {col} GLOB '*/groups/*' AND {col} <> lower({col})"
+            ).fetchall()
+            self._db.executemany(
+                f'UPDATE OR IGNORE {table} SET {col} = ? WHERE {col} = ?',
+                [(normalize_url(k), k) for (k,) in rows if normalize_url(k) != k],
+            )
+
+    def _merge_aliases(self, moves: dict[str, str]):
+        """groups 表的行从旧键挪到新键；新键已有行时合并，访问结果以最近一次访问为准。调用方持有事务"""
+        for old, new in moves.items():
+            if old == new:
+                continue
+            rows = {r['key']: dict(r) for r in
+                    self._db.execute('SELECT * FROM groups WHERE key IN (?, ?)', (old, new))}
+            src = rows.get(old)
+            if src is None:
+                continue
+            dst = rows.get(new)
+            if dst is None:
+                self._db.execute('UPDATE groups SET key = ? WHERE key = ?', (new, old))
+                continue
+            newer, older = (src, dst) if (src['last_visit'] or 0) > (dst['last_visit'] or 0) else (dst, src)
+            merged = {
+                **newer, 'key': new,
+                'added_at': min((x for x in (src['added_at'], dst['added_at']) if x is not None), default=None),
+                'last_post': max((x for x in (src['last_post'], dst['last_post']) if x is not None), default=None),
+            }
+            for col in ('last_visit', 'has_comment_box', 'has_self_comment', 'last_outcome'):
+                if merged[col] is None:
+                    merged[col] = older[col]
+            self._db.execute('DELETE FROM groups WHERE key = ?', (old,))
+            self._db.execute(
+                'UPDATE groups SET url = :url, added_at = :added_at, last_visit = :last_visit, '
+                'last_post = :last_post, has_comment_box = :has_comment_box, '
+                'has_self_comment = :has_self_comment, last_outcome = :last_outcome, failures = :failures '
+                'WHERE key = :key', merged
+            )
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def get(self, url: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                'SELECT * FROM groups WHERE key = ?', (self.canonical_key(url),)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def add(self, urls) -> int:
+        now = time.time()
+        rows = [(self.canonical_key(u), u.strip(), now) for u in urls if u and u.strip()]
+        with self._lock, self._db:
+            before = self._db.total_changes
+            self._db.executemany(
+                'INSERT OR IGNORE INTO groups(key, url, added_at) VALUES (?, ?, ?)', rows
+            )
+            return self._db.total_changes - before
+
+    def record(self, url: str, outcome: str, has_comment_box: bool | None = None,
+               has_self_comment: bool | None = None):
+        now = time.time()
+        failed = outcome in (OUT_FAILED, OUT_ERROR, OUT_REJECTED, OUT_TIMEOUT)
+        with self._lock, self._db:
+            self._db.execute(
+                """
+                INSERT INTO groups(key, url, added_at, last_visit, last_post,
+                                   has_comment_box, has_self_comment, last_outcome, failures)
+                VALUES (:key, :url, :now, :now, :post, :box, :self, :outcome, :fail)
+                ON CONFLICT(key) DO UPDATE SET
+                    last_visit = :now,
+                    last_post = COALESCE(:post, last_post),
+                    has_comment_box = COALESCE(:box, has_comment_box),
+                    has_self_comment = COALESCE(:self, has_self_comment),
+                    last_outcome = :outcome,
+                    failures = CASE WHEN :fail THEN failures + 1 ELSE 0 END
+                """,
+                {
+                    'key': self.canonical_key(url), 'url': url.strip(), 'now': now,
+                    'post': now if outcome == OUT_POSTED else None,
+                    'box': None if has_comment_box is None else int(has_comment_box),
+                    'self': None if has_self_comment is None else int(has_self_comment),
+                    'outcome': outcome, 'fail': int(failed),
+                },
+            )
+
+    def known_no_comment_box(self, url: str, max_age: float = NO_BOX_RECHECK_SEC) -> bool:
+        row = self.get(url)
+        if not row or row['has_comment_box'] != 0 or not row['last_visit']:
+            return False
+        return time.time() - row['last_visit'] < max_age
+
+    # ---------- identity index ----------
+    def gid_for(self, url: str, key: str | None = None) -> str | None:
+        key = key or normalize_url(url)
+        gid = self._gids.get(key)
+        if gid:
+            return gid
+        m = _GID_PATH.match(urlsplit(key).path)
+        return m.group(1) if m else None
+
+    def canonical_key(self, url: str) -> str:
+        """同一个群的所有写法（/groups/<vanity>、/gid/<id>、大小写/斜杠差异）归一到 gid:<groupID64>"""
+        gid = self.gid_for(url)
+        return f'gid:{gid}' if gid else normalize_url(url)
+
+    def link_gids(self, pairs) -> int:
+        """登记 (url, groupID64)；来源是已加载的页面或 XML 接口。按这些写法记下的 groups 行随之并到 gid 键"""
+        rows = []
+        for url, gid in pairs:
+            gid = str(gid or '').strip()
+            if not url or not gid.isdigit():
+                continue
+            key = normalize_url(url)
+            if self._gids.get(key) != gid:
+                rows.append((key, gid))
+        if not rows:
+            return 0
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT INTO group_ids(alias, gid) VALUES (?, ?) '
+                'ON CONFLICT(alias) DO UPDATE SET gid = excluded.gid', rows
+            )
+            self._gids.update(rows)
+            self._merge_aliases({key: f'gid:{gid}' for key, gid in rows})
+        return len(rows)
+
+    def link_gid(self, gid: str, *urls: str) -> int:
+        return self.link_gids((u, gid) for u in urls if u)
+
+    def visited_keys(self) -> set[str]:
+        """访问过的群，键与 canonical_key 一致"""
+        with self._lock:
+            rows = self._db.execute('SELECT key FROM groups WHERE last_visit IS NOT NULL').fetchall()
+        return {r['key'] for r in rows}
+
+    def import_file(self, path: str | Path) -> int:
+        p = Path(path)
+        if not p.exists():
+            return 0
+        return self.add(e.url for e in iter_group_entries(p))
+
+    # ---------- runs / checkpoints ----------
+    def start_run(self, kind: str, urls: list[str]) -> str:
+        run_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                'INSERT INTO runs(run_id, kind, total, status, started_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                (run_id, kind, len(urls), RUN_RUNNING, now, now),
+            )
+            self._db.executemany(
+                'INSERT INTO run_items(run_id, idx, url) VALUES (?, ?, ?)',
+                [(run_id, i, u) for i, u in enumerate(urls, 1)],
+            )
+        return run_id
+
+    def checkpoint(self, run_id: str, idx: int, outcome: str):
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE run_items SET outcome = ?, ts = ? WHERE run_id = ? AND idx = ?',
+                (outcome, now, run_id, idx),
+            )
+            self._db.execute(
+                'UPDATE runs SET cursor = MAX(cursor, ?), updated_at = ? WHERE run_id = ?',
+                (idx, now, run_id),
+            )
+
+    def finish_run(self, run_id: str, status: str):
+        with self._lock, self._db:
+            self._db.execute(
+                'UPDATE runs SET status = ?, updated_at = ? WHERE run_id = ?',
+                (status, time.time(), run_id),
+            )
+
+    def resumable_run(self, kind: str) -> dict | None:
+        """最近一次未完成（停止或崩溃）且仍有未处理群组的任务"""
+        with self._lock:
+            row = self._db.execute(
+                """
+                SELECT r.* FROM runs r
+                WHERE r.kind = ? AND r.status != ?
+                  AND EXISTS (SELECT 1 FROM run_items i WHERE i.run_id = r.run_id AND i.outcome IS NULL)
+                ORDER BY r.started_at DESC LIMIT 1
+                """,
+                (kind, RUN_DONE),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def pending_items(self, run_id: str) -> list[tuple[int, str]]:
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT idx, url FROM run_items WHERE run_id = ? AND outcome IS NULL ORDER BY idx',
+                (run_id,),
+            ).fetchall()
+        return [(r['idx'], r['url']) for r in rows]
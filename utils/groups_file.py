@@ -0,0 +1,151 @@
+﻿# utils/groups_file.py
+# -*- coding: utf-8 -*-
+"""groups.txt 的增量同步：保留原有顺序、注释和行尾备注（`url  # 备注`），只增删变化的群组，
+写入先落临时文件再 os.replace，中途崩溃不会留下半截文件。"""
+import os
+import re
+import tempfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterator
+from urllib.parse import urlsplit
+
+from utils.whitelist import normalize_url
+
+@dataclass
+class SyncResult:
+    added: list[str] = field(default_factory=list)
+    removed: list[str] = field(default_factory=list)
+    kept: int = 0
+    duplicates: int = 0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.duplicates)
+
+_NOTE = re.compile(r'\s#')
+
+def split_entry(line: str) -> tuple[str, str]:
+    """'url  # 备注' -> ('url', '  # 备注')；整行注释或空行返回 ('', 原行)"""
+    s = line.strip()
+    if not s or s.startswith('#'):
+        return '', line
+    m = _NOTE.search(line)
+    if not m:
+        return s, ''
+    return line[:m.start()].strip(), line[m.start():].rstrip()
+
+_SEP = re.compile(r'[\s,;]+|(?=https?://)')
+_GROUP_PATH = re.compile(r'^/(?:groups/[^/]+|gid/\d{15,20})/?$')
+
+@dataclass(frozen=True)
+class GroupEntry:
+    line: int
+    url: str
+    key: str
+
+def check_group_url(url: str) -> str | None:
+    """合法返回 None，否则返回原因"""
+    try:
+        p = urlsplit(url)
+    except ValueError:
+        return 'bad url'
+    if p.scheme not in ('http', 'https') or not p.netloc:
+        return 'not an http(s) url'
+    if not _GROUP_PATH.match(p.path or ''):
+        return 'not a /groups/<name> or /gid/<id> link'
+    return None
+
+def iter_group_entries(path: str | Path, key: Callable[[str], str] = normalize_url,
+                       on_error: Callable[[int, str, str], None] | None = None,
+                       on_duplicate: Callable[[int, str], None] | None = None) -> Iterator[GroupEntry]:
+    """逐行读取群组列表并校验、规范化、去重（按 key），不整体读入内存。
+    支持 BOM、空白/逗号/分号分隔、一行挤多个链接、# 注释与行尾备注；
+    无效条目交给 on_error(行号, 原文, 原因)，重复条目交给 on_duplicate(行号, 原文)。"""
+    seen: set[str] = set()
+    with open(path, 'r', encoding='utf-8-sig', errors='replace', newline=None) as f:
+        for lineno, line in enumerate(f, 1):
+            url, _ = split_entry(line)
+            if not url:
+                continue
+            for tok in _SEP.split(url):
+                tok = tok.strip()
+                if not tok:
+                    continue
+                reason = check_group_url(tok)
+                if reason:
+                    if on_error is not None:
+                        on_error(lineno, tok, reason)
+                    continue
+                k = key(tok)
+                if k in seen:
+                    if on_duplicate is not None:
+                        on_duplicate(lineno, tok)
+                    continue
+                seen.add(k)
+                yield GroupEntry(lineno, tok, k)
+
+def atomic_write_text(path: str | Path, text: str, encoding: str = 'utf-8'):
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=p.name + '.', suffix='.tmp', dir=str(p.parent))
+    try:
+        with os.fdopen(fd, 'w', encoding=encoding, newline='') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, p)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+def sync_groups_file(path: str | Path, fetched: list[str],
+                     key: Callable[[str], str] = normalize_url) -> SyncResult:
+    """把最新抓到的群组合并进 path：已退出的删掉，新加入的追加到末尾，其余行原样保留。
+    新旧两边都按 key 比较（Engine 传 GroupStore.canonical_key，同一个群的不同写法算同一个）；
+    旧文件用 iter_group_entries 解析，注释、无效行不算群组，原样保留，不会被当成“已退出”"""
+    p = Path(path)
+    fresh = {}
+    for u in fetched:
+        if u and u.strip():
+            fresh.setdefault(key(u.strip()), u.strip())
+
+    entries: dict[int, list[GroupEntry]] = {}
+    dup_lines: set[int] = set()
+    if p.exists():
+        for e in iter_group_entries(p, key=key, on_duplicate=lambda lineno, text: dup_lines.add(lineno)):
+            entries.setdefault(e.line, []).append(e)
+        old_lines = p.read_text(encoding='utf-8-sig', errors='ignore').splitlines()
+    else:
+        old_lines = []
+
+    res = SyncResult(duplicates=len(dup_lines))
+    out = []
+    for lineno, line in enumerate(old_lines, 1):
+        here = entries.get(lineno)
+        if not here:
+            # 注释、空行、无效内容原样保留；整行都是重复链接的去掉
+            if lineno not in dup_lines:
+                out.append(line)
+            continue
+        kept = [e for e in here if e.key in fresh]
+        res.removed += [e.url for e in here if e.key not in fresh]
+        res.kept += len(kept)
+        if len(kept) == len(here) and lineno not in dup_lines:
+            out.append(line)
+        elif kept:
+            # 一行里挤了多个链接且有变化：只留还在的链接和行尾备注
+            out.append(' '.join(e.url for e in kept) + split_entry(line)[1])
+
+    seen = {e.key for here in entries.values() for e in here}
+    for k, url in fresh.items():
+        if k not in seen:
+            res.added.append(url)
+            out.append(url)
+
+    if res.changed or not p.exists():
+        atomic_write_text(p, '\n'.join(out) + ('\n' if out else ''))
+    return res
@@ -14,6 +14,7 @@ STR = {
         "fetch": "抓取群组到 groups.txt（后台）",
         "start": "开始自动发布（后台）",
         "stop": "停止",
+        "resume": "继续上次任务",
         "leave_scan": "退出无权限组（扫描）",
         "groups_path_label": "groups.txt 路径:",
         "msg_label": "发送内容:",
@@ -43,13 +44,28 @@ STR = {
         "open_group": "[{i}/{total}] 打开群组：{url}",
         "sent_ok": "    [✓] 已发送。",
         "sent_skip": "    [!] 跳过。",
+        "send_timeout": "    [!] {sec:.0f} 秒内未确认发送成功，按失败记录。",
+        "rate_limited_stop": "Steam 提示发言过于频繁，已暂停任务；稍后用“继续上次任务”接着发。",
+        "batch_leave_start": "批量退出 {n} 个群组（间隔 {interval:.2f}s）…",
+        "batch_left": "[{i}/{total}] 已退出：{url}",
+        "batch_leave_failed": "[{i}/{total}] 退出失败（HTTP {status}）：{url}",
+        "batch_leave_error": "批量退出中断：{err}",
+        "job_queued": "[i] 已排队，前面还有 {n} 个任务。",
+        "prewarm_done": "[i] 浏览器已在后台启动（{sec:.1f} 秒）。",
+        "prewarm_failed": "[!] 后台启动浏览器失败：{err}（开始任务时会再试）",
         "done": "完成。成功发送 {ok}/{total} 个群组。",
         "time_real": "实际耗时：{fmt}（{sec:.1f} 秒）",
+        "metrics_saved": "[i] 耗时最多的阶段：{top}（明细：{path}）",
+        "metrics_error": "[!] 写入耗时统计失败：{err}",
         "lang_switched": "已切换语言：{name}",
         "login_started": "已启动官方浏览器，并使用专用用户目录：{profile} 请在弹出的窗口中完成登录。登录一次后将长期生效。",
         "login_warn": "登录成功后请手动关闭浏览器，否则会导致后续报错。",
         "fetch_open_groups": "打开“我的群组”页面...",
         "fetch_saved_n": "已抓取 {n} 个群组，保存到 {path}",
+        "fetch_sync_diff": "与上次相比：新增 {added}，移除 {removed}，未变 {kept}",
+        "dedup_dropped": "合并了 {n} 个重复条目（同一群组的重复或不同写法的链接）",
+        "groups_bad_line": "{file} 第 {line} 行无效（{reason}）：{text}",
+        "groups_bad_more": "{file} 还有 {n} 处无效条目未逐条列出",
         "scan_start": "扫描 {total} 个群组，自动退出无权限组…",
         "has_comment_skip": "[{i}/{total}] 有留言权限，跳过：{url}",
         "leave_protected": "[{i}/{total}] 删除白名单保护，不退出：{url}",
@@ -58,16 +74,22 @@ STR = {
         "scan_done": "扫描完成。退出 {left} 个；保留/跳过 {skip} 个。",
         "leave_error": "退出扫描异常: {err}",
         "to_send_count": "待发送群组数: {n}",
-        "per_group_delay": "每组间隔: {delay:.2f}s，点击后等待: {wait:.2f}s",
+        "per_group_delay": "每组间隔: {delay:.2f}s，点击后最长等待确认: {wait:.0f}s（随实际耗时自动调整）",
         "smart_mode_label": "智能模式",
         "smart_mode_popup_title": "智能模式说明",
         "smart_mode_popup_body": "在留言前先扫描第一页留言区是否有自己的留言记录。如果已有留言，则跳过该群组，以避免刷屏或被踢。",
         "skip_existing_comment": "[{i}/{total}] 已存在自己的留言，跳过：{url}",
+        "skip_known_no_box": "[{i}/{total}] 记录显示无留言框，跳过：{url}",
+        "run_id": "任务编号：{run}",
+        "resume_none": "没有可继续的任务。",
+        "resume_from": "继续任务 {run}：已完成 {done}/{total}",
         "smart_mode_on": "[i] 已启用智能模式",
         "smart_mode_off": "[i] 已关闭智能模式",
         "exit_low_activity": "退出低活跃组",
         "low_activity_label": "低活跃模式",
         "low_activity_info_title": "低活跃模式",
+        "lean_browser_label": "精简浏览器（不加载图片/媒体/字体，重启浏览器后生效）",
+        "prewarm_label": "打开程序后在后台预先启动浏览器",
         "low_activity_info_body": "低活跃模式开启后，会记录所有自己上次留言还没被刷掉的群组，然后可以一键退出，以达到缩短扩列群发时间/减少无用扩列的效果",
     },
     "en": {
@@ -78,6 +100,7 @@ STR = {
         "fetch": "Fetch groups to groups.txt (background)",
         "start": "Start Auto Posting (background)",
         "stop": "Stop",
+        "resume": "Resume Last Run",
         "leave_scan": "Leave No-Permission Groups (scan)",
         "groups_path_label": "groups.txt Path:",
         "msg_label": "Message:",
@@ -107,12 +130,27 @@ STR = {
         "open_group": "[{i}/{total}] Open group: {url}",
         "sent_ok": "    [✓] Sent.",
         "sent_skip": "    [!] Skipped.",
+        "send_timeout": "    [!] No confirmation within {sec:.0f}s, counted as failed.",
+        "rate_limited_stop": "Steam says you are posting too frequently; run paused. Use Resume later to continue.",
+        "batch_leave_start": "Leaving {n} groups in one batch (interval {interval:.2f}s)…",
+        "batch_left": "[{i}/{total}] Left: {url}",
+        "batch_leave_failed": "[{i}/{total}] Leave failed (HTTP {status}): {url}",
+        "batch_leave_error": "Batch leave interrupted: {err}",
+        "job_queued": "[i] Queued behind {n} job(s).",
+        "prewarm_done": "[i] Browser started in the background ({sec:.1f}s).",
+        "prewarm_failed": "[!] Background browser start failed: {err} (will retry when a job starts)",
         "done": "Done. Sent {ok}/{total} groups successfully.",
         "time_real": "Actual time: {fmt} ({sec:.1f} sec)",
+        "metrics_saved": "[i] Slowest phases: {top} (details: {path})",
+        "metrics_error": "[!] Failed to write timing metrics: {err}",
         "login_started": "Launched the official browser with profile: {profile}. Please complete login in the popup window. It will persist.",
         "login_warn": "After logging in, please close the browser manually to avoid later errors.",
         "fetch_open_groups": "Opening “My Groups” page...",
         "fetch_saved_n": "Fetched {n} groups, saved to {path}",
+        "fetch_sync_diff": "Since last fetch: {added} added, {removed} removed, {kept} unchanged",
+        "dedup_dropped": "Merged {n} duplicate entries (same group, possibly under a different link)",
+        "groups_bad_line": "{file} line {line} ignored ({reason}): {text}",
+        "groups_bad_more": "{file}: {n} more invalid entries not listed",
         "scan_start": "Scanning {total} groups, leaving no-permission ones…",
         "has_comment_skip": "[{i}/{total}] Has comment permission, skip: {url}",
         "leave_protected": "[{i}/{total}] Protected by Leave Whitelist, skip: {url}",
@@ -121,9 +159,13 @@ STR = {
         "scan_done": "Scan complete. Left {left}; kept/skipped {skip}.",
         "leave_error": "Leave scan error: {err}",
         "to_send_count": "Groups to send: {n}",
-        "per_group_delay": "Delay per group: {delay:.2f}s, wait after click: {wait:.2f}s",
+        "per_group_delay": "Delay per group: {delay:.2f}s, wait for confirmation up to: {wait:.0f}s (adapts to observed latency)",
         "lang_switched": "Language switched: {name}",
         "skip_existing_comment": "[{i}/{total}] Existing self comment found, skip: {url}",
+        "skip_known_no_box": "[{i}/{total}] Known to have no comment box, skip: {url}",
+        "run_id": "Run ID: {run}",
+        "resume_none": "No run to resume.",
+        "resume_from": "Resuming run {run}: {done}/{total} already done",
         "smart_mode_label": "Smart Mode",
         "smart_mode_popup_title": "Smart Mode Info",
         "smart_mode_popup_body": "Before posting, scan the first page of the comment section. If your own comment is found, skip this group to avoid spamming or being kicked.",
@@ -133,6 +175,8 @@ STR = {
         "exit_low_activity": "Exit the low activity group",
         "low_activity_label": "Low activity mode",
         "low_activity_info_title": "Low activity mode",
+        "lean_browser_label": "Lean browser (skip images/media/fonts, applies on next browser start)",
+        "prewarm_label": "Start the browser in the background when the app opens",
         "low_activity_info_body": "When low activity mode is turned on, it will record all the groups where you left a message last time and have not been covered. Then you can exit with one click to shorten the time of group expansion/reduce useless group expansion.",
 
     }
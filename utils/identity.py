@@ -0,0 +1,36 @@
+﻿# utils/identity.py
+# -*- coding: utf-8 -*-
+"""登录账号身份：主页地址 / steamID64 / 自定义 vanity，以及判断“这条留言是不是我”的匹配键"""
+import re
+from urllib.parse import urlsplit
+
+STEAMID64_BASE = 76561197960265728
+
+def make_identity(url: str | None, steamid: str | None) -> dict | None:
+    """由主页地址和/或 steamID64 组出 {'url', 'steamid', 'vanity'}；两者都没有时返回 None"""
+    path = urlsplit(url).path.rstrip('/') if url else ''
+    m = re.match(r'^/profiles/(\d{17})$', path)
+    if m and not steamid:
+        steamid = m.group(1)
+    m = re.match(r'^/id/([^/]+)$', path)
+    vanity = m.group(1) if m else None
+    if not url and not steamid:
+        return None
+    return {'url': url, 'steamid': steamid, 'vanity': vanity}
+
+def author_path(href: str) -> str:
+    return urlsplit(href).path.rstrip('/').lower()
+
+def match_keys(ident: dict | None) -> tuple[list[str], str | None]:
+    """留言作者链接的路径集合，以及 data-miniprofile（32 位 accountid）"""
+    if not ident:
+        return [], None
+    paths = []
+    sid = ident.get('steamid')
+    if sid:
+        paths.append(f"/profiles/{sid}")
+    if ident.get('vanity'):
+        paths.append(f"/id/{ident['vanity']}".lower())
+    if ident.get('url') and author_path(ident['url']) not in paths:
+        paths.append(author_path(ident['url']))
+    return paths, (str(int(sid) - STEAMID64_BASE) if sid else None)
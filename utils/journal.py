@@ -0,0 +1,204 @@
+﻿# utils/journal.py
+# -*- coding: utf-8 -*-
+"""每访问一个群追加一行 JSON 到 journal.jsonl；report 逐行流式汇总一个或多个 journal，内存占用与行数无关。
+
+一行的字段：ts, job, action, url, key（canonical_key）, gid, outcome, ms, phases{阶段: ms}, error（异常类名）"""
+import heapq
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from utils.group_store import (
+    OUT_POSTED, OUT_LEFT, OUT_FAILED, OUT_ERROR, OUT_REJECTED, OUT_RATE_LIMITED, OUT_TIMEOUT,
+    OUT_LOGGED_OUT
+)
+
+SUCCESS = (OUT_POSTED, OUT_LEFT)
+FAILURES = (OUT_FAILED, OUT_ERROR, OUT_REJECTED, OUT_RATE_LIMITED, OUT_TIMEOUT, OUT_LOGGED_OUT)
+
+# 耗时直方图的桶上限（毫秒），最后一个桶收其余
+HIST_BUCKETS_MS = (100, 250, 500, 1000, 2000, 5000, 10000, 30000)
+# “最常失败”最多精确跟踪这么多个群；超过两倍时只留失败次数最多的这些（近似，群数通常远小于此）
+FAIL_TRACK_MAX = 10000
+
+class Journal:
+    """追加写入；每行写完即 flush，进程被杀最多丢当前这一行"""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._f = None
+        self._lock = threading.Lock()
+
+    def write(self, rec: dict):
+        line = json.dumps({'ts': round(time.time(), 3), **rec}, ensure_ascii=False, separators=(',', ':'))
+        with self._lock:
+            if self._f is None:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                self._f = open(self.path, 'a', encoding='utf-8', newline='\n')
+            self._f.write(line + '\n')
+            self._f.flush()
+
+    def close(self):
+        with self._lock:
+            if self._f is not None:
+                self._f.close()
+                self._f = None
+
+def iter_journal(paths: Iterable[str | Path], on_error=None) -> Iterator[dict]:
+    """依次逐行读取；坏行（例如被截断的最后一行）交给 on_error(path, 行号) 后跳过"""
+    for p in paths:
+        with open(p, 'r', encoding='utf-8', errors='replace') as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    rec = json.loads(line)
+                except ValueError:
+                    rec = None
+                if not isinstance(rec, dict):
+                    if on_error is not None:
+                        on_error(p, lineno)
+                    continue
+                yield rec
+
+class _ActionStats:
+    __slots__ = ('count', 'ok', 'failed', 'ms_total', 'ms_count', 'hist', 'outcomes', 'errors')
+
+    def __init__(self):
+        self.count = 0
+        self.ok = 0
+        self.failed = 0
+        self.ms_total = 0.0
+        self.ms_count = 0
+        self.hist = [0] * (len(HIST_BUCKETS_MS) + 1)
+        self.outcomes: dict[str, int] = {}
+        self.errors: dict[str, int] = {}
+
+class JournalReport:
+    """流式汇总：按 action 统计成功率、结果分布、耗时直方图，另保留最慢的 top 个群与最常失败的群"""
+
+    def __init__(self, top: int = 10):
+        self.top = top
+        self.lines = 0
+        self.bad_lines = 0
+        self.first_ts: float | None = None
+        self.last_ts: float | None = None
+        self.actions: dict[str, _ActionStats] = {}
+        self._slow: list[tuple[float, str, str, str]] = []
+        self._fails: dict[str, int] = {}
+
+    def add(self, rec: dict):
+        self.lines += 1
+        ts = rec.get('ts')
+        if isinstance(ts, (int, float)):
+            self.first_ts = ts if self.first_ts is None else min(self.first_ts, ts)
+            self.last_ts = ts if self.last_ts is None else max(self.last_ts, ts)
+        action = str(rec.get('action') or rec.get('job') or '?')
+        st = self.actions.get(action)
+        if st is None:
+            st = self.actions[action] = _ActionStats()
+        st.count += 1
+        outcome = str(rec.get('outcome') or '?')
+        st.outcomes[outcome] = st.outcomes.get(outcome, 0) + 1
+        key = str(rec.get('key') or rec.get('url') or '?')
+        if outcome in SUCCESS:
+            st.ok += 1
+        elif outcome in FAILURES:
+            st.failed += 1
+            self._count_failure(key)
+        err = rec.get('error')
+        if err:
+            st.errors[err] = st.errors.get(err, 0) + 1
+
+        ms = rec.get('ms')
+        if isinstance(ms, (int, float)):
+            st.ms_total += ms
+            st.ms_count += 1
+            b = 0
+            while b < len(HIST_BUCKETS_MS) and ms > HIST_BUCKETS_MS[b]:
+                b += 1
+            st.hist[b] += 1
+            item = (float(ms), key, action, outcome)
+            if len(self._slow) < self.top:
+                heapq.heappush(self._slow, item)
+            elif item > self._slow[0]:
+                heapq.heapreplace(self._slow, item)
+
+    def _count_failure(self, key: str):
+        fails = self._fails
+        fails[key] = fails.get(key, 0) + 1
+        if len(fails) > 2 * FAIL_TRACK_MAX:
+            # 一次裁掉一半，均摊下来每条记录 O(log n)
+            self._fails = dict(heapq.nlargest(FAIL_TRACK_MAX, fails.items(), key=lambda kv: kv[1]))
+
+    def feed(self, records: Iterable[dict]) -> "JournalReport":
+        for rec in records:
+            self.add(rec)
+        return self
+
+    def read(self, paths: Iterable[str | Path]) -> "JournalReport":
+        def bad(path, lineno):
+            self.bad_lines += 1
+        return self.feed(iter_journal(paths, on_error=bad))
+
+    def slowest(self) -> list[dict]:
+        return [{'key': k, 'action': a, 'outcome': o, 'ms': round(ms, 1)}
+                for ms, k, a, o in sorted(self._slow, reverse=True)]
+
+    def most_failing(self) -> list[dict]:
+        items = heapq.nlargest(self.top, self._fails.items(), key=lambda kv: kv[1])
+        return [{'key': k, 'failures': n} for k, n in items]
+
+    def as_dict(self) -> dict:
+        actions = {}
+        for name, st in sorted(self.actions.items()):
+            decided = st.ok + st.failed
+            actions[name] = {
+                'count': st.count, 'ok': st.ok, 'failed': st.failed,
+                'success_rate': round(st.ok / decided, 4) if decided else None,
+                'mean_ms': round(st.ms_total / st.ms_count, 1) if st.ms_count else None,
+                'outcomes': dict(sorted(st.outcomes.items(), key=lambda kv: -kv[1])),
+                'errors': dict(sorted(st.errors.items(), key=lambda kv: -kv[1])),
+                'histogram_ms': {(f'<={b}' if i < len(HIST_BUCKETS_MS) else f'>{HIST_BUCKETS_MS[-1]}'): n
+                                 for i, (b, n) in enumerate(zip(HIST_BUCKETS_MS + (None,), st.hist))},
+            }
+        return {
+            'lines': self.lines, 'bad_lines': self.bad_lines,
+            'first_ts': self.first_ts, 'last_ts': self.last_ts,
+            'actions': actions,
+            'slowest': self.slowest(),
+            'most_failing': self.most_failing(),
+        }
+
+def format_report(rep: JournalReport) -> str:
+    d = rep.as_dict()
+    out = [f"records: {d['lines']}" + (f"  (bad lines skipped: {d['bad_lines']})" if d['bad_lines'] else '')]
+    if d['first_ts'] is not None:
+        fmt = '%Y-%m-%d %H:%M:%S'
+        out.append(f"span: {time.strftime(fmt, time.localtime(d['first_ts']))} .. "
+                   f"{time.strftime(fmt, time.localtime(d['last_ts']))}")
+    for name, a in d['actions'].items():
+        rate = f"{a['success_rate'] * 100:.1f}%" if a['success_rate'] is not None else '-'
+        mean = f"{a['mean_ms']:.0f}ms" if a['mean_ms'] is not None else '-'
+        out.append('')
+        out.append(f"[{name}] {a['count']} visits, ok {a['ok']}, failed {a['failed']}, "
+                   f"success {rate}, mean {mean}")
+        out.append('  outcomes: ' + ', '.join(f'{k} {v}' for k, v in a['outcomes'].items()))
+        if a['errors']:
+            out.append('  errors:   ' + ', '.join(f'{k} {v}' for k, v in a['errors'].items()))
+        total = sum(a['histogram_ms'].values()) or 1
+        for bucket, n in a['histogram_ms'].items():
+            if n:
+                out.append(f"  {bucket:>8} ms {n:>8}  {'#' * max(1, round(40 * n / total))}")
+    if d['slowest']:
+        out.append('')
+        out.append('slowest:')
+        out += [f"  {r['ms']:>10.0f}ms  {r['action']:<12} {r['outcome']:<12} {r['key']}" for r in d['slowest']]
+    if d['most_failing']:
+        out.append('')
+        out.append('most failing:')
+        out += [f"  {r['failures']:>6}  {r['key']}" for r in d['most_failing']]
+    return '\n'.join(out)
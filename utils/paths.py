@@ -13,4 +13,8 @@ GROUPS_FILE = APP_DIR / 'groups.txt'
 POST_WL_FILE = APP_DIR / 'post_whitelist.txt'    
 DEL_WL_FILE  = APP_DIR / 'delete_whitelist.txt'  
 LOW_FILE = APP_DIR / 'low.txt' 
+STATE_DB = APP_DIR / 'sep_state.db'
+LOG_FILE = APP_DIR / 'logs' / 'sep.log'
+METRICS_DIR = APP_DIR / 'logs' / 'metrics'
+JOURNAL_FILE = APP_DIR / 'logs' / 'journal.jsonl'
 
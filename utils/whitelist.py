@@ -1,7 +1,15 @@
-﻿from pathlib import Path
+﻿import fnmatch
+import os
+import re
+import threading
+import time
+from pathlib import Path
 from urllib.parse import urlsplit, urlunsplit
 
+_VANITY_PATH = re.compile(r'^(/groups/)([^/]+)(/.*)$')
+
 def normalize_url(url: str) -> str:
+    """协议、域名小写，去掉查询串，路径补尾斜杠；Steam 的群组 vanity 不区分大小写，/groups/<vanity> 也转小写"""
     url = (url or "").strip()
     if not url:
         return url
@@ -11,16 +19,105 @@ def normalize_url(url: str) -> str:
     path = p.path or "/"
     if not path.endswith("/"):
         path += "/"
+    m = _VANITY_PATH.match(path)
+    if m:
+        path = m.group(1) + m.group(2).lower() + m.group(3)
     return urlunsplit((scheme, netloc, path, "", ""))
 
-def load_list(path: str | Path) -> set[str]:
-    p = Path(path)
-    if not p.exists():
-        return set()
-    items: set[str] = set()
-    for line in p.read_text(encoding="utf-8", errors="ignore").splitlines():
-        s = line.strip()
-        if not s or s.startswith("#"):
-            continue
-        items.add(normalize_url(s))
-    return items
+_GID = re.compile(r'^\d{15,20}$')
+_VANITY = re.compile(r'^[\w.-]+$')
+_GROUP_PATH = re.compile(r'^/(groups|gid)/([^/]+)/$')
+_NOTE = re.compile(r'\s#.*$')
+
+class WhitelistIndex:
+    """白名单索引：完整 URL、groupID64、群组 vanity、通配符（* ?）四类条目。
+    前三类放哈希集合，通配符合并成一个正则；文件 mtime 变化时自动重新加载，运行中修改即时生效。
+    resolve_gid(url) 可把 URL 条目映射到 groupID64（GroupStore.gid_for），让同一群的其他写法也能命中。"""
+
+    def __init__(self, path: str | Path, resolve_gid=None, check_interval: float = 1.0):
+        self.path = Path(path)
+        self.resolve_gid = resolve_gid
+        self.check_interval = check_interval
+        self.urls: set[str] = set()
+        self.gids: set[str] = set()
+        self.vanities: set[str] = set()
+        self.pattern: re.Pattern | None = None
+        self._file_gids: set[str] = set()
+        self._n_patterns = 0
+        self._sig = None
+        self._next_check = 0.0
+        self._lock = threading.Lock()
+        self.reload_if_changed(force=True)
+
+    def __len__(self) -> int:
+        return len(self.urls) + len(self.gids) + len(self.vanities) + self._n_patterns
+
+    def _signature(self):
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def reload_if_changed(self, force: bool = False) -> bool:
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return False
+        with self._lock:
+            self._next_check = now + self.check_interval
+            sig = self._signature()
+            if not force and sig == self._sig:
+                return False
+            self._sig = sig
+            self._load(sig is not None)
+        return True
+
+    def _load(self, exists: bool):
+        urls, gids, vanities, globs = set(), set(), set(), []
+        lines = self.path.read_text(encoding='utf-8-sig', errors='ignore').splitlines() if exists else []
+        for line in lines:
+            s = _NOTE.sub('', line).strip()
+            if not s or s.startswith('#'):
+                continue
+            if any(c in s for c in '*?['):
+                globs.append(s if '://' in s else '*' + s.lstrip('*'))
+            elif _GID.match(s):
+                gids.add(s)
+            elif '/' not in s and _VANITY.match(s):
+                vanities.add(s.lower())
+            else:
+                urls.add(normalize_url(s))
+        self.urls, self._file_gids, self.vanities = urls, gids, vanities
+        self._n_patterns = len(globs)
+        self.pattern = re.compile('|'.join(fnmatch.translate(g) for g in globs), re.IGNORECASE) if globs else None
+        self.resolve_gids()
+
+    def resolve_gids(self):
+        """把 URL 条目映射到 groupID64；不重新读文件，对应关系可能是之后才学到的，可随时再调"""
+        gids = set(self._file_gids)
+        if self.resolve_gid is not None:
+            for u in self.urls:
+                try:
+                    gid = self.resolve_gid(u)
+                except Exception:
+                    gid = None
+                if gid:
+                    gids.add(gid)
+        self.gids = gids
+
+    def match(self, url: str | None = None, key: str | None = None, gid: str | None = None) -> bool:
+        """key 为已 normalize_url 过的地址（循环里算一次即可）；gid 为已知的 groupID64"""
+        self.reload_if_changed()
+        if key is None:
+            key = normalize_url(url or '')
+        if key in self.urls or (gid and gid in self.gids):
+            return True
+        m = _GROUP_PATH.match(urlsplit(key).path)
+        if m:
+            if m.group(1) == 'gid' and m.group(2) in self.gids:
+                return True
+            if m.group(1) == 'groups' and m.group(2).lower() in self.vanities:
+                return True
+        return bool(self.pattern and self.pattern.match(key))
+
+    __contains__ = match
@@ -1,17 +1,76 @@
 ﻿# widgets/logger.py
 # -*- coding: utf-8 -*-
+import logging
+import threading
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+
 from PyQt6 import QtCore, QtWidgets
 
+FLUSH_INTERVAL_MS = 100
+MAX_BLOCKS = 5000
+LOG_FILE_BYTES = 2 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+def make_file_logger(path: str | Path) -> logging.Logger:
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    logger = logging.getLogger(f"sep.ui.{p.resolve()}")
+    if not logger.handlers:
+        handler = RotatingFileHandler(p, maxBytes=LOG_FILE_BYTES, backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+    return logger
+
 class UiLogger(QtCore.QObject):
+    """任意线程写入，GUI 线程定时批量追加，避免逐行重绘"""
     message = QtCore.pyqtSignal(str)
 
-    def __init__(self, widget: QtWidgets.QPlainTextEdit):
+    def __init__(self, widget: QtWidgets.QPlainTextEdit, log_file: str | Path | None = None,
+                 max_blocks: int = MAX_BLOCKS, interval_ms: int = FLUSH_INTERVAL_MS):
         super().__init__()
         self.widget = widget
-        self.message.connect(self._append)
+        self.widget.setMaximumBlockCount(max_blocks)
+        self._pending: deque[str] = deque()
+        self._lock = threading.Lock()
+        self._file = None
+        if log_file:
+            try:
+                self._file = make_file_logger(log_file)
+            except Exception:
+                self._file = None
+        self.message.connect(self.write)
 
-    @QtCore.pyqtSlot(str)
-    def _append(self, text: str):
-        self.widget.appendPlainText(text)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self.flush)
+        self._timer.start()
+
+    def write(self, text: str):
+        with self._lock:
+            self._pending.append(text)
+        if self._file is not None:
+            try:
+                self._file.info(text)
+            except Exception:
+                pass
+
+    @QtCore.pyqtSlot()
+    def flush(self):
+        with self._lock:
+            if not self._pending:
+                return
+            lines = list(self._pending)
+            self._pending.clear()
         sb = self.widget.verticalScrollBar()
-        sb.setValue(sb.maximum())
+        at_bottom = sb.value() >= sb.maximum() - 4
+        self.widget.appendPlainText("\n".join(lines))
+        if at_bottom:
+            sb.setValue(sb.maximum())
+
+    def discard_pending(self):
+        with self._lock:
+            self._pending.clear()